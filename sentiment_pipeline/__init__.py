@@ -0,0 +1,21 @@
+"""
+Reusable building blocks for the trader sentiment analysis pipeline.
+
+The in-memory stages can be called directly; nothing here imports scipy,
+matplotlib or seaborn until a test is evaluated or a figure is drawn::
+
+    import sentiment_pipeline as sp
+
+    agg = sp.analyze(tz='UTC')
+    results = sp.test(agg, welch=True)
+"""
+
+from .pipeline import (
+    CleanedTrades, SentimentFeatures, add_features, aggregate, analyze, clean, correlation, deduplicate, figure_data,
+    join, load, render, test,
+)
+
+__all__ = [
+    'CleanedTrades', 'SentimentFeatures', 'load', 'deduplicate', 'clean', 'join', 'add_features', 'aggregate', 'test',
+    'correlation', 'figure_data', 'render', 'analyze',
+]
@@ -0,0 +1,177 @@
+"""
+Per-account sentiment breakdown of the merged trade frame.
+
+Accounts are factorized once into sorted integer codes. Every metric is
+then an ``np.bincount`` over those codes, or over ``account * 5 +
+sentiment``, so hundreds of thousands of accounts cost a few passes over
+the trade columns and no per-account Python loop.
+
+The result is one row per account, sorted by address, with narrow
+dtypes. It is saved as a single columnar file (Parquet when pyarrow is
+installed). Top-N queries by any metric read only the columns they need
+from that file and select with ``np.argpartition``, so they never touch
+the trades again.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import HAS_PYARROW
+from .schema import ACCOUNT_COL, SENTIMENT_ORDER
+
+ACCOUNTS_PATH = 'outputs/account_metrics.parquet' if HAS_PYARROW else 'outputs/account_metrics.csv'
+DEFAULT_RANK_BY = 'pnl_sum'
+
+FEAR = ('Extreme Fear', 'Fear')
+GREED = ('Greed', 'Extreme Greed')
+
+
+def sentiment_slug(sentiment):
+    """Column suffix of a sentiment: 'Extreme Fear' -> 'extreme_fear'."""
+    return sentiment.lower().replace(' ', '_')
+
+
+def _ratio(num, den):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+
+class AccountTable:
+    """
+    One row per account: trade counts, win rate, PnL, buy/sell split and
+    sentiment sensitivity.
+
+    ``sentiment_beta`` is the least-squares slope of trade PnL on the
+    Fear & Greed index value (PnL per index point). ``greed_fear_spread``
+    is the average PnL in Greed and Extreme Greed minus that in Fear and
+    Extreme Fear. Per-sentiment ``trades_*``, ``win_rate_*`` and
+    ``pnl_mean_*`` columns follow SENTIMENT_ORDER.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def metrics(self):
+        return [col for col in self.table.columns if col != 'account']
+
+    def top(self, metric=DEFAULT_RANK_BY, n=10, ascending=False, min_trades=1):
+        """The ``n`` accounts with the highest (lowest if ``ascending``) ``metric``."""
+        if metric not in self.table.columns or metric == 'account':
+            raise ValueError(f"Unknown account metric '{metric}'; choose from {self.metrics}")
+        values = self.table[metric].to_numpy(dtype=np.float64)
+        keep = ~np.isnan(values)
+        if 'trades' in self.table.columns:
+            keep &= self.table['trades'].to_numpy() >= min_trades
+        idx = np.flatnonzero(keep)
+        key = values[idx] if ascending else -values[idx]
+        if n < len(idx):
+            part = np.argpartition(key, n)[:n]
+            idx, key = idx[part], key[part]
+        return self.table.iloc[idx[np.argsort(key, kind='stable')]].reset_index(drop=True)
+
+    def get(self, account):
+        """Row of one account (binary search on the sorted addresses), or None."""
+        accounts = self.table['account'].astype(str).to_numpy()
+        pos = np.searchsorted(accounts, account)
+        if pos < len(accounts) and accounts[pos] == account:
+            return self.table.iloc[pos]
+        return None
+
+    def save(self, path=ACCOUNTS_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if path.endswith('.parquet'):
+            self.table.to_parquet(path, index=False)
+        else:
+            self.table.to_csv(path, index=False)
+        return path
+
+    @classmethod
+    def load(cls, path=ACCOUNTS_PATH, columns=None):
+        """
+        Read a saved table; ``columns`` limits the read to those metrics
+        (plus account and trades). Unknown names are skipped, so
+        :meth:`top` reports them.
+        """
+        wanted = None if columns is None else {'account', 'trades', *columns}
+        if path.endswith('.parquet'):
+            if wanted is not None:
+                import pyarrow.parquet as pq
+
+                wanted = [col for col in pq.read_schema(path).names if col in wanted]
+            return cls(pd.read_parquet(path, columns=wanted))
+        return cls(pd.read_csv(path, usecols=None if wanted is None else lambda col: col in wanted))
+
+
+def account_table(merged, pnl_col, direction_col='Direction', account_col=ACCOUNT_COL):
+    """Build the AccountTable of the merged frame in one grouped pass."""
+    codes, accounts = pd.factorize(merged[account_col], sort=True)
+    valid = codes >= 0
+    acc = codes[valid].astype(np.intp)
+    n_acc = len(accounts)
+
+    pnl = merged[pnl_col].to_numpy(dtype=np.float64)[valid]
+    wins = pnl > 0
+    if direction_col in merged.columns:
+        is_buy = (merged[direction_col] == 'Buy').to_numpy()[valid]
+    else:
+        is_buy = np.zeros(len(acc), dtype=bool)
+
+    trades = np.bincount(acc, minlength=n_acc)
+    win_count = np.bincount(acc, weights=wins, minlength=n_acc)
+    pnl_sum = np.bincount(acc, weights=pnl, minlength=n_acc)
+    buys = np.bincount(acc, weights=is_buy, minlength=n_acc)
+
+    table = pd.DataFrame({
+        'account': pd.Categorical(accounts.astype(str)),
+        'trades': trades.astype(np.int32),
+        'wins': win_count.astype(np.int32),
+        'win_rate': _ratio(win_count * 100, trades).astype(np.float32),
+        'pnl_sum': pnl_sum,
+        'pnl_mean': _ratio(pnl_sum, trades).astype(np.float32),
+        'buys': buys.astype(np.int32),
+        'sells': (trades - buys).astype(np.int32),
+        'buy_share': _ratio(buys * 100, trades).astype(np.float32),
+    })
+
+    # Dense (account, sentiment) bins in SENTIMENT_ORDER; unknown labels are skipped
+    n_cls = len(SENTIMENT_ORDER)
+    labels, uniques = pd.factorize(merged['classification'])
+    order = np.array([SENTIMENT_ORDER.index(u) if u in SENTIMENT_ORDER else -1 for u in uniques] + [-1])
+    cls = order[labels[valid]]
+    known = cls >= 0
+    key = acc[known] * n_cls + cls[known]
+    shape = (n_acc, n_cls)
+    cls_trades = np.bincount(key, minlength=n_acc * n_cls).reshape(shape)
+    cls_wins = np.bincount(key, weights=wins[known], minlength=n_acc * n_cls).reshape(shape)
+    cls_pnl = np.bincount(key, weights=pnl[known], minlength=n_acc * n_cls).reshape(shape)
+    for i, sentiment in enumerate(SENTIMENT_ORDER):
+        slug = sentiment_slug(sentiment)
+        table[f'trades_{slug}'] = cls_trades[:, i].astype(np.int32)
+        table[f'win_rate_{slug}'] = _ratio(cls_wins[:, i] * 100, cls_trades[:, i]).astype(np.float32)
+        table[f'pnl_mean_{slug}'] = _ratio(cls_pnl[:, i], cls_trades[:, i]).astype(np.float32)
+
+    fear = [SENTIMENT_ORDER.index(s) for s in FEAR]
+    greed = [SENTIMENT_ORDER.index(s) for s in GREED]
+    spread = (_ratio(cls_pnl[:, greed].sum(axis=1), cls_trades[:, greed].sum(axis=1))
+              - _ratio(cls_pnl[:, fear].sum(axis=1), cls_trades[:, fear].sum(axis=1)))
+    table['greed_fear_spread'] = spread.astype(np.float32)
+
+    # Slope from per-account sums; the index value is centred to keep them well conditioned
+    if 'value' in merged.columns:
+        value = merged['value'].to_numpy(dtype=np.float64)[valid]
+        value = value - value.mean() if len(value) else value
+        sum_x = np.bincount(acc, weights=value, minlength=n_acc)
+        sxx = np.bincount(acc, weights=value * value, minlength=n_acc) - _ratio(sum_x * sum_x, trades)
+        sxy = np.bincount(acc, weights=value * pnl, minlength=n_acc) - _ratio(sum_x * pnl_sum, trades)
+        beta = _ratio(sxy, np.where(sxx > 1e-9, sxx, 0))
+    else:
+        beta = np.full(n_acc, np.nan)
+    table['sentiment_beta'] = beta.astype(np.float32)
+
+    return AccountTable(table)
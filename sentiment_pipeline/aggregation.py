@@ -0,0 +1,216 @@
+"""
+Single-pass aggregation of the merged trade frame.
+
+Classification, direction and date are encoded as integer codes once.
+Every group metric ANALYSIS 1-6 and Figures 1-3 need is then computed with
+``np.bincount`` over those codes, plus one sort of PnL within
+classification for medians and box plot quantiles, instead of re-scanning
+the frame with a boolean mask per sentiment and direction. In sketch mode
+the sort is replaced by one t-digest per classification, merged for the
+overall median. The ANALYSIS 4 test accumulators are filled in the same
+pass.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .online_stats import SentimentTests
+from .quantile_sketch import TDigest, box_stats_from_digest
+from .schema import SENTIMENT_ORDER
+
+# Matplotlib's default whisker reach, in IQRs beyond the quartiles
+WHISKER_IQR = 1.5
+# Group table of the last run, read back by the query service
+GROUPS_PATH = 'outputs/sentiment_groups.csv'
+# ANALYSIS 4 accumulators of the last run, served for unfiltered /tests requests
+TESTS_PATH = 'outputs/sentiment_tests.json'
+
+
+def sorted_quantile(x_sorted, q):
+    """Linear-interpolated quantile of an already sorted array (np.quantile semantics)."""
+    if len(x_sorted) == 0:
+        return np.nan
+    pos = q * (len(x_sorted) - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, len(x_sorted) - 1)
+    return x_sorted[lo] + (x_sorted[hi] - x_sorted[lo]) * (pos - lo)
+
+
+def box_stats(x_sorted, label, whis=WHISKER_IQR):
+    """
+    Box plot statistics of a sorted sample in ``Axes.bxp`` format.
+
+    Matches ``matplotlib.cbook.boxplot_stats`` for the default whiskers.
+    """
+    if len(x_sorted) == 0:
+        return {'label': label, 'med': np.nan, 'q1': np.nan, 'q3': np.nan, 'mean': np.nan,
+                'whislo': np.nan, 'whishi': np.nan, 'fliers': np.empty(0)}
+    q1, med, q3 = (sorted_quantile(x_sorted, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    lo_idx = np.searchsorted(x_sorted, q1 - whis * iqr, side='left')
+    hi_idx = np.searchsorted(x_sorted, q3 + whis * iqr, side='right') - 1
+    whislo = x_sorted[lo_idx] if lo_idx < len(x_sorted) else q1
+    whishi = x_sorted[hi_idx] if hi_idx >= 0 else q3
+    low = x_sorted[:np.searchsorted(x_sorted, whislo, side='left')]
+    high = x_sorted[np.searchsorted(x_sorted, whishi, side='right'):]
+    return {
+        'label': label,
+        'med': med, 'q1': q1, 'q3': q3,
+        'mean': x_sorted.mean(),
+        'whislo': whislo, 'whishi': whishi,
+        'fliers': np.concatenate([low, high]),
+    }
+
+
+class SentimentAggregates:
+    """
+    Everything the report and figures read, computed once from the merged frame.
+
+    ``groups`` is the (date, classification, is_buy) table shared with the
+    streaming and incremental modes; ``daily`` holds per-day PnL totals and
+    the mean index value; ``box`` holds Figure 1 box statistics in
+    SENTIMENT_ORDER; ``tests`` holds the significance-test accumulators.
+    """
+
+    def __init__(self, groups, daily, box, median, has_direction, tests=None):
+        self.groups = groups
+        self.daily = daily
+        self.box = box
+        self.median = median
+        self.has_direction = has_direction
+        self.tests = tests
+
+    def by_sentiment(self):
+        """count, wins, win_rate, sum and mean per sentiment in SENTIMENT_ORDER."""
+        table = self.groups.groupby('classification')[['count', 'wins', 'pnl_sum']].sum()
+        table = table.reindex(SENTIMENT_ORDER, fill_value=0)
+        table['win_rate'] = table['wins'] / table['count'] * 100
+        table['mean'] = table['pnl_sum'] / table['count']
+        return table
+
+    def by_direction(self):
+        """Mean PnL per sentiment (rows, SENTIMENT_ORDER) and direction (columns)."""
+        table = self.groups.groupby(['classification', 'is_buy'])[['count', 'pnl_sum']].sum()
+        means = (table['pnl_sum'] / table['count']).unstack('is_buy')
+        return means.reindex(index=SENTIMENT_ORDER, columns=[True, False])
+
+
+def aggregate(merged, pnl_col, direction_col='Direction', sketch_compression=None):
+    """
+    Build SentimentAggregates from the merged frame in one vectorized pass.
+
+    ``sketch_compression`` switches the median and box statistics from
+    exact order statistics to t-digests of that compression.
+    """
+    pnl = merged[pnl_col].to_numpy(dtype=np.float64)
+    classification = pd.Categorical(merged['classification'])
+    cls = classification.codes.astype(np.int64)
+    n_cls = len(classification.categories)
+
+    has_direction = direction_col in merged.columns
+    if has_direction:
+        is_buy = (merged[direction_col] == 'Buy').to_numpy()
+    else:
+        is_buy = np.zeros(len(merged), dtype=bool)
+
+    day = merged['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    day0 = int(day.min()) if len(day) else 0
+    day_idx = day - day0
+    n_days = int(day_idx.max()) + 1 if len(day) else 0
+
+    # One dense bin per (day, classification, direction)
+    key = (day_idx * n_cls + cls) * 2 + is_buy
+    n_bins = n_days * n_cls * 2
+    wins = pnl > 0
+    count = np.bincount(key, minlength=n_bins)
+    present = np.flatnonzero(count)
+    pnl_min = np.full(n_bins, np.inf)
+    pnl_max = np.full(n_bins, -np.inf)
+    np.minimum.at(pnl_min, key, pnl)
+    np.maximum.at(pnl_max, key, pnl)
+
+    groups = pd.DataFrame({
+        'date': (present // (n_cls * 2) + day0).astype('datetime64[D]'),
+        'classification': classification.categories[present // 2 % n_cls],
+        'is_buy': (present % 2).astype(bool),
+        'count': count[present],
+        'wins': np.bincount(key, weights=wins, minlength=n_bins)[present].astype(np.int64),
+        'pnl_sum': np.bincount(key, weights=pnl, minlength=n_bins)[present],
+        'pnl_sumsq': np.bincount(key, weights=pnl * pnl, minlength=n_bins)[present],
+        'pnl_min': pnl_min[present],
+        'pnl_max': pnl_max[present],
+    })
+    groups['date'] = groups['date'].astype('datetime64[ns]')
+
+    day_count = np.bincount(day_idx, minlength=n_days)
+    day_present = np.flatnonzero(day_count)
+    daily = pd.DataFrame({
+        'date': (day_present + day0).astype('datetime64[D]').astype('datetime64[ns]'),
+        'pnl_sum': np.bincount(day_idx, weights=pnl, minlength=n_days)[day_present],
+    })
+    if 'value' in merged.columns:
+        value = merged['value'].to_numpy(dtype=np.float64)
+        daily['value'] = (np.bincount(day_idx, weights=value, minlength=n_days)[day_present]
+                          / day_count[day_present])
+
+    # PnL grouped by classification (and sorted within it when exact)
+    # serves the medians and box plots
+    exact = sketch_compression is None
+    order = np.lexsort((pnl, cls)) if exact else np.argsort(cls, kind='stable')
+    pnl_sorted = pnl[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(cls, minlength=n_cls))])
+    segments = [pnl_sorted[bounds[code]:bounds[code + 1]] for code in range(n_cls)]
+
+    if exact:
+        median = float(np.median(pnl)) if len(pnl) else np.nan
+        stats_of = box_stats
+    else:
+        segments = [TDigest.from_values(seg, sketch_compression) for seg in segments]
+        overall = TDigest(sketch_compression)
+        for digest in segments:
+            overall.merge(digest)
+        median = overall.quantile(0.5)
+        stats_of = box_stats_from_digest
+
+    box = []
+    for sentiment in SENTIMENT_ORDER:
+        if sentiment in classification.categories:
+            segment = segments[classification.categories.get_loc(sentiment)]
+        else:
+            segment = np.empty(0) if exact else TDigest(sketch_compression)
+        box.append(stats_of(segment, sentiment))
+
+    # Rank bins span the observed (already trimmed) PnL range
+    tests = SentimentTests((pnl.min(), pnl.max()) if len(pnl) else None)
+    tests.update(cls, classification.categories, pnl)
+
+    return SentimentAggregates(groups, daily, box, median, has_direction, tests)
+
+
+def save_groups(groups, path=GROUPS_PATH):
+    """Write the group table through a temporary file, so readers never see it half-written."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    groups.to_csv(f'{path}.tmp', index=False)
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def load_groups(path=GROUPS_PATH):
+    return pd.read_csv(path, parse_dates=['date'])
+
+
+def save_tests(tests, path=TESTS_PATH):
+    """Write the SentimentTests accumulators through a temporary file, like save_groups."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f'{path}.tmp', 'w') as fh:
+        json.dump(tests.to_dict(), fh)
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def load_tests(path=TESTS_PATH):
+    with open(path) as fh:
+        return SentimentTests.from_dict(json.load(fh))
@@ -0,0 +1,358 @@
+"""
+Benchmark harness: synthetic trade exports and per-stage timings.
+
+``generate`` writes a Hyperliquid-style ``historical_data.csv`` with
+the same 16 columns as the real export. The file is written in chunks, so
+100M rows need no more memory than 1M:
+
+- Timestamps are sorted and fall on days present in
+  ``fear_greed_index.csv``.
+- A configurable share of rows repeat the Transaction Hash of a recent
+  earlier row, including across chunk boundaries.
+- Accounts and coins are drawn from fixed pools. PnL is heavy-tailed,
+  with zeros and a few missing values.
+
+``run`` times every pipeline stage of each (size, mode) case in a fresh
+process with :class:`.instrument.RunLog`. It records wall and CPU time,
+rows in/out and each stage's peak RSS. The JSON report has one entry per
+case.
+``compare`` diffs two reports and flags stages that got slower::
+
+    python -m sentiment_pipeline.benchmark --sizes 1M,10M --modes full,stream
+    python -m sentiment_pipeline.benchmark --compare old.json outputs/benchmark/report.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from .cache import HAS_PYARROW
+from .instrument import RunLog, children_peak_rss_mb
+from .join import to_days
+from .schema import MS_PER_DAY
+
+DEFAULT_DIR = 'outputs/benchmark'
+DEFAULT_SIZES = '1M,10M,100M'
+DEFAULT_MODES = 'full,stream'
+MODES = ['full', 'compact', 'stream', 'parallel']
+DEFAULT_DUP_RATE = 0.02
+DEFAULT_ACCOUNTS = 10_000
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_SEED = 0
+# Slowdown ratio ``compare`` reports as a regression
+DEFAULT_THRESHOLD = 1.2
+REPORT_VERSION = 1
+
+COINS = ['BTC', 'ETH', 'SOL', 'HYPE', '@107', 'XRP', 'DOGE', 'SUI', 'kPEPE', 'AVAX']
+DIRECTIONS = ['Buy', 'Sell', 'Open Long', 'Close Long', 'Open Short', 'Close Short']
+# Largest distance, in rows, between a duplicate and the row it repeats
+DUP_REACH = 10_000
+IST_OFFSET_MS = 19_800_000
+
+_HEX = np.array([f'{i:02x}'.encode() for i in range(256)], dtype='S2')
+_MINUTES = np.array([f'{h:02d}:{m:02d}' for h in range(24) for m in range(60)])
+
+
+def parse_size(text):
+    """'1M' -> 1_000_000, '250k' -> 250_000, '5000' -> 5000."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def _mix(ids):
+    """splitmix64 finalizer: distinct ids -> well-spread 64-bit hash values."""
+    z = ids.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _hex_hashes(ids):
+    """66-character 0x-prefixed transaction hashes, one per id."""
+    digits = _HEX[_mix(ids).byteswap().view(np.uint8).reshape(-1, 8)].view('S16').ravel()
+    return np.char.add(b'0x' + b'0' * 48, digits).astype(str)
+
+
+def _ist_strings(ts):
+    """'dd-mm-YYYY HH:MM' IST wall-clock strings from a per-day table and a per-minute table."""
+    local = ts + IST_OFFSET_MS
+    day = local // MS_PER_DAY
+    first = int(day.min())
+    dates = pd.to_datetime(np.arange(first, int(day.max()) + 1) * MS_PER_DAY, unit='ms')
+    dates = dates.strftime('%d-%m-%Y ').to_numpy(dtype=str)
+    return np.char.add(dates[day - first], _MINUTES[(local % MS_PER_DAY) // 60_000])
+
+
+def _trade_chunk(rng, start, n, rows, days, account_pool, dup_rate):
+    """Columns of rows ``start`` to ``start + n`` of the synthetic export."""
+    # This chunk covers its share of the day range, so the file stays sorted
+    lo, hi = start / rows * len(days), (start + n) / rows * len(days)
+    pos = np.sort(rng.random(n)) * (hi - lo) + lo
+    ts = days[pos.astype(np.int64)] * MS_PER_DAY + ((pos % 1) * MS_PER_DAY).astype(np.int64)
+
+    ids = np.arange(start, start + n)
+    dup = rng.random(n) < dup_rate
+    ids[dup] = np.maximum(ids[dup] - rng.integers(1, DUP_REACH, dup.sum()), 0)
+
+    pnl = rng.standard_t(3, n) * 50 + 5
+    pnl[rng.random(n) < 0.45] = 0.0
+    pnl[rng.random(n) < 0.001] = np.nan
+    size_tokens = rng.lognormal(0, 1.5, n)
+    price = rng.lognormal(5, 2, n)
+    direction = rng.integers(0, len(DIRECTIONS), n)
+    return {
+        'Account': account_pool[rng.zipf(1.5, n) % len(account_pool)],
+        'Coin': np.array(COINS)[rng.integers(0, len(COINS), n)],
+        'Execution Price': price,
+        'Size Tokens': size_tokens,
+        'Size USD': price * size_tokens,
+        'Side': np.where(direction % 2 == 0, 'BUY', 'SELL'),
+        'Timestamp IST': _ist_strings(ts),
+        'Start Position': rng.normal(0, 100, n),
+        'Direction': np.array(DIRECTIONS)[direction],
+        'Closed PnL': pnl,
+        'Transaction Hash': _hex_hashes(ids),
+        'Order ID': rng.integers(10**10, 10**11, n),
+        'Crossed': np.where(rng.random(n) < 0.7, 'True', 'False'),
+        'Fee': np.abs(rng.normal(0, 1, n)),
+        'Trade ID': rng.integers(10**14, 10**15, n),
+        'Timestamp': ts,
+    }
+
+
+def generate(path, rows, dup_rate=DEFAULT_DUP_RATE, accounts=DEFAULT_ACCOUNTS, seed=DEFAULT_SEED,
+             fear_greed_path='data/fear_greed_index.csv', chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write a synthetic trade export of ``rows`` rows to ``path``; returns ``path``.
+
+    Uses pyarrow's CSV writer when it is installed (about 10x faster than
+    ``DataFrame.to_csv``); the file contents are the same apart from float
+    formatting.
+    """
+    days = np.unique(to_days(pd.to_datetime(pd.read_csv(fear_greed_path)['date'])))
+    rng = np.random.default_rng(seed)
+    account_pool = np.array([f'0x{i:040x}' for i in _mix(np.arange(accounts)) >> np.uint64(32)])
+    tmp = f'{path}.tmp'
+    writer = None
+    with open(tmp, 'wb') as fh:
+        for start in range(0, rows, chunk_rows):
+            columns = _trade_chunk(rng, start, min(chunk_rows, rows - start), rows, days, account_pool, dup_rate)
+            if HAS_PYARROW:
+                import pyarrow as pa
+                import pyarrow.csv as pa_csv
+
+                table = pa.table(columns)
+                if writer is None:
+                    # Unquoted header, like the real export
+                    fh.write((','.join(columns) + '\n').encode())
+                    options = pa_csv.WriteOptions(include_header=False, quoting_style='none')
+                    writer = pa_csv.CSVWriter(fh, table.schema, write_options=options)
+                writer.write_table(table)
+            else:
+                pd.DataFrame(columns).to_csv(fh, header=start == 0, index=False)
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    return path
+
+
+def _run_case(trades_path, fear_greed_path, rows, mode, workers, plots):
+    """One benchmark case; runs in its own process so peaks do not leak between cases."""
+    from . import pipeline
+    from .features import SentimentFeatures
+
+    log = RunLog()
+    fear_greed = pd.read_csv(fear_greed_path)
+    error = None
+    try:
+        if mode in ('stream', 'parallel'):
+            from .parallel import parallel_analysis
+            from .streaming import stream_analysis
+
+            with log.stage(mode, rows) as stage:
+                if mode == 'stream':
+                    result = stream_analysis(trades_path, fear_greed)
+                else:
+                    result = parallel_analysis(trades_path, fear_greed, workers)
+                stage.rows_out = int(result.groups['count'].sum())
+            with log.stage('test'):
+                result.tests.summary(kruskal=True)
+        else:
+            compact = mode == 'compact'
+            with log.stage('load', rows) as stage:
+                trades = pipeline.read_trades(trades_path, compact)
+                stage.rows_out = len(trades)
+            with log.stage('clean', len(trades)) as stage:
+                cleaned = pipeline.clean(trades, compact=compact)
+                stage.rows_out = len(cleaned.trades)
+            del trades
+            with log.stage('join', len(cleaned.trades)) as stage:
+                merged = pipeline.join(cleaned.trades, fear_greed, compact=compact)
+                stage.rows_out = len(merged)
+            pnl_col = cleaned.pnl_col
+            del cleaned
+            with log.stage('features', len(merged)) as stage:
+                pipeline.add_features(merged, pnl_col, SentimentFeatures(fear_greed), compact)
+                stage.rows_out = len(merged)
+            with log.stage('aggregate', len(merged)) as stage:
+                agg = pipeline.aggregate(merged, pnl_col)
+                stage.rows_out = len(agg.groups)
+            with log.stage('test'):
+                pipeline.test(agg, kruskal=True)
+            if plots != 'none':
+                import tempfile
+
+                with tempfile.TemporaryDirectory() as out_dir:
+                    data = pipeline.figure_data(agg, pipeline.correlation(merged, pnl_col))
+                    with log.stage('render'):
+                        pipeline.render(data, out_dir, plots, 1)
+    except MemoryError:
+        error = 'MemoryError'
+    stages = log.stages
+    return {
+        'rows': rows,
+        'mode': mode,
+        'stages': stages,
+        'total_wall_s': round(sum(s['wall_s'] for s in stages), 4),
+        'peak_rss_mb': max((s['peak_rss_mb'] for s in stages), default=None),
+        # Worker processes (parallel mode, figures) are not in the stage peaks
+        'children_peak_rss_mb': round(children_peak_rss_mb(), 1),
+        'error': error,
+    }
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(sizes, modes, dup_rate=DEFAULT_DUP_RATE, out_dir=DEFAULT_DIR, workers=None, plots='none',
+        seed=DEFAULT_SEED, fear_greed_path='data/fear_greed_index.csv', keep_data=True, log=print):
+    """
+    Generate (or reuse) a trade file per size and benchmark every mode on it.
+
+    Returns the report dict; ``log`` receives one progress line per step.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    report = {
+        'version': REPORT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': _environment(),
+        'params': {'dup_rate': dup_rate, 'seed': seed, 'workers': workers, 'plots': plots},
+        'cases': [],
+    }
+    for rows in sizes:
+        path = os.path.join(out_dir, f'trades_{rows}_{dup_rate:g}_{seed}.csv')
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            generate(path, rows, dup_rate, seed=seed, fear_greed_path=fear_greed_path)
+            log(f"✓ Generated {rows:,} rows in {time.perf_counter() - start:.1f}s: {path}")
+        for mode in modes:
+            with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+                case = pool.submit(_run_case, path, fear_greed_path, rows, mode, workers, plots).result()
+            case['file_mb'] = round(os.path.getsize(path) / 2**20, 1)
+            report['cases'].append(case)
+            status = f"⚠ {case['error']}" if case['error'] else '✓'
+            log(f"{status} {mode:<9} {rows:>13,} rows  {case['total_wall_s']:>9.2f}s  "
+                f"peak {case['peak_rss_mb'] or 0:>9.1f} MB")
+        if not keep_data:
+            os.remove(path)
+    return report
+
+
+def compare(old, new, threshold=DEFAULT_THRESHOLD):
+    """
+    Stage-by-stage wall time ratios (new / old) of two reports.
+
+    Returns rows of (rows, mode, stage, old_s, new_s, ratio, regressed).
+    """
+    before = {(c['rows'], c['mode'], s['stage']): s['wall_s'] for c in old['cases'] for s in c['stages']}
+    rows = []
+    for case in new['cases']:
+        for stage in case['stages']:
+            key = (case['rows'], case['mode'], stage['stage'])
+            if key in before and before[key] > 0:
+                ratio = stage['wall_s'] / before[key]
+                rows.append(key + (before[key], stage['wall_s'], ratio, ratio > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline on synthetic trade exports')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'comma-separated row counts, e.g. 1M,10M (default: {DEFAULT_SIZES})')
+    parser.add_argument('--modes', default=DEFAULT_MODES,
+                        help=f"comma-separated subset of {','.join(MODES)} (default: {DEFAULT_MODES})")
+    parser.add_argument('--dup-rate', type=float, default=DEFAULT_DUP_RATE,
+                        help=f'share of rows repeating an earlier Transaction Hash (default: {DEFAULT_DUP_RATE})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f'generator seed (default: {DEFAULT_SEED})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes for the parallel mode (default: one per CPU)')
+    parser.add_argument('--plots', default='none', choices=['none', 'full', 'fast', 'svg'],
+                        help='also time figure rendering in the full/compact modes (default: none)')
+    parser.add_argument('--out-dir', default=DEFAULT_DIR,
+                        help=f'where data files and the report go (default: {DEFAULT_DIR})')
+    parser.add_argument('--report', default=None,
+                        help='report path (default: <out-dir>/report.json)')
+    parser.add_argument('--delete-data', action='store_true',
+                        help='remove each generated trade file after its cases ran')
+    parser.add_argument('--generate-only', metavar='PATH',
+                        help='write one synthetic trade file of the first --sizes entry to PATH and exit')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two reports instead of running; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'slowdown ratio flagged by --compare (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as fh:
+            old = json.load(fh)
+        with open(args.compare[1]) as fh:
+            new = json.load(fh)
+        print(f"{'Rows':>13} {'Mode':<9} {'Stage':<10} {'Old (s)':>10} {'New (s)':>10} {'Ratio':>7}")
+        print("-"*65)
+        regressions = 0
+        for rows, mode, stage, old_s, new_s, ratio, regressed in compare(old, new, args.threshold):
+            regressions += regressed
+            print(f"{rows:>13,} {mode:<9} {stage:<10} {old_s:>10.3f} {new_s:>10.3f} {ratio:>6.2f}x"
+                  f"{'  ✗ REGRESSION' if regressed else ''}")
+        print(f"\n{'✗' if regressions else '✓'} {regressions} stage(s) slower than {args.threshold:g}x")
+        return 1 if regressions else 0
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    if args.generate_only:
+        generate(args.generate_only, sizes[0], args.dup_rate, seed=args.seed)
+        print(f"✓ Wrote {sizes[0]:,} rows: {args.generate_only}")
+        return 0
+
+    modes = [mode.strip() for mode in args.modes.split(',')]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s) {unknown}; choose from {MODES}")
+    report = run(sizes, modes, args.dup_rate, args.out_dir, args.workers, args.plots, args.seed,
+                 keep_data=not args.delete_data)
+    path = args.report or os.path.join(args.out_dir, 'report.json')
+    with open(path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"✓ Saved: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
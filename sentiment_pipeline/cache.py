@@ -0,0 +1,125 @@
+"""
+Columnar Parquet cache of the cleaned, sentiment-joined trade frame.
+
+The cache lives in ``<cache_root>/<key>/`` with one Parquet file per
+calendar month under ``parts/`` plus a ``manifest.json``. The key hashes
+the size and modification time of every input file together with the
+cleaning parameters, so editing either the data or the cleaning rules
+produces a fresh cache instead of stale results. Warm runs read back only the
+columns the analyses ask for.
+
+One entry is kept per set of cleaning parameters (default, ``--compact``,
+``--timezone`` ...), so runs with different options do not evict each
+other. Saving a new entry removes only older entries of the same
+parameter set; anything in the cache root that is not a cache entry is
+left alone.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+
+# Checked without importing: pandas loads pyarrow only when Parquet is read or written
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+DEFAULT_CACHE_ROOT = 'outputs/cache'
+CACHE_VERSION = 2
+MANIFEST = 'manifest.json'
+PARTS = 'parts'
+# Entry directories are named by cache_key
+_KEY_PATTERN = re.compile(r'[0-9a-f]{16}')
+
+
+def cache_key(paths, params):
+    """Hash input file fingerprints and cleaning parameters into a key."""
+    digest = hashlib.sha256()
+    digest.update(f'v{CACHE_VERSION}'.encode())
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}'.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def params_key(params):
+    """Hash of the cleaning parameters alone: entries sharing it replace each other."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def cache_dir(key, root=DEFAULT_CACHE_ROOT):
+    return os.path.join(root, key)
+
+
+def is_cached(key, root=DEFAULT_CACHE_ROOT):
+    return HAS_PYARROW and os.path.exists(os.path.join(cache_dir(key, root), MANIFEST))
+
+
+def read_manifest(key, root=DEFAULT_CACHE_ROOT):
+    with open(os.path.join(cache_dir(key, root), MANIFEST)) as fh:
+        return json.load(fh)
+
+
+def load(key, columns=None, root=DEFAULT_CACHE_ROOT):
+    """Read the cached frame, restricted to ``columns`` when given."""
+    manifest = read_manifest(key, root)
+    if columns is not None:
+        columns = [col for col in columns if col in manifest['columns']]
+    return pd.read_parquet(os.path.join(cache_dir(key, root), PARTS), columns=columns)
+
+
+def _entry_manifest(root, entry):
+    """Manifest of a cache entry directory under ``root``, or None for anything else."""
+    path = os.path.join(root, entry)
+    if not _KEY_PATTERN.fullmatch(entry) or not os.path.isdir(os.path.join(path, PARTS)):
+        return None
+    try:
+        with open(os.path.join(path, MANIFEST)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and 'version' in manifest else None
+
+
+def save(key, merged, meta=None, root=DEFAULT_CACHE_ROOT, partition_col='date', params=None):
+    """
+    Persist ``merged`` partitioned by month of ``partition_col``.
+
+    Files are written to a temporary directory that is renamed into place.
+    Afterwards, cache entries built with the same ``params`` (the cleaning
+    parameters passed to cache_key) or by an older cache version are removed.
+    """
+    final_dir = cache_dir(key, root)
+    tmp_dir = final_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, PARTS))
+
+    months = merged[partition_col].dt.to_period('M')
+    for month, part in merged.groupby(months, sort=True):
+        part.to_parquet(os.path.join(tmp_dir, PARTS, f'part-{month}.parquet'), index=False)
+
+    manifest = {
+        'version': CACHE_VERSION,
+        'rows': len(merged),
+        'columns': merged.columns.tolist(),
+        'params': params,
+        'params_key': params_key(params),
+        **(meta or {}),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as fh:
+        json.dump(manifest, fh, indent=2, default=str)
+
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+
+    for entry in os.listdir(root):
+        if entry == key:
+            continue
+        manifest = _entry_manifest(root, entry)
+        if manifest is not None and (manifest['version'] != CACHE_VERSION
+                                     or manifest.get('params_key') == params_key(params)):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
@@ -0,0 +1,696 @@
+"""
+Command-line interface: runs the pipeline stages and prints the report.
+
+``analysis.py`` and ``python -m sentiment_pipeline`` both call
+:func:`main`. Heavy optional modules are only imported by the stages that
+need them, so ``--no-plots`` runs never load matplotlib or seaborn.
+
+Every stage runs inside a :class:`.instrument.RunLog` stage, so
+``--timings`` and ``--run-log`` cost nothing extra to collect.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import warnings
+
+import pandas as pd
+
+from . import cache, incremental
+from .accounts import ACCOUNTS_PATH, DEFAULT_RANK_BY, AccountTable, account_table
+from .aggregation import GROUPS_PATH, TESTS_PATH, aggregate, save_groups, save_tests
+from .cube import CUBE_PATH, DEFAULT_GROUP_BY, SentimentCube, build_cube, parse_dimensions, parse_where
+from .dedup import DEFAULT_DIGEST_BITS, DIGEST_BITS
+from .features import FEATURE_COLUMNS, SentimentFeatures
+from .instrument import DEFAULT_PROFILE_DIR, PROFILERS, RunLog
+from .parallel import parallel_analysis
+from .pipeline import (
+    FEAR_GREED_PATH, TRADES_PATH, PNL_QUANTILES, add_features, clean, correlation, figure_data, join,
+    memory_mb, read_trades, render,
+)
+from .quantile_sketch import DEFAULT_COMPRESSION
+from .render import PLOT_MODES
+from .report import ACCOUNT_REPORT_COLUMNS, print_accounts, print_analysis, print_cube, print_resampling
+from .resampling import DEFAULT_SEED, resample
+from .schema import ACCOUNT_COL, COIN_COL, DIRECTION_COL, HASH_COL, PNL_COL, TIMESTAMP_COL
+from .store import DEFAULT_STORE_DIR, TradeStore, write_store
+from .streaming import DEFAULT_MEMORY_LIMIT_MB, EXACT_PEAK_BYTES_PER_ROW, exact_memory_mb, stream_analysis
+
+# Columns the analyses and figures read back on a warm run (besides PnL)
+ANALYSIS_COLUMNS = ['datetime', 'date', DIRECTION_COL, 'classification', 'value']
+
+
+def _argument_type(parse):
+    """argparse type from a parser that raises ValueError."""
+    def convert(text):
+        try:
+            return parse(text)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return convert
+
+
+def _date(text):
+    return pd.Timestamp(text).strftime('%Y-%m-%d')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Trader behavior & market sentiment analysis')
+    parser.add_argument('--stream', action='store_true',
+                        help='read historical_data.csv in chunks with bounded memory (tables only, no figures)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='fold only trades newer than the stored watermark into persisted daily sums')
+    parser.add_argument('--state-dir', default=incremental.DEFAULT_STATE_DIR,
+                        help=f'where --incremental keeps its state (default: {incremental.DEFAULT_STATE_DIR})')
+    parser.add_argument('--trades-file', default=TRADES_PATH,
+                        help=f'trade export to analyze (default: {TRADES_PATH})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='run the chunked pipeline on N processes over file partitions (tables only)')
+    parser.add_argument('--memory-limit-mb', type=int, default=DEFAULT_MEMORY_LIMIT_MB,
+                        help=f'working-set ceiling for --stream/--incremental chunks and per --workers process (default: {DEFAULT_MEMORY_LIMIT_MB}); '
+                             f'exact quantiles also keep ~{EXACT_PEAK_BYTES_PER_ROW} bytes per trade, so only --approx-quantiles gives a fixed ceiling')
+    parser.add_argument('--approx-quantiles', action='store_true',
+                        help='use mergeable t-digest sketches for the outlier bounds, median and box plots')
+    parser.add_argument('--sketch-compression', type=int, default=DEFAULT_COMPRESSION,
+                        help=f't-digest compression; higher is more accurate (default: {DEFAULT_COMPRESSION})')
+    parser.add_argument('--hash-bits', type=int, choices=DIGEST_BITS, default=DEFAULT_DIGEST_BITS,
+                        help=f'width of the Transaction Hash digests used for deduplication (default: {DEFAULT_DIGEST_BITS}; --incremental keeps the width it bootstrapped with)')
+    parser.add_argument('--timezone', default='UTC',
+                        help='timezone whose calendar days trades are assigned to, e.g. Asia/Kolkata (default: UTC)')
+    parser.add_argument('--as-of', action='store_true',
+                        help='give trades on days missing from the Fear & Greed index the last published value instead of dropping them')
+    parser.add_argument('--welch', action='store_true',
+                        help='use Welch\'s unequal-variance t-test for Extreme Fear vs Extreme Greed')
+    parser.add_argument('--kruskal', action='store_true',
+                        help='add a Kruskal-Wallis test across sentiment groups (binned ranks)')
+    parser.add_argument('--resamples', type=int, default=0,
+                        help='bootstrap CIs and Fear vs Greed permutation test with N resamples (e.g. 10000; default: off)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f'random seed for --resamples (default: {DEFAULT_SEED})')
+    parser.add_argument('--resample-workers', type=int, default=1,
+                        help='processes used for --resamples batches (default: 1)')
+    parser.add_argument('--accounts', action='store_true',
+                        help=f'compute per-account metrics, save them to {ACCOUNTS_PATH} and print the top accounts')
+    parser.add_argument('--accounts-from', metavar='PATH',
+                        help='print the top accounts from a saved account table without reading the trades')
+    parser.add_argument('--top-accounts', type=int, default=10,
+                        help='number of accounts listed by --accounts/--accounts-from (default: 10)')
+    parser.add_argument('--rank-by', default=DEFAULT_RANK_BY,
+                        help=f'account metric to rank by, e.g. win_rate, pnl_mean, sentiment_beta (default: {DEFAULT_RANK_BY})')
+    parser.add_argument('--min-trades', type=int, default=1,
+                        help='only rank accounts with at least this many trades (default: 1)')
+    parser.add_argument('--cube', action='store_true',
+                        help=f'build the date x sentiment x direction x hour x coin cube, save it to {CUBE_PATH} and print a roll-up')
+    parser.add_argument('--cube-from', metavar='PATH',
+                        help='print a roll-up of a saved cube without reading the trades')
+    parser.add_argument('--group-by', type=_argument_type(parse_dimensions), default=list(DEFAULT_GROUP_BY),
+                        help=f"comma-separated cube dimensions to roll up to, empty for a grand total (default: {','.join(DEFAULT_GROUP_BY)})")
+    parser.add_argument('--where', type=_argument_type(parse_where), action='append', default=[],
+                        help='cube filter DIMENSION=VALUE, VALUE,VALUE or LO:HI (inclusive); repeatable')
+    parser.add_argument('--plots', choices=PLOT_MODES, default='full',
+                        help='figure output: full (300 dpi PNG), fast (100 dpi PNG), svg, or none (default: full)')
+    parser.add_argument('--no-plots', dest='plots', action='store_const', const='none',
+                        help='skip the figures (same as --plots none)')
+    parser.add_argument('--plot-workers', type=int, default=None,
+                        help='processes used to draw figures (default: one per CPU)')
+    parser.add_argument('--compact', action='store_true',
+                        help='read only the columns the analyses use, with narrow numeric and categorical dtypes')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='print the trade frame footprint after each stage (always on with --compact)')
+    store = parser.add_mutually_exclusive_group()
+    store.add_argument('--ingest', action='store_true',
+                       help='clean and join the trades, write them to the memory-mapped store in --store-dir and stop')
+    store.add_argument('--from-store', action='store_true',
+                       help='analyze the memory-mapped store instead of loading, cleaning and joining the trades')
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR,
+                        help=f'location of the memory-mapped trade store (default: {DEFAULT_STORE_DIR})')
+    parser.add_argument('--start', metavar='YYYY-MM-DD', type=_argument_type(_date),
+                        help='with --from-store, analyze only trades on or after this date')
+    parser.add_argument('--end', metavar='YYYY-MM-DD', type=_argument_type(_date),
+                        help='with --from-store, analyze only trades on or before this date')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore and do not write the Parquet cache of the merged data')
+    parser.add_argument('--cache-dir', default=cache.DEFAULT_CACHE_ROOT,
+                        help=f'location of the merged data cache (default: {cache.DEFAULT_CACHE_ROOT})')
+    parser.add_argument('--export-csv', action='store_true',
+                        help='also write the full merged dataset to outputs/merged_data.csv')
+    parser.add_argument('--timings', action='store_true',
+                        help='print wall/CPU time, rows in/out and peak memory of every stage')
+    parser.add_argument('--run-log', metavar='PATH',
+                        help='write the per-stage timings and run settings to a JSON file')
+    parser.add_argument('--profile', choices=PROFILERS,
+                        help='run every stage under cProfile or tracemalloc; results go into the run log')
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR,
+                        help=f'where --profile writes .prof files and, without --run-log, run_log.json (default: {DEFAULT_PROFILE_DIR})')
+    parser.add_argument('--quiet', action='store_true',
+                        help='print nothing but errors (for batch jobs; pair with --run-log)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    warnings.filterwarnings('ignore')
+    log = RunLog(args.profile, args.profile_dir if args.profile == 'cprofile' else None)
+    run_log = args.run_log
+    if run_log is None and args.profile:
+        run_log = os.path.join(args.profile_dir, 'run_log.json')
+
+    output = io.StringIO()
+    exit_code = None
+    try:
+        with contextlib.redirect_stdout(output) if args.quiet else contextlib.nullcontext():
+            exit_code = _run(args, log)
+    finally:
+        if args.quiet and exit_code != 0:
+            for line in output.getvalue().splitlines():
+                if line.lstrip().startswith('✗'):
+                    print(line.strip(), file=sys.stderr)
+        if run_log:
+            log.save(run_log, argv=sys.argv[1:] if argv is None else list(argv), mode=_mode(args),
+                     exit_code=exit_code)
+
+    if args.timings and not args.quiet:
+        print("[TIMINGS] Wall/CPU time, rows and peak memory by stage\n")
+        log.print_table()
+        print()
+    if run_log and not args.quiet:
+        print(f"✓ Saved run log: {run_log}\n")
+    return exit_code
+
+
+def _mode(args):
+    if args.accounts_from:
+        return 'accounts-from'
+    if args.cube_from:
+        return 'cube-from'
+    if args.incremental:
+        return 'incremental'
+    if args.workers > 1:
+        return 'parallel'
+    if args.stream:
+        return 'stream'
+    if args.ingest:
+        return 'ingest'
+    return 'store' if args.from_store else 'full'
+
+
+def _run(args, log):
+    print("\n" + "="*100)
+    print("TRADER BEHAVIOR & MARKET SENTIMENT ANALYSIS - COMPLETE EXECUTION")
+    print("="*100 + "\n")
+
+    if args.accounts_from:
+        return _run_account_query(args, log)
+    if args.cube_from:
+        return _run_cube_query(args, log)
+    if args.stream or args.incremental or args.workers > 1:
+        return _run_chunked(args, log)
+    return _run_full(args, log)
+
+
+def _run_account_query(args, log):
+    try:
+        with log.stage('accounts_load') as stage:
+            accounts = AccountTable.load(args.accounts_from, ACCOUNT_REPORT_COLUMNS + [args.rank_by])
+            stage.rows_out = len(accounts)
+        print(f"✓ Loaded account table: {args.accounts_from}\n")
+        with log.stage('report', len(accounts)):
+            print_accounts(accounts, args.rank_by, args.top_accounts, args.min_trades)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"✗ ERROR reading account table {args.accounts_from}: {e}")
+        return 1
+    print("\n" + "="*100 + "\n")
+    return 0
+
+
+def _run_cube_query(args, log):
+    try:
+        with log.stage('cube_load') as stage:
+            cube = SentimentCube.load(args.cube_from)
+            stage.rows_out = len(cube)
+        print(f"✓ Loaded cube: {args.cube_from} ({len(cube):,} cells, {cube.trades:,} trades)\n")
+        with log.stage('report', len(cube)) as stage:
+            result = cube.query(args.group_by, **dict(args.where))
+            stage.rows_out = len(result)
+            print_cube(result, args.group_by, args.where)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"✗ ERROR reading cube {args.cube_from}: {e}")
+        return 1
+    print("\n" + "="*100 + "\n")
+    return 0
+
+
+def _footprint(stage, frame):
+    return stage, len(frame), frame.shape[1], memory_mb(frame)
+
+
+def _sketch_compression(args):
+    return args.sketch_compression if args.approx_quantiles else None
+
+
+def _output_dir(args):
+    """Directory of a run's tables and figures; a date window of the store gets its own."""
+    if args.from_store and (args.start or args.end):
+        return os.path.join('outputs', f"window_{args.start or 'first'}_{args.end or 'last'}")
+    return 'outputs'
+
+
+def _analysis_columns(args, pnl_col):
+    """Columns a warm run reads back from the cache or store; None for all of them."""
+    if args.export_csv or args.ingest:
+        return None
+    return [pnl_col] + ANALYSIS_COLUMNS + [ACCOUNT_COL] * args.accounts + [COIN_COL] * args.cube
+
+
+# ============================================================================
+# STREAMING / INCREMENTAL / PARALLEL MODE: chunked STEP 1-5 + ANALYSIS 1-6 from grouped sums
+# ============================================================================
+def _run_chunked(args, log):
+    sketch_compression = _sketch_compression(args)
+    fear_greed = pd.read_csv(FEAR_GREED_PATH)
+
+    tz, as_of = args.timezone, args.as_of
+    # An incremental update keeps no per-trade arrays; only full passes over the file do
+    if sketch_compression is None and not (args.incremental and incremental.has_state(args.state_dir)):
+        projected = exact_memory_mb(args.trades_file)
+        if projected > args.memory_limit_mb:
+            print(f"⚠ Exact quantiles need about {projected:,.0f} MB for {args.trades_file}, above "
+                  f"--memory-limit-mb {args.memory_limit_mb}; pass --approx-quantiles for a fixed ceiling\n")
+    with log.stage(_mode(args)) as stage:
+        if args.incremental:
+            version = incremental.state_version(args.state_dir)
+            bootstrap = version != incremental.STATE_VERSION
+            if bootstrap and version is not None:
+                print(f"⚠ State in {args.state_dir} has version {version}, not {incremental.STATE_VERSION}; "
+                      f"rebuilding it from {args.trades_file}")
+            print(f"[INCREMENTAL] {'Bootstrapping' if bootstrap else 'Updating'} state in {args.state_dir} "
+                  f"(memory limit {args.memory_limit_mb} MB)...\n")
+            result = incremental.update(args.trades_file, fear_greed, args.state_dir,
+                                        args.memory_limit_mb, sketch_compression, args.timezone, args.as_of,
+                                        args.hash_bits)
+            tz, as_of = incremental.join_settings(args.state_dir)
+        elif args.workers > 1:
+            print(f"[PARALLEL] Processing trade partitions on {args.workers} workers "
+                  f"(memory limit {args.memory_limit_mb} MB per worker)...\n")
+            result = parallel_analysis(args.trades_file, fear_greed, args.workers,
+                                       args.memory_limit_mb, sketch_compression, args.timezone, args.as_of,
+                                       args.hash_bits)
+        else:
+            print(f"[STREAMING] Reading trades in chunks (memory limit {args.memory_limit_mb} MB)...\n")
+            result = stream_analysis(args.trades_file, fear_greed, args.memory_limit_mb, sketch_compression,
+                                     tz=args.timezone, as_of=args.as_of, hash_bits=args.hash_bits)
+        stage.rows_in = result.rows_read
+        stage.rows_out = int(result.groups['count'].sum())
+
+    print(f"✓ Rows read: {result.rows_read:,}")
+    if args.incremental:
+        print(f"✓ Rows at the watermark skipped (analyzed by the last run): {result.reread}")
+        print(f"{'⚠' if result.stale else '✓'} Rows older than the watermark skipped: {result.stale}")
+    print(f"✓ Duplicates removed: {result.duplicates} records")
+    print(f"✓ Removed rows with missing PnL: {result.missing_pnl} records")
+    print(f"✓ Outliers removed (1st-99th percentile): {result.outliers} records")
+    print(f"✓ Trades without sentiment dropped: {result.unmatched} records")
+    if args.incremental:
+        pending = 0 if result.pending is None else len(result.pending)
+        print(f"✓ Trades waiting for a Fear & Greed row: {pending}")
+        print(f"✓ Watermark: {pd.to_datetime(result.watermark, unit='ms')}")
+        if (tz, as_of) != (args.timezone, args.as_of):
+            print(f"⚠ Using the sentiment join settings the state was bootstrapped with: "
+                  f"--timezone {tz}{' --as-of' if as_of else ''}")
+
+    print("\n" + "="*100)
+    print("ANALYSIS RESULTS")
+    print("="*100 + "\n")
+    with log.stage('report', len(result.groups)) as stage:
+        daily_stats = print_analysis(result.groups, result.median, result.tests,
+                                     welch=args.welch, kruskal=args.kruskal)
+        SentimentFeatures(fear_greed, as_of).join(daily_stats)
+        stage.rows_out = len(daily_stats)
+
+    print("\n" + "-"*100)
+    print("[SAVING RESULTS]\n")
+    with log.stage('save', len(daily_stats)):
+        daily_stats.to_csv('outputs/daily_statistics.csv', index=False)
+        save_groups(result.groups)
+        save_tests(result.tests)
+    print("✓ Saved: outputs/daily_statistics.csv")
+    print(f"✓ Saved: {GROUPS_PATH}")
+    print(f"✓ Saved: {TESTS_PATH}")
+    print("⚠ Streaming, incremental and parallel modes skip outputs/merged_data.csv and figures")
+    if args.accounts:
+        print("⚠ Per-account metrics need the in-memory run (omit --stream/--incremental/--workers)")
+    if args.cube:
+        print("⚠ The cube needs the in-memory run (omit --stream/--incremental/--workers)")
+    if args.ingest or args.from_store:
+        print("⚠ The trade store needs the in-memory run (omit --stream/--incremental/--workers)")
+
+    print("\n" + "="*100)
+    print("✓ ANALYSIS COMPLETE!")
+    print("="*100 + "\n")
+    return 0
+
+
+def _run_full(args, log):
+    sketch_compression = _sketch_compression(args)
+
+    # ============================================================================
+    # CACHE / STORE LOOKUP: reuse the cleaned & merged frame from a previous run
+    # ============================================================================
+    input_files = [FEAR_GREED_PATH, args.trades_file]
+    cleaning_params = {
+        'dedup_subset': HASH_COL,
+        'pnl_quantiles': list(PNL_QUANTILES),
+        'pnl_quantile_sketch': sketch_compression,
+        'sentiment_join': f"day number ({args.timezone}), {'as-of' if args.as_of else 'drop unmatched'}",
+    }
+    if args.compact:
+        cleaning_params['compact'] = True
+    if args.hash_bits != DEFAULT_DIGEST_BITS:
+        cleaning_params['dedup_digest_bits'] = args.hash_bits
+    inputs_exist = all(os.path.exists(path) for path in input_files)
+    use_cache = not args.no_cache and cache.HAS_PYARROW and inputs_exist
+    cache_key = cache.cache_key(input_files, cleaning_params) if inputs_exist else None
+    if (args.start or args.end) and not args.from_store:
+        print("⚠ --start/--end only apply to --from-store runs; analyzing all trades\n")
+
+    memory = []
+    if args.from_store:
+        merged, pnl_col = _open_store(args, cache_key, log)
+        if merged is None:
+            return 1
+        memory.append(_footprint('Store mapped', merged))
+    elif use_cache and cache.is_cached(cache_key, args.cache_dir):
+        print(f"[CACHE] Loading cleaned & merged data from {cache.cache_dir(cache_key, args.cache_dir)}\n")
+        with log.stage('cache_load') as stage:
+            pnl_col = cache.read_manifest(cache_key, args.cache_dir)['pnl_col']
+            merged = cache.load(cache_key, _analysis_columns(args, pnl_col), args.cache_dir)
+            stage.rows_out = len(merged)
+        print(f"✓ Loaded {len(merged):,} trades x {merged.shape[1]} columns (STEP 1-4 skipped)")
+        memory.append(_footprint('Cache loaded', merged))
+    else:
+        merged, pnl_col = _load_clean_join(args, sketch_compression, memory, log)
+        if merged is None:
+            return 1
+        if use_cache:
+            try:
+                with log.stage('cache_save', len(merged)):
+                    cache.save(cache_key, merged, {'pnl_col': pnl_col}, args.cache_dir,
+                               params=cleaning_params)
+                print(f"✓ Cached merged data: {cache.cache_dir(cache_key, args.cache_dir)}")
+            except Exception as e:
+                print(f"⚠ Could not write cache: {e}")
+        elif not cache.HAS_PYARROW:
+            print("⚠ pyarrow not installed, merged data cache disabled")
+
+    if args.ingest:
+        print(f"\n[INGEST] Writing memory-mapped trade store to {args.store_dir}...\n")
+        with log.stage('ingest', len(merged)) as stage:
+            stage.rows_out = write_store(merged, args.store_dir,
+                                         {'pnl_col': pnl_col, 'key': cache_key, 'params': cleaning_params})
+        print(f"✓ Stored {len(merged):,} trades x {merged.shape[1]} columns, one file per column")
+        print("✓ Analyze them with --from-store [--start YYYY-MM-DD] [--end YYYY-MM-DD]")
+        print("\n" + "="*100 + "\n")
+        return 0
+
+    # ============================================================================
+    # STEP 5: FEATURE ENGINEERING
+    # ============================================================================
+    print("\n[STEP 5] Engineering features...\n")
+    with log.stage('features', len(merged)) as stage:
+        features = SentimentFeatures(pd.read_csv(FEAR_GREED_PATH), args.as_of)
+        add_features(merged, pnl_col, features, args.compact)
+        stage.rows_out = len(merged)
+    print(f"✓ Created 'profitable' feature")
+    print(f"✓ Created 'sentiment_numeric' feature")
+    if DIRECTION_COL in merged.columns:
+        print(f"✓ Created 'is_buy' feature from Direction column")
+    else:
+        print(f"⚠ Direction column not found")
+    print(f"✓ Created time-based features")
+    print(f"✓ Created rolling/lagged sentiment features: {', '.join(FEATURE_COLUMNS)}")
+    memory.append(_footprint('STEP 5 features', merged))
+
+    if args.memory_report or args.compact:
+        print(f"\n[MEMORY] Trade frame footprint by stage ({'compact' if args.compact else 'default'} dtypes)\n")
+        for stage, rows, columns, mb in memory:
+            per_row = mb * 2**20 / rows if rows else 0
+            print(f"  {stage:<18} {rows:>12,} rows x {columns:>3} cols  {mb:>10.1f} MB  ({per_row:,.0f} B/row)")
+
+    print("\n" + "="*100)
+    print("ANALYSIS RESULTS")
+    print("="*100 + "\n")
+
+    # ============================================================================
+    # ANALYSIS 1-6: one aggregation pass feeds every table and chart below
+    # ============================================================================
+    with log.stage('aggregate', len(merged)) as stage:
+        agg = aggregate(merged, pnl_col, DIRECTION_COL, sketch_compression)
+        stage.rows_out = len(agg.groups)
+
+    with log.stage('report', len(agg.groups)) as stage:
+        daily_stats = print_analysis(agg.groups, agg.median, agg.tests, agg.has_direction,
+                                     args.welch, args.kruskal)
+        features.join(daily_stats)
+        stage.rows_out = len(daily_stats)
+
+    resampling = None
+    if args.resamples > 0:
+        print("\n" + "-"*100)
+        with log.stage('resample', len(merged)) as stage:
+            resampling = resample(merged, pnl_col, args.resamples, seed=args.seed,
+                                  workers=args.resample_workers)
+            stage.rows_out = len(resampling.intervals)
+        print_resampling(resampling)
+
+    accounts = None
+    if args.accounts:
+        print("\n" + "-"*100)
+        if ACCOUNT_COL in merged.columns:
+            with log.stage('accounts', len(merged)) as stage:
+                accounts = account_table(merged, pnl_col, DIRECTION_COL)
+                stage.rows_out = len(accounts)
+            try:
+                print_accounts(accounts, args.rank_by, args.top_accounts, args.min_trades)
+            except ValueError as e:
+                print(f"⚠ {e}")
+        else:
+            print(f"⚠ Column '{ACCOUNT_COL}' not found, per-account metrics skipped")
+
+    cube = None
+    if args.cube:
+        print("\n" + "-"*100)
+        with log.stage('cube', len(merged)) as stage:
+            cube = build_cube(merged, pnl_col, DIRECTION_COL, COIN_COL)
+            stage.rows_out = len(cube)
+        try:
+            print_cube(cube.query(args.group_by, **dict(args.where)), args.group_by, args.where)
+        except ValueError as e:
+            print(f"⚠ {e}")
+
+    # ============================================================================
+    # SAVE RESULTS
+    # ============================================================================
+    print("\n" + "-"*100)
+    print("[SAVING RESULTS]\n")
+
+    # A date window must not overwrite the full-history outputs
+    out_dir = _output_dir(args)
+    os.makedirs(out_dir, exist_ok=True)
+    if out_dir != 'outputs':
+        print(f"⚠ Date-windowed store run: saving to {out_dir}/, full-history outputs left unchanged")
+    daily_path = os.path.join(out_dir, 'daily_statistics.csv')
+    groups_path = os.path.join(out_dir, os.path.basename(GROUPS_PATH))
+    tests_path = os.path.join(out_dir, os.path.basename(TESTS_PATH))
+    accounts_path = os.path.join(out_dir, os.path.basename(ACCOUNTS_PATH))
+    cube_path = os.path.join(out_dir, os.path.basename(CUBE_PATH))
+    merged_path = os.path.join(out_dir, 'merged_data.csv')
+
+    with log.stage('save', len(daily_stats)):
+        daily_stats.to_csv(daily_path, index=False)
+        print(f"✓ Saved: {daily_path}")
+        print(f"✓ Saved: {save_groups(agg.groups, groups_path)}")
+        print(f"✓ Saved: {save_tests(agg.tests, tests_path)}")
+
+        if resampling is not None:
+            intervals_path = os.path.join(out_dir, 'resampling_intervals.csv')
+            resampling.intervals.to_csv(intervals_path, index=False)
+            print(f"✓ Saved: {intervals_path}")
+
+        if accounts is not None:
+            print(f"✓ Saved: {accounts.save(accounts_path)} ({len(accounts):,} accounts)")
+
+        if cube is not None:
+            print(f"✓ Saved: {cube.save(cube_path)} ({len(cube):,} cells)")
+
+        # Full merged dataset export is opt-in; the Parquet cache holds the same rows
+        if args.export_csv:
+            merged.to_csv(merged_path, index=False)
+            print(f"✓ Saved: {merged_path}")
+        else:
+            print(f"⚠ Skipped {merged_path} (pass --export-csv to write it)")
+
+    # ============================================================================
+    # CREATE VISUALIZATIONS: drawn from the aggregates, skipped when unchanged
+    # ============================================================================
+    print(f"\n[CREATING VISUALIZATIONS] ({args.plots} mode)\n")
+
+    figures = []
+    if args.plots == 'none':
+        print("⚠ Figures skipped (--no-plots)")
+    else:
+        with log.stage('render', len(merged)):
+            data = figure_data(agg, correlation(merged, pnl_col))
+            figures = render(data, out_dir, args.plots, args.plot_workers)
+        for path, rendered in figures:
+            print(f"✓ Saved: {path}" if rendered else f"✓ Unchanged, kept: {path}")
+
+    print("\n" + "="*100)
+    print("✓ ANALYSIS COMPLETE!")
+    print("="*100)
+    print("\nGenerated Files:")
+    for path, _ in figures:
+        print(f"  - {path}")
+    print(f"  - {daily_path}")
+    print(f"  - {groups_path}")
+    print(f"  - {tests_path}")
+    if accounts is not None:
+        print(f"  - {accounts_path}")
+    if cube is not None:
+        print(f"  - {cube_path}")
+    if args.export_csv:
+        print(f"  - {merged_path}")
+
+    print("\n" + "="*100)
+    print("NEXT STEPS:")
+    print("="*100)
+    print("\n1. Review the generated PNG files to understand the patterns")
+    print("2. Extract key findings from the numbers printed above")
+    print("3. Create ANALYSIS_REPORT.md with your findings")
+    print("4. Create GitHub repository")
+    print("5. Submit email with GitHub link and resume")
+    print("\n" + "="*100 + "\n")
+    return 0
+
+
+def _open_store(args, key, log):
+    """
+    Map the --store-dir trades (within --start/--end) for --from-store runs.
+
+    Returns (merged, pnl_col), or (None, None) when the store cannot be read.
+    ``key`` is the cache key of the current inputs, to flag a stale store.
+    """
+    print(f"[STORE] Memory-mapping trades from {args.store_dir}\n")
+    try:
+        with log.stage('store_open') as stage:
+            store = TradeStore(args.store_dir)
+            pnl_col = store.manifest['pnl_col']
+            merged = store.frame(_analysis_columns(args, pnl_col), args.start, args.end)
+            stage.rows_out = len(merged)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"✗ ERROR opening trade store {args.store_dir}: {e} (run --ingest first)")
+        return None, None
+    print(f"✓ Mapped {len(merged):,} of {len(store):,} trades x {merged.shape[1]} columns (STEP 1-4 skipped)")
+    if args.start or args.end:
+        first, last = store.date_range
+        print(f"  Date window: {args.start or first.date()} to {args.end or last.date()}")
+    if key is not None and store.manifest.get('key') != key:
+        print("⚠ Store was ingested from other input files or cleaning options; rerun --ingest to refresh it")
+    return merged, pnl_col
+
+
+def _load_clean_join(args, sketch_compression, memory, log):
+    """
+    STEP 1-4 with their console report; returns (merged, pnl_col) or (None, None) on error.
+
+    Appends (stage, rows, columns, MB) of each intermediate frame to ``memory``
+    and times the load, clean and join stages in ``log``.
+    """
+    # ============================================================================
+    # STEP 1: LOAD DATA
+    # ============================================================================
+    print("[STEP 1] Loading datasets...\n")
+
+    try:
+        fear_greed = pd.read_csv(FEAR_GREED_PATH)
+        print("✓ Fear & Greed Index loaded successfully")
+        print(f"  Shape: {fear_greed.shape}")
+    except Exception as e:
+        print(f"✗ ERROR loading fear_greed_index.csv: {e}")
+        return None, None
+
+    try:
+        with log.stage('load') as stage:
+            trader_data = read_trades(args.trades_file, args.compact)
+            stage.rows_out = len(trader_data)
+        print("✓ Historical trader data loaded successfully")
+        print(f"  Shape: {trader_data.shape}")
+        memory.append(_footprint('STEP 1 loaded', trader_data))
+    except Exception as e:
+        print(f"✗ ERROR loading historical_data.csv: {e}")
+        return None, None
+
+    # ============================================================================
+    # STEP 2: EXPLORE DATA STRUCTURE
+    # ============================================================================
+    print("\n[STEP 2] Exploring data structure...\n")
+
+    print("FEAR & GREED INDEX COLUMNS:")
+    print(f"  {fear_greed.columns.tolist()}\n")
+
+    print("TRADER DATA COLUMNS:")
+    for i, col in enumerate(trader_data.columns, 1):
+        print(f"  {i}. {col}")
+
+    print(f"\nTrader data preview:")
+    print(trader_data.head(2))
+
+    # ============================================================================
+    # STEP 3: DATA CLEANING & PREPARATION
+    # ============================================================================
+    print("\n[STEP 3] Cleaning and preparing data...\n")
+
+    fear_greed['date'] = pd.to_datetime(fear_greed['date'])
+    print(f"✓ Fear & Greed dates converted")
+
+    columns = trader_data.columns.tolist()
+    try:
+        with log.stage('clean', len(trader_data)) as stage:
+            cleaned = clean(trader_data, args.timezone, sketch_compression, args.compact, args.hash_bits)
+            stage.rows_out = len(cleaned.trades)
+    except ValueError as e:
+        print(f"✗ ERROR: {e}")
+        return None, None
+
+    if cleaned.timestamp_col == TIMESTAMP_COL:
+        print(f"✓ Trader timestamps converted from milliseconds")
+    else:
+        print(f"⚠ Column '{TIMESTAMP_COL}' not found. Available: {columns}")
+        print(f"✓ Used alternative column: {cleaned.timestamp_col}")
+    print(f"✓ Date extracted from timestamps")
+    print(f"  Trader data date range: {cleaned.date_range[0]} to {cleaned.date_range[1]}")
+    print(f"✓ Duplicates removed: {cleaned.duplicates} records")
+    if cleaned.pnl_col != PNL_COL:
+        print(f"⚠ Remapped PnL column to: {cleaned.pnl_col}")
+    print(f"✓ Removed rows with missing PnL")
+    print(f"✓ Outliers removed (1st-99th percentile): {cleaned.outliers} records")
+    print(f"  Remaining trades: {len(cleaned.trades):,}")
+    memory.append(_footprint('STEP 3 cleaned', cleaned.trades))
+
+    # ============================================================================
+    # STEP 4: MERGE DATASETS
+    # ============================================================================
+    print("\n[STEP 4] Merging sentiment data with trader data...\n")
+
+    with log.stage('join', len(cleaned.trades)) as stage:
+        merged = join(cleaned.trades, fear_greed, args.as_of, args.compact)
+        stage.rows_out = len(merged)
+    memory.append(_footprint('STEP 4 merged', merged))
+
+    print(f"Before removing NaN sentiment: {len(cleaned.trades):,} trades")
+    print(f"After removing NaN sentiment: {len(merged):,} trades")
+    if args.as_of:
+        print(f"✓ Days missing from the index use the last published value")
+    print(f"✓ Merge complete")
+    return merged, cleaned.pnl_col
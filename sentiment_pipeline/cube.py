@@ -0,0 +1,274 @@
+"""
+Pre-aggregated cube of additive PnL measures for ad-hoc roll-ups.
+
+The merged trades are reduced once to one row per non-empty cell of
+date x classification x direction x hour x day_of_week x coin, holding
+``count``, ``wins``, ``pnl_sum`` and ``pnl_sumsq``. All four are additive,
+so any roll-up (group by some dimensions, filter on any of them) is a
+masked ``np.bincount`` over the cells and never touches trade-level data.
+Win rate, mean and standard deviation are derived after summing.
+
+``hour`` and ``date`` are in the timezone of the run that built the cube
+(``--timezone``). ``day_of_week`` follows from the date but is kept for
+filtering, and direction keeps the export's labels (Buy, Sell, Open Long,
+...). The cube is saved as a single columnar file (Parquet when pyarrow
+is installed) with categorical dimensions.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import HAS_PYARROW
+from .schema import COIN_COL, DAY_NAMES, DIRECTION_COL, SENTIMENT_ORDER
+
+CUBE_PATH = 'outputs/sentiment_cube.parquet' if HAS_PYARROW else 'outputs/sentiment_cube.csv'
+
+DIMENSIONS = ['date', 'classification', 'direction', 'hour', 'day_of_week', 'coin']
+MEASURES = ['count', 'wins', 'pnl_sum', 'pnl_sumsq']
+DEFAULT_GROUP_BY = ['classification']
+
+# Label of cells whose direction or coin is missing
+MISSING_LABEL = '(none)'
+# Separates the two ends of an inclusive range in --where expressions
+RANGE_SEP = ':'
+# Roll-ups with at most this many possible groups bin directly instead of sorting
+_DENSE_GROUPS = 1 << 22
+
+
+def _categorical(values, order=None):
+    """Categorical with ``order`` first (when given), then any other labels sorted."""
+    values = pd.Series(values).astype(object).where(pd.notna(values), MISSING_LABEL)
+    labels = sorted(set(values.unique()) - set(order or []))
+    return pd.Categorical(values, categories=list(order or []) + labels)
+
+
+def _day_numbers(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+class SentimentCube:
+    """
+    Cells of the cube as a DataFrame: DIMENSIONS then MEASURES.
+
+    ``classification`` follows SENTIMENT_ORDER and ``day_of_week`` runs
+    Monday to Sunday; other categorical dimensions are sorted.
+    """
+
+    def __init__(self, table):
+        # Parquet round-trips the categories; only CSV loads need rebuilding
+        for dim, order in (('classification', SENTIMENT_ORDER), ('day_of_week', DAY_NAMES),
+                           ('direction', []), ('coin', [])):
+            dtype = table[dim].dtype
+            if not (isinstance(dtype, pd.CategoricalDtype) and list(dtype.categories[:len(order)]) == order):
+                table[dim] = _categorical(table[dim], order)
+        self.table = table
+        self._codes = {}
+        self._measures = {m: table[m].to_numpy(dtype=np.float64) for m in MEASURES}
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def trades(self):
+        return int(self.table['count'].sum())
+
+    def codes(self, dim):
+        """Integer code per cell: day number, hour, or categorical code."""
+        if dim not in self._codes:
+            if dim == 'date':
+                self._codes[dim] = _day_numbers(self.table['date'])
+            elif dim == 'hour':
+                self._codes[dim] = self.table['hour'].to_numpy(dtype=np.int64)
+            else:
+                self._codes[dim] = self.table[dim].cat.codes.to_numpy(dtype=np.int64)
+        return self._codes[dim]
+
+    def _code_of(self, dim, label):
+        if label is None:
+            return None
+        if dim == 'date':
+            return int(np.datetime64(pd.Timestamp(label).date(), 'D').astype(np.int64))
+        if dim == 'hour':
+            return int(label)
+        categories = self.table[dim].cat.categories
+        return categories.get_loc(label) if label in categories else -2
+
+    def mask(self, dim, spec):
+        """
+        Cells matching ``spec`` on ``dim``: one label, a list of labels, or a
+        ``slice(lo, hi)`` with both ends inclusive (either may be None).
+        """
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Unknown cube dimension '{dim}'; choose from {DIMENSIONS}")
+        codes = self.codes(dim)
+        if isinstance(spec, slice):
+            lo, hi = self._code_of(dim, spec.start), self._code_of(dim, spec.stop)
+            if -2 in (lo, hi):
+                return np.zeros(len(codes), dtype=bool)
+            keep = np.ones(len(codes), dtype=bool)
+            if lo is not None:
+                keep &= codes >= lo
+            if hi is not None:
+                keep &= codes <= hi
+            return keep
+        if isinstance(spec, (list, tuple, set, range, np.ndarray, pd.Index)):
+            return np.isin(codes, [self._code_of(dim, label) for label in spec])
+        return codes == self._code_of(dim, spec)
+
+    def query(self, by=DEFAULT_GROUP_BY, **filters):
+        """
+        Roll the cells up to one row per combination of the ``by`` dimensions.
+
+        Keyword filters restrict each dimension (see :meth:`mask`). Returns
+        the ``by`` labels with summed MEASURES plus win_rate (%), pnl_mean
+        and pnl_std, sorted by the dimension orders.
+        """
+        by = list(by)
+        for dim in by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension '{dim}'; choose from {DIMENSIONS}")
+        keep = np.ones(len(self.table), dtype=bool)
+        for dim, spec in filters.items():
+            keep &= self.mask(dim, spec)
+        rows = np.flatnonzero(keep)
+
+        # Mixed-radix key of the by-dimension codes, offset to start at 0
+        key = np.zeros(len(rows), dtype=np.int64)
+        lows = []
+        n_groups = 1
+        for dim in by:
+            codes = self.codes(dim)[rows]
+            low = int(codes.min()) if len(codes) else 0
+            span = int(codes.max()) - low + 1 if len(codes) else 1
+            key = key * span + (codes - low)
+            lows.append((low, span))
+            n_groups *= span
+        if n_groups <= _DENSE_GROUPS:
+            count = np.bincount(key, minlength=n_groups)
+            cells = np.flatnonzero(count)
+            sums = {m: np.bincount(key, weights=self._measures[m][rows], minlength=n_groups)[cells]
+                    for m in MEASURES}
+        else:
+            cells, inverse = np.unique(key, return_inverse=True)
+            sums = {m: np.bincount(inverse, weights=self._measures[m][rows], minlength=len(cells))
+                    for m in MEASURES}
+
+        out = {}
+        rest = cells
+        for dim, (low, span) in reversed(list(zip(by, lows))):
+            rest, code = np.divmod(rest, span)
+            out[dim] = code + low
+        result = pd.DataFrame({dim: self._labels(dim, out[dim]) for dim in by})
+        count = sums['count']
+        result['count'] = count.astype(np.int64)
+        result['wins'] = sums['wins'].astype(np.int64)
+        result['pnl_sum'] = sums['pnl_sum']
+        result['pnl_sumsq'] = sums['pnl_sumsq']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['win_rate'] = np.where(count > 0, sums['wins'] / count * 100, np.nan)
+            result['pnl_mean'] = np.where(count > 0, sums['pnl_sum'] / count, np.nan)
+            var = (sums['pnl_sumsq'] - sums['pnl_sum'] ** 2 / count) / (count - 1)
+            result['pnl_std'] = np.where(count > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+        return result
+
+    def _labels(self, dim, codes):
+        if dim == 'date':
+            return codes.astype('datetime64[D]').astype('datetime64[ns]')
+        if dim == 'hour':
+            return codes.astype(np.int8)
+        return pd.Categorical.from_codes(codes, dtype=self.table[dim].dtype)
+
+    def save(self, path=CUBE_PATH):
+        """Write through a temporary file, so readers never see a half-written cube."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if path.endswith('.parquet'):
+            self.table.to_parquet(f'{path}.tmp', index=False)
+        else:
+            self.table.to_csv(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+        return path
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        if path.endswith('.parquet'):
+            return cls(pd.read_parquet(path))
+        return cls(pd.read_csv(path, parse_dates=['date']))
+
+
+def build_cube(merged, pnl_col, direction_col=DIRECTION_COL, coin_col=COIN_COL):
+    """
+    Reduce the merged frame to a SentimentCube in one grouped pass.
+
+    ``hour`` comes from the features (or ``datetime``); a missing direction
+    or coin column becomes a single MISSING_LABEL category.
+    """
+    pnl = merged[pnl_col].to_numpy(dtype=np.float64)
+    day = _day_numbers(merged['date'])
+    day0 = int(day.min()) if len(day) else 0
+    hour = merged['hour'] if 'hour' in merged.columns else merged['datetime'].dt.hour
+    dims = [
+        ('date', day - day0, int(day.max()) - day0 + 1 if len(day) else 1),
+        ('classification', _categorical(merged['classification'], SENTIMENT_ORDER), None),
+        ('direction', _categorical(merged[direction_col] if direction_col in merged.columns
+                                   else np.full(len(merged), np.nan)), None),
+        ('hour', hour.to_numpy(dtype=np.int64), 24),
+        ('coin', _categorical(merged[coin_col] if coin_col in merged.columns
+                              else np.full(len(merged), np.nan)), None),
+    ]
+
+    key = np.zeros(len(merged), dtype=np.int64)
+    radix = []
+    for name, values, span in dims:
+        if isinstance(values, pd.Categorical):
+            values, span = values.codes.astype(np.int64), max(len(values.categories), 1)
+        key = key * span + values
+        radix.append(span)
+    cells, inverse = np.unique(key, return_inverse=True)
+
+    codes = {}
+    rest = cells
+    for (name, _, _), span in reversed(list(zip(dims, radix))):
+        rest, codes[name] = np.divmod(rest, span)
+    day_of_cell = codes['date'] + day0
+
+    table = pd.DataFrame({
+        'date': day_of_cell.astype('datetime64[D]').astype('datetime64[ns]'),
+        'classification': pd.Categorical.from_codes(codes['classification'], dtype=dims[1][1].dtype),
+        'direction': pd.Categorical.from_codes(codes['direction'], dtype=dims[2][1].dtype),
+        'hour': codes['hour'].astype(np.int8),
+        # 1970-01-01 was a Thursday
+        'day_of_week': pd.Categorical.from_codes((day_of_cell + 3) % 7, categories=DAY_NAMES),
+        'coin': pd.Categorical.from_codes(codes['coin'], dtype=dims[4][1].dtype),
+        'count': np.bincount(inverse, minlength=len(cells)).astype(np.int64),
+        'wins': np.bincount(inverse, weights=pnl > 0, minlength=len(cells)).astype(np.int64),
+        'pnl_sum': np.bincount(inverse, weights=pnl, minlength=len(cells)),
+        'pnl_sumsq': np.bincount(inverse, weights=pnl * pnl, minlength=len(cells)),
+    })
+    return SentimentCube(table)
+
+
+def parse_dimensions(text):
+    """'classification,direction' -> ['classification', 'direction']; empty for a grand total."""
+    dims = [dim.strip() for dim in text.split(',') if dim.strip()]
+    unknown = [dim for dim in dims if dim not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown cube dimension(s) {unknown}; choose from {DIMENSIONS}")
+    return dims
+
+
+def parse_where(text):
+    """
+    'direction=Sell' -> ('direction', 'Sell'); 'coin=BTC,ETH' -> a list;
+    'hour=14:15' -> an inclusive slice (either end may be left out).
+    """
+    dim, sep, value = text.partition('=')
+    dim = dim.strip()
+    if not sep or dim not in DIMENSIONS:
+        raise ValueError(f"Expected DIMENSION=VALUE with a dimension from {DIMENSIONS}, got '{text}'")
+    if RANGE_SEP in value:
+        lo, _, hi = value.partition(RANGE_SEP)
+        return dim, slice(lo.strip() or None, hi.strip() or None)
+    values = [v.strip() for v in value.split(',')]
+    return dim, values if len(values) > 1 else values[0]
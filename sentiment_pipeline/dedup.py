@@ -0,0 +1,327 @@
+"""
+Keep-first deduplication on fixed-width Transaction Hash digests.
+
+Hashes are reduced to 64-bit (``uint64``) or 128-bit (``S16``, big-endian)
+digests once per chunk, so dedup never hashes or stores Python strings:
+
+- A hash in the export's format (``0x`` and 64 ASCII characters) is read
+  straight from the string buffer as eight 64-bit words, which are folded
+  through the splitmix64 finalizer (one seed per 64 bits of digest). Every
+  character counts, so zero-padded or otherwise structured hashes stay
+  apart, and nothing is hex-decoded.
+- Anything else (missing values, other formats) gets a SipHash of the
+  string (``pd.util.hash_array``), with a second key for the upper 64 bits.
+
+Two distinct hashes share a digest with probability ~n^2 / 2^(bits+1).
+
+:class:`HashIndex` is the set of digests seen so far, kept as sorted runs
+that are searched with ``np.searchsorted``. Each chunk's new digests become
+a run, which is merged into the previous one until every run is more than
+twice the size of the next, so there are O(log n) runs however few new
+digests a chunk brings. Runs stay in memory up to ``memory_limit_mb``; beyond that
+the largest ones spill to memory-mapped ``.npy`` files, and merges of
+spilled runs stream block by block. :meth:`HashIndex.save` writes the runs
+and an ``index.json`` manifest to a directory, and :meth:`HashIndex.open`
+picks them up again in a later run, so keep-first dedup holds across
+chunks, files and incremental runs.
+"""
+
+import glob
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .cache import HAS_PYARROW
+
+DIGEST_BITS = [64, 128]
+DEFAULT_DIGEST_BITS = 64
+DEFAULT_INDEX_MEMORY_MB = 128
+INDEX_FILE = 'index.json'
+INDEX_VERSION = 1
+
+# '0x' followed by 64 characters
+_HEX_WIDTH = 66
+# Fold seeds and SipHash keys (pandas' default first) of digest bits 1-64 and 65-128
+_FOLD_SEEDS = [np.uint64(0x9e3779b97f4a7c15), np.uint64(0xd1b54a32d192ed03)]
+_SIPHASH_KEYS = ['0123456789123456', 'sentiment-dedup1']
+# Keys read from each side per step when merging spilled runs
+_MERGE_BLOCK = 1 << 20
+
+
+def digest_dtype(bits=DEFAULT_DIGEST_BITS):
+    if bits not in DIGEST_BITS:
+        raise ValueError(f'Unsupported digest width {bits}; choose from {DIGEST_BITS}')
+    return np.dtype(np.uint64) if bits == 64 else np.dtype('S16')
+
+
+def _mix(x, tmp):
+    """splitmix64 finalizer of uint64 ``x``, in place (``tmp`` is scratch space)."""
+    for shift, multiplier in ((30, 0xbf58476d1ce4e5b9), (27, 0x94d049bb133111eb), (31, None)):
+        np.right_shift(x, np.uint64(shift), out=tmp)
+        x ^= tmp
+        if multiplier is not None:
+            x *= np.uint64(multiplier)
+
+
+def _join_words(words):
+    """64-bit digest words -> uint64 (one word) or big-endian S16 (two)."""
+    if len(words) == 1:
+        return words[0]
+    return np.stack(words, axis=1).astype('>u8').view('S16').ravel()
+
+
+def _fold(codes, bits):
+    """Digests and a validity mask (starts with '0x') of (n, _HEX_WIDTH) ASCII bytes."""
+    valid = (codes[:, 0] == ord('0')) & (codes[:, 1] == ord('x'))
+    # One contiguous row per word position keeps the folds streaming
+    hash_words = np.ascontiguousarray(np.ascontiguousarray(codes[:, 2:]).view('<u8').T)
+    tmp = np.empty(len(codes), dtype=np.uint64)
+    words = []
+    for seed in _FOLD_SEEDS[:bits // 64]:
+        digest = np.full(len(codes), seed)
+        for word in hash_words:
+            digest ^= word
+            _mix(digest, tmp)
+        words.append(digest)
+    return _join_words(words), valid
+
+
+def _arrow_codes(values):
+    """(n, _HEX_WIDTH) bytes of an Arrow-backed column, or None unless every value has that length."""
+    import pyarrow as pa
+
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    parts = []
+    for chunk in chunks:
+        if not (pa.types.is_string(chunk.type) or pa.types.is_large_string(chunk.type)) or chunk.null_count:
+            return None
+        if not len(chunk):
+            continue
+        offset_type = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+        offsets = np.frombuffer(chunk.buffers()[1], dtype=offset_type)[chunk.offset:chunk.offset + len(chunk) + 1]
+        if offsets[-1] - offsets[0] != len(chunk) * _HEX_WIDTH or (np.diff(offsets) != _HEX_WIDTH).any():
+            return None
+        data = np.frombuffer(chunk.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+        # Multi-byte UTF-8 would make the character count differ from the object path
+        if data.max() >= 128:
+            return None
+        parts.append(data.reshape(len(chunk), _HEX_WIDTH))
+    return np.concatenate(parts) if parts else np.empty((0, _HEX_WIDTH), dtype=np.uint8)
+
+
+def _object_codes(values):
+    """(n, _HEX_WIDTH) bytes of any values; rows of other lengths or with non-ASCII characters come back zero."""
+    # One extra character tells exactly-66 apart from longer strings
+    text = np.asarray(values, dtype=object).astype(f'U{_HEX_WIDTH + 1}')
+    codes = text.view(np.uint32).reshape(len(text), _HEX_WIDTH + 1)
+    exact = (codes[:, _HEX_WIDTH - 1] != 0) & (codes[:, _HEX_WIDTH] == 0) & (codes < 128).all(axis=1)
+    return np.where(exact[:, None], codes[:, :_HEX_WIDTH], 0).astype(np.uint8)
+
+
+def _siphash(values, bits):
+    return _join_words([pd.util.hash_array(values, hash_key=key) for key in _SIPHASH_KEYS[:bits // 64]])
+
+
+def hash_digests(hashes, bits=DEFAULT_DIGEST_BITS):
+    """Fixed-width digests of a column of transaction hashes, in row order."""
+    dtype = digest_dtype(bits)
+    if not len(hashes):
+        return np.empty(0, dtype=dtype)
+    codes = _arrow_codes(hashes) if HAS_PYARROW else None
+    if codes is None:
+        codes = _object_codes(hashes)
+    digests, valid = _fold(codes, bits)
+    if not valid.all():
+        rest = ~valid
+        digests[rest] = _siphash(np.asarray(hashes, dtype=object)[rest], bits)
+    return digests
+
+
+def first_occurrence(digests):
+    """Keep-first mask of a digest array on its own."""
+    if digests.dtype == np.uint64:
+        return ~pd.Series(digests).duplicated(keep='first').to_numpy()
+    keep = np.zeros(len(digests), dtype=bool)
+    keep[np.unique(digests, return_index=True)[1]] = True
+    return keep
+
+
+def _merge_sorted(a, b, out):
+    """Merge sorted, disjoint ``a`` and ``b`` into ``out`` with at most _MERGE_BLOCK keys of each in memory."""
+    i = j = k = 0
+    while i < len(a) or j < len(b):
+        a_part = np.asarray(a[i:i + _MERGE_BLOCK])
+        b_part = np.asarray(b[j:j + _MERGE_BLOCK])
+        # Keys up to the smaller block end are final unless that side is exhausted
+        ends = []
+        if i + len(a_part) < len(a):
+            ends.append(a_part[-1])
+        if j + len(b_part) < len(b):
+            ends.append(b_part[-1])
+        if ends:
+            bound = min(ends)
+            a_part = a_part[:np.searchsorted(a_part, bound, side='right')]
+            b_part = b_part[:np.searchsorted(b_part, bound, side='right')]
+        merged = np.sort(np.concatenate([a_part, b_part]), kind='stable')
+        out[k:k + len(merged)] = merged
+        i, j, k = i + len(a_part), j + len(b_part), k + len(merged)
+
+
+def _on_disk(run):
+    return isinstance(run, np.memmap)
+
+
+def _link_or_copy(src, dst):
+    # Run files are never modified once written, so another directory can share them
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class HashIndex:
+    """
+    Set of hash digests as sorted runs; see the module docstring.
+
+    Spilled runs go to ``directory`` (a temporary directory, removed with
+    the index, when None), which is also where :meth:`save` writes by
+    default.
+    """
+
+    def __init__(self, bits=DEFAULT_DIGEST_BITS, memory_limit_mb=DEFAULT_INDEX_MEMORY_MB, directory=None):
+        self.bits = bits
+        self.dtype = digest_dtype(bits)
+        self.memory_limit_mb = memory_limit_mb
+        self.directory = directory
+        self.runs = []
+        self._next_run = 0
+        # Run files listed in the directory's index.json; kept until the next save
+        self._saved = set()
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    @property
+    def spilled(self):
+        return any(_on_disk(run) for run in self.runs)
+
+    def contains(self, digests):
+        """Mask of ``digests`` already in the index."""
+        digests = np.asarray(digests, dtype=self.dtype)
+        found = np.zeros(len(digests), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, digests), len(run) - 1)
+            found |= run[pos] == digests
+        return found
+
+    def first_seen(self, digests):
+        """Keep-first mask of ``digests`` against themselves and the index; the new ones are added."""
+        digests = np.asarray(digests, dtype=self.dtype)
+        unique, first = np.unique(digests, return_index=True)
+        new = ~self.contains(unique)
+        keep = np.zeros(len(digests), dtype=bool)
+        keep[first[new]] = True
+        self._add_run(unique[new])
+        return keep
+
+    def _add_run(self, keys):
+        if not len(keys):
+            return
+        self.runs.append(keys)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            b, a = self.runs.pop(), self.runs.pop()
+            self.runs.append(self._merge(a, b))
+        self._spill()
+
+    def _spill_dir(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='sentiment-dedup-')
+            weakref.finalize(self, shutil.rmtree, self.directory, True)
+        os.makedirs(self.directory, exist_ok=True)
+        return self.directory
+
+    def _run_path(self):
+        self._next_run += 1
+        return os.path.join(self._spill_dir(), f'run-{self._next_run:06d}.npy')
+
+    def _merge(self, a, b):
+        if not (_on_disk(a) or _on_disk(b)):
+            return np.sort(np.concatenate([a, b]), kind='stable')
+        path = self._run_path()
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=(len(a) + len(b),))
+        _merge_sorted(a, b, out)
+        out.flush()
+        del out
+        for run in (a, b):
+            self._discard(run)
+        return np.load(path, mmap_mode='r')
+
+    def _discard(self, run):
+        # Files of the saved index stay until the next save replaces index.json
+        if _on_disk(run) and os.path.basename(run.filename) not in self._saved:
+            os.remove(run.filename)
+
+    def _spill(self):
+        in_memory = [i for i, run in enumerate(self.runs) if not _on_disk(run)]
+        used = sum(self.runs[i].nbytes for i in in_memory)
+        for i in sorted(in_memory, key=lambda i: len(self.runs[i]), reverse=True):
+            if used <= self.memory_limit_mb * 2**20:
+                break
+            path = self._run_path()
+            np.save(path, self.runs[i])
+            used -= self.runs[i].nbytes
+            self.runs[i] = np.load(path, mmap_mode='r')
+
+    def save(self, directory=None):
+        """Write all runs and index.json to ``directory`` (default: the spill directory)."""
+        directory = directory or self.directory
+        os.makedirs(directory, exist_ok=True)
+        if self.directory is None or os.path.abspath(directory) != os.path.abspath(self.directory):
+            self.directory, self._saved = directory, set()
+        names = []
+        for i, run in enumerate(self.runs):
+            if _on_disk(run) and os.path.dirname(os.path.abspath(run.filename)) == os.path.abspath(directory):
+                names.append(os.path.basename(run.filename))
+                continue
+            path = self._run_path()
+            if _on_disk(run):
+                _link_or_copy(run.filename, path)
+            else:
+                np.save(path, run)
+            names.append(os.path.basename(path))
+        manifest = {'version': INDEX_VERSION, 'bits': self.bits, 'size': len(self),
+                    'next_run': self._next_run, 'runs': names}
+        tmp_path = os.path.join(directory, INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+        # Merged-away runs of the previous save and runs of interrupted updates
+        for path in glob.glob(os.path.join(directory, 'run-*.npy')):
+            if os.path.basename(path) not in names:
+                os.remove(path)
+        self._saved = set(names)
+        return directory
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, INDEX_FILE))
+
+    @classmethod
+    def open(cls, directory, memory_limit_mb=DEFAULT_INDEX_MEMORY_MB):
+        """Reopen a saved index; new runs are spilled next to the saved ones."""
+        with open(os.path.join(directory, INDEX_FILE)) as fh:
+            manifest = json.load(fh)
+        index = cls(manifest['bits'], memory_limit_mb, directory)
+        index.runs = [np.load(os.path.join(directory, name), mmap_mode='r') for name in manifest['runs']]
+        index._next_run = manifest['next_run']
+        index._saved = set(manifest['runs'])
+        return index
@@ -0,0 +1,112 @@
+"""
+Rolling, differenced and lagged features of the daily Fear & Greed series.
+
+The features are computed once on a dense calendar-day array of the index
+(a few thousand days), never per trade:
+
+- ``value_ma7`` / ``value_ma30``: trailing means from cumulative sums, O(n)
+  in the number of days.
+- ``value_delta``: change since the previous calendar day.
+- ``value_lag1`` / ``value_lag7``: the value N calendar days earlier.
+- ``regime_change``: 1 on days whose classification differs from the
+  previous published day, else 0.
+
+Trades and daily tables pick them up through their day number, like the
+sentiment join in :mod:`.join`, as float32 columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .join import to_days
+
+ROLLING_WINDOWS = (7, 30)
+LAGS = (1, 7)
+FEATURE_COLUMNS = ([f'value_ma{window}' for window in ROLLING_WINDOWS] + ['value_delta']
+                   + [f'value_lag{n}' for n in LAGS] + ['regime_change'])
+
+
+def rolling_mean(values, window):
+    """
+    Trailing ``window``-day mean of a dense daily array, skipping missing (NaN) days.
+
+    NaN for the first ``window - 1`` days and for windows with no value.
+    """
+    present = ~np.isnan(values)
+    total = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+    count = np.concatenate([[0], np.cumsum(present)])
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        window_total = total[window:] - total[:-window]
+        window_count = count[window:] - count[:-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[window - 1:] = np.where(window_count > 0, window_total / window_count, np.nan)
+    return out
+
+
+def lag(values, n):
+    """Dense daily array shifted ``n`` days later (NaN for the first ``n`` days)."""
+    out = np.full(len(values), np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+class SentimentFeatures:
+    """FEATURE_COLUMNS per calendar day of the Fear & Greed table."""
+
+    def __init__(self, fear_greed, as_of=False):
+        days = to_days(pd.to_datetime(fear_greed['date']))
+        self.as_of = as_of
+        self.columns = {}
+        if not len(days):
+            self.first_day = None
+            return
+        self.first_day = int(days.min())
+        n_days = int(days.max()) - self.first_day + 1
+        offset = days - self.first_day
+
+        values = np.full(n_days, np.nan)
+        values[offset] = fear_greed['value'].to_numpy(dtype=np.float64)
+        codes = np.full(n_days, -1, dtype=np.int64)
+        codes[offset] = pd.Categorical(fear_greed['classification']).codes
+
+        # Last published day at or before each day; the first day is always published
+        published = codes >= 0
+        self._last_known = np.maximum.accumulate(np.where(published, np.arange(n_days), 0))
+        previous = np.full(n_days, -1)
+        previous[1:] = codes[self._last_known[:-1]]
+        regime_change = np.where(published & (previous >= 0), (codes != previous).astype(np.float64), np.nan)
+
+        for window in ROLLING_WINDOWS:
+            self.columns[f'value_ma{window}'] = rolling_mean(values, window)
+        self.columns['value_delta'] = values - lag(values, 1)
+        for n in LAGS:
+            self.columns[f'value_lag{n}'] = lag(values, n)
+        self.columns['regime_change'] = regime_change
+        self.columns = {name: col.astype(np.float32) for name, col in self.columns.items()}
+
+    def for_days(self, day):
+        """FEATURE_COLUMNS gathered for integer day numbers, NaN where unknown."""
+        day = np.asarray(day, dtype=np.int64)
+        if self.first_day is None:
+            return {name: np.full(len(day), np.nan, dtype=np.float32) for name in FEATURE_COLUMNS}
+        n_days = len(self._last_known)
+        # Compare before subtracting: NaT days would wrap around
+        hit = day >= self.first_day
+        offset = np.where(hit, day - self.first_day, 0)
+        if self.as_of:
+            offset = self._last_known[np.minimum(offset, n_days - 1)]
+        else:
+            hit &= offset < n_days
+            offset[~hit] = 0
+        out = {}
+        for name, col in self.columns.items():
+            out[name] = np.where(hit, col[offset], np.float32(np.nan))
+        return out
+
+    def join(self, frame, date_col='date'):
+        """Add FEATURE_COLUMNS to ``frame`` (in place) by its calendar-day column."""
+        for name, values in self.for_days(to_days(frame[date_col])).items():
+            frame[name] = values
+        return frame
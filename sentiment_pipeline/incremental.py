@@ -0,0 +1,292 @@
+"""
+Incremental daily append mode.
+
+The first run streams the whole trade file and persists, under a state
+directory, everything later runs need to continue without re-scanning
+history. Every save writes a new ``gen-NNNNNN/`` directory with:
+
+- ``groups.csv``: per-(date, classification, is_buy) count, wins, pnl_sum,
+  pnl_sumsq, pnl_min and pnl_max
+- ``hash_index/``: the :class:`.dedup.HashIndex` of every Transaction Hash
+  digest kept so far, so keep-first dedup holds across increments and
+  trade files
+- ``pending.csv``: cleaned trades dated after the last Fear & Greed row,
+  joined once their sentiment row arrives
+- ``digest.json``: a t-digest of the analyzed PnL, which keeps the
+  ANALYSIS 1 median available (approximately) after the bootstrap run
+- ``tests.json``: per-classification moments and rank bins, so the
+  ANALYSIS 4 tests keep their precision and Kruskal-Wallis stays available
+
+The save then commits the generation by atomically replacing
+``state.json``, which names it and holds the Timestamp watermark (newest
+Timestamp read) and the number of rows read at it, the frozen 1st/99th
+percentile trim bounds, the sentiment join settings (timezone, as-of) and
+the resume point in the last trade file. An interrupted save leaves
+``state.json`` pointing at the previous generation, which is only removed
+after the commit.
+
+Trade files are either one export that only grows by appended rows, or a
+new file per day. For the same path, an update seeks to the byte offset
+the last run stopped at, provided the bytes just before it are unchanged;
+any other file is read from the start. Only trades with
+``Timestamp >= watermark`` are analyzed, so new trades must arrive in time
+order; older rows are skipped and counted as ``stale``. Rows at the
+watermark itself whose hashes are already indexed, up to the number read
+there before, were analyzed by an earlier run: they are skipped and
+counted as ``reread`` rather than as duplicates. The outlier bounds are
+fixed at the bootstrap run; delete the state directory to rebuild them
+from scratch.
+State written with another ``STATE_VERSION`` is not migrated: the next
+update rebuilds it with a bootstrap run.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .dedup import DEFAULT_DIGEST_BITS, HashIndex, hash_digests
+from .join import SentimentLookup
+from .online_stats import SentimentTests
+from .quantile_sketch import TDigest
+from .schema import DIRECTION_COL, HASH_COL, PNL_COL, TIMESTAMP_COL
+from .streaming import (
+    DEFAULT_MEMORY_LIMIT_MB, GROUP_KEYS, StreamResult,
+    advance_watermark, combine_groups, index_memory_mb, join_and_aggregate, label_groups,
+    pending_frame, read_trade_chunks, rows_per_chunk, stream_analysis,
+)
+
+DEFAULT_STATE_DIR = 'outputs/incremental'
+# Bump when the state files change; older state is then rebuilt, not migrated
+STATE_VERSION = 5
+
+STATE_FILE = 'state.json'
+GENERATION_PREFIX = 'gen-'
+GROUPS_FILE = 'groups.csv'
+HASH_INDEX_DIR = 'hash_index'
+PENDING_FILE = 'pending.csv'
+DIGEST_FILE = 'digest.json'
+TESTS_FILE = 'tests.json'
+
+# Bytes before the resume offset that must be unchanged for an update to seek past them
+_FINGERPRINT_BYTES = 64
+# How far back from the end of the file to look for the last complete row
+_TAIL_BYTES = 1 << 16
+
+
+def _path(state_dir, name):
+    return os.path.join(state_dir, name)
+
+
+def _read_state(state_dir):
+    try:
+        with open(_path(state_dir, STATE_FILE)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def state_version(state_dir=DEFAULT_STATE_DIR):
+    """Version of the saved state, or None when there is none."""
+    state = _read_state(state_dir)
+    return None if state is None else state.get('version')
+
+
+def has_state(state_dir=DEFAULT_STATE_DIR):
+    """True when ``state_dir`` holds state an update can continue from."""
+    return state_version(state_dir) == STATE_VERSION
+
+
+def _resume_point(path, size):
+    """Where the next update of ``path`` continues: the end of its last complete row."""
+    start = max(0, size - _TAIL_BYTES)
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        tail = fh.read(size - start)
+    end = tail.rfind(b'\n') + 1
+    if not end:
+        return None
+    return {
+        'path': os.path.abspath(path),
+        'offset': start + end,
+        'fingerprint': tail[max(0, end - _FINGERPRINT_BYTES):end].hex(),
+    }
+
+
+def _resume_offset(path, source):
+    """Byte offset to continue ``path`` from, or 0 when it is not the file the last run read."""
+    if not source or source['path'] != os.path.abspath(path):
+        return 0
+    offset = source['offset']
+    fingerprint = bytes.fromhex(source['fingerprint'])
+    if os.path.getsize(path) < offset:
+        return 0
+    with open(path, 'rb') as fh:
+        fh.seek(offset - len(fingerprint))
+        return offset if fh.read(len(fingerprint)) == fingerprint else 0
+
+
+def join_settings(state_dir=DEFAULT_STATE_DIR):
+    """The (tz, as_of) sentiment join settings the state was bootstrapped with."""
+    state = _read_state(state_dir)
+    return state.get('tz'), state.get('as_of', False)
+
+
+def _generation_dir(state_dir, generation):
+    return _path(state_dir, f'{GENERATION_PREFIX}{generation:06d}')
+
+
+def _load_state(state_dir, memory_limit_mb):
+    state = _read_state(state_dir)
+    gen_dir = _generation_dir(state_dir, state['generation'])
+    groups = pd.read_csv(_path(gen_dir, GROUPS_FILE), parse_dates=['date'])
+    seen = HashIndex.open(_path(gen_dir, HASH_INDEX_DIR), index_memory_mb(memory_limit_mb))
+    pending_path = _path(gen_dir, PENDING_FILE)
+    pending = pd.read_csv(pending_path) if os.path.exists(pending_path) else None
+    with open(_path(gen_dir, DIGEST_FILE)) as fh:
+        digest = TDigest.from_dict(json.load(fh))
+    with open(_path(gen_dir, TESTS_FILE)) as fh:
+        tests = SentimentTests.from_dict(json.load(fh))
+    return state, groups, seen, pending, digest, tests
+
+
+def _save_state(state_dir, state, groups, pending, digest, tests, seen):
+    """Write the next generation of the state files and commit it through state.json."""
+    generation = state.get('generation', 0) + 1
+    gen_dir = _generation_dir(state_dir, generation)
+    # Left behind by an interrupted save; state.json never pointed at it
+    shutil.rmtree(gen_dir, ignore_errors=True)
+    os.makedirs(gen_dir)
+    groups.to_csv(_path(gen_dir, GROUPS_FILE), index=False)
+    with open(_path(gen_dir, DIGEST_FILE), 'w') as fh:
+        json.dump(digest.to_dict(), fh)
+    with open(_path(gen_dir, TESTS_FILE), 'w') as fh:
+        json.dump(tests.to_dict(), fh)
+    if pending is not None and len(pending):
+        pending.to_csv(_path(gen_dir, PENDING_FILE), index=False)
+    # Index runs of the previous generation are hard-linked, not copied
+    seen.save(_path(gen_dir, HASH_INDEX_DIR))
+
+    tmp_path = _path(state_dir, STATE_FILE + '.tmp')
+    with open(tmp_path, 'w') as fh:
+        json.dump({**state, 'generation': generation}, fh, indent=2)
+    os.replace(tmp_path, _path(state_dir, STATE_FILE))
+
+    for name in os.listdir(state_dir):
+        if name.startswith(GENERATION_PREFIX) and name != os.path.basename(gen_dir):
+            shutil.rmtree(_path(state_dir, name), ignore_errors=True)
+
+
+def update(trades_path, fear_greed, state_dir=DEFAULT_STATE_DIR,
+           memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, sketch_compression=None, tz=None, as_of=False,
+           hash_bits=DEFAULT_DIGEST_BITS):
+    """
+    Fold trades newer than the stored watermark into the persisted groups.
+
+    Bootstraps the state with a full streaming pass when none exists or it
+    has another STATE_VERSION; its trim bounds are exact unless
+    ``sketch_compression`` is given. Returns a StreamResult holding the
+    updated cumulative group table and the counters of this run; rows at
+    the watermark that the last run already read count as ``reread`` and
+    older rows as ``stale``, neither as read nor duplicate. After
+    bootstrap, ``median`` comes from the persisted t-digest. ``tz``, ``as_of`` and ``hash_bits`` only apply
+    when bootstrapping; later runs reuse the settings stored in the state.
+    """
+    size = os.path.getsize(trades_path)
+    if not has_state(state_dir):
+        result = stream_analysis(trades_path, fear_greed, memory_limit_mb,
+                                 sketch_compression, track_digest=True, tz=tz, as_of=as_of,
+                                 hash_bits=hash_bits)
+        state = {
+            'version': STATE_VERSION,
+            'watermark': result.watermark,
+            'watermark_rows': result.watermark_rows,
+            'bounds': [float(b) for b in result.bounds],
+            'tz': tz,
+            'as_of': as_of,
+            'hash_bits': hash_bits,
+            'source': _resume_point(trades_path, size),
+        }
+        _save_state(state_dir, state, result.groups, result.pending, result.digest,
+                    result.tests, result.seen)
+        return result
+
+    state, groups, seen, pending, digest, tests = _load_state(state_dir, memory_limit_mb)
+    q1, q99 = state['bounds']
+    watermark, watermark_rows = state['watermark'], state['watermark_rows']
+    lookup = SentimentLookup(fear_greed, state.get('tz'), state.get('as_of', False))
+
+    parts, new_pending = [], []
+    rows_read = duplicates = missing_pnl = outliers = unmatched = reread = stale = 0
+
+    if pending is not None:
+        timestamps = pending[TIMESTAMP_COL].to_numpy()
+        is_buy = pending['is_buy'].to_numpy(dtype=bool)
+        pnl = pending['pnl'].to_numpy()
+        agg, matched, later = join_and_aggregate(lookup, timestamps, is_buy, pnl, tests)
+        parts.append(agg)
+        digest.update(pnl[matched])
+        unmatched += int((~matched).sum())
+        new_pending.append(pending_frame(timestamps[later], is_buy[later], pnl[later]))
+
+    chunk_rows = rows_per_chunk(memory_limit_mb)
+    new_watermark, new_watermark_rows = watermark, watermark_rows
+    offset = _resume_offset(trades_path, state['source'])
+    for chunk in read_trade_chunks(trades_path, chunk_rows, offset=offset):
+        timestamps = chunk[TIMESTAMP_COL].to_numpy()
+        if watermark is None:
+            fresh = np.ones(len(chunk), dtype=bool)
+        else:
+            fresh = timestamps >= watermark
+            stale += int((~fresh).sum())
+            # Indexed rows at the watermark were read by the last run, unless more of them turn up
+            boundary = np.flatnonzero(timestamps == watermark)
+            if len(boundary) and reread < watermark_rows:
+                indexed = boundary[seen.contains(hash_digests(chunk[HASH_COL].iloc[boundary], seen.bits))]
+                indexed = indexed[:watermark_rows - reread]
+                fresh[indexed] = False
+                reread += len(indexed)
+        if not fresh.any():
+            continue
+        chunk = chunk[fresh]
+        rows_read += len(chunk)
+
+        keep = seen.first_seen(hash_digests(chunk[HASH_COL], seen.bits))
+        duplicates += int((~keep).sum())
+
+        timestamps = chunk[TIMESTAMP_COL].to_numpy()
+        new_watermark, new_watermark_rows = advance_watermark(new_watermark, new_watermark_rows, timestamps)
+
+        pnl = chunk[PNL_COL].to_numpy()
+        missing = keep & np.isnan(pnl)
+        missing_pnl += int(missing.sum())
+        keep &= ~missing
+        in_range = (pnl >= q1) & (pnl <= q99)
+        outliers += int((keep & ~in_range).sum())
+        keep &= in_range
+
+        timestamps, pnl = timestamps[keep], pnl[keep]
+        is_buy = (chunk[DIRECTION_COL] == 'Buy').to_numpy()[keep]
+        agg, matched, later = join_and_aggregate(lookup, timestamps, is_buy, pnl, tests)
+        parts.append(agg)
+        digest.update(pnl[matched])
+        unmatched += int((~matched).sum())
+        new_pending.append(pending_frame(timestamps[later], is_buy[later], pnl[later]))
+
+    parts = [p for p in parts if len(p)]
+    if parts:
+        labelled = label_groups(combine_groups(parts), lookup.categories)
+        groups = combine_groups([groups.set_index(GROUP_KEYS), labelled.set_index(GROUP_KEYS)])
+        groups = groups.reset_index().sort_values(GROUP_KEYS, ignore_index=True)
+    pending = pd.concat(new_pending, ignore_index=True) if new_pending else None
+
+    state['watermark'], state['watermark_rows'] = new_watermark, new_watermark_rows
+    state['source'] = _resume_point(trades_path, size)
+    _save_state(state_dir, state, groups, pending, digest, tests, seen)
+
+    return StreamResult(groups, digest.quantile(0.5), rows_read, duplicates, missing_pnl, outliers,
+                        unmatched, (q1, q99), watermark=new_watermark, pending=pending,
+                        digest=digest, tests=tests, watermark_rows=new_watermark_rows, reread=reread,
+                        stale=stale)
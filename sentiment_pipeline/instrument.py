@@ -0,0 +1,194 @@
+"""
+Per-stage instrumentation: wall and CPU time, peak memory and row counts.
+
+Every pipeline stage runs inside ``RunLog.stage``, which records:
+
+- wall and CPU time of this process
+- rows in and out, set by the stage
+- peak RSS: the kernel's high-water mark is reset at stage start where
+  Linux allows it (``/proc/self/clear_refs``), so the peak is the stage's
+  own. Elsewhere it is the process peak so far.
+
+With ``profile='cprofile'`` each stage is also run under cProfile; the
+top functions by cumulative time go into the record, and ``.prof`` files
+go to ``profile_dir`` when given. ``profile='tracemalloc'`` records the
+traced allocation peak and the top allocating lines instead. Work done in
+worker processes (``--workers``, figure rendering) shows up in wall time
+only.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILERS = ['cprofile', 'tracemalloc']
+DEFAULT_PROFILE_DIR = 'outputs/profile'
+# Functions or allocation sites kept per stage in the run log
+PROFILE_TOP = 15
+RUN_LOG_VERSION = 1
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter; False where that is not allowed."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def rss_units(maxrss):
+    """ru_maxrss in MiB (bytes on macOS, KiB elsewhere)."""
+    return maxrss / 2**20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (since the last reset) in MiB."""
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return rss_units(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def children_peak_rss_mb():
+    """Largest peak RSS among finished child processes, in MiB."""
+    return rss_units(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _cprofile_top(profiler, n=PROFILE_TOP):
+    stats = pstats.Stats(profiler).stats
+    top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:n]
+    return [{'function': f'{path}:{line}({name})', 'calls': calls, 'tottime': round(tottime, 4),
+             'cumtime': round(cumtime, 4)}
+            for (path, line, name), (_, calls, tottime, cumtime, _) in top]
+
+
+class StageRecord:
+    """Measurements of one stage; the stage sets ``rows_out`` (and may set ``rows_in``)."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_mb = None
+        self.peak_is_stage = False
+        self.profile = None
+        self.error = None
+
+    def to_dict(self):
+        record = {
+            'stage': self.name,
+            'wall_s': round(self.wall_s, 4),
+            'cpu_s': round(self.cpu_s, 4),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_s': round(self.rows_in / self.wall_s) if self.rows_in and self.wall_s else None,
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'peak_is_stage': self.peak_is_stage,
+        }
+        if self.profile is not None:
+            record['profile'] = self.profile
+        if self.error is not None:
+            record['error'] = self.error
+        return record
+
+
+class RunLog:
+    """Ordered StageRecords of one run, with optional per-stage profiling."""
+
+    def __init__(self, profile=None, profile_dir=None):
+        if profile not in (None, *PROFILERS):
+            raise ValueError(f"Unknown profiler '{profile}'; choose from {PROFILERS}")
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.records = []
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = StageRecord(name, rows_in)
+        record.peak_is_stage = reset_peak_rss()
+        profiler = None
+        if self.profile == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif self.profile == 'tracemalloc':
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            record.wall_s = time.perf_counter() - wall
+            record.cpu_s = time.process_time() - cpu
+            if profiler is not None:
+                profiler.disable()
+                record.profile = {'top_cumulative': _cprofile_top(profiler)}
+                if self.profile_dir:
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    path = os.path.join(self.profile_dir, f'{len(self.records) + 1:02d}_{name}.prof')
+                    profiler.dump_stats(path)
+                    record.profile['file'] = path
+            elif self.profile == 'tracemalloc':
+                snapshot = tracemalloc.take_snapshot()
+                _, traced_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                record.profile = {
+                    'traced_peak_mb': round(traced_peak / 2**20, 2),
+                    'top_allocations': [str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP]],
+                }
+            record.peak_rss_mb = peak_rss_mb()
+            self.records.append(record)
+
+    @property
+    def stages(self):
+        return [record.to_dict() for record in self.records]
+
+    def to_dict(self, **info):
+        return {
+            'version': RUN_LOG_VERSION,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_wall_s': round(time.time() - self.started, 4),
+            'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'cpus': os.cpu_count()},
+            'profile': self.profile,
+            **info,
+            'peak_rss_mb': round(max((r.peak_rss_mb for r in self.records), default=0), 1),
+            'children_peak_rss_mb': round(children_peak_rss_mb(), 1),
+            'stages': self.stages,
+        }
+
+    def save(self, path, **info):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as fh:
+            json.dump(self.to_dict(**info), fh, indent=2, default=str)
+        return path
+
+    def print_table(self):
+        print(f"{'Stage':<14} {'Wall (s)':>9} {'CPU (s)':>9} {'Rows in':>13} {'Rows out':>13} "
+              f"{'Rows/s':>12} {'Peak MB':>9}")
+        print("-"*85)
+        for r in self.stages:
+            rows_in = f"{r['rows_in']:,}" if r['rows_in'] is not None else '-'
+            rows_out = f"{r['rows_out']:,}" if r['rows_out'] is not None else '-'
+            rate = f"{r['rows_per_s']:,}" if r['rows_per_s'] else '-'
+            print(f"{r['stage']:<14} {r['wall_s']:>9.3f} {r['cpu_s']:>9.3f} {rows_in:>13} {rows_out:>13} "
+                  f"{rate:>12} {r['peak_rss_mb']:>9.1f}")
+        total = sum(r.wall_s for r in self.records)
+        print(f"{'total':<14} {total:>9.3f}")
@@ -0,0 +1,127 @@
+"""
+Sentiment join through a dense, day-indexed lookup array.
+
+Trade timestamps (epoch milliseconds) are turned straight into integer
+day numbers, days since 1970-01-01 in the chosen timezone, and
+classification codes and index values are gathered from arrays indexed
+by ``day - first_day``. There are no Python date objects and no hash join.
+
+Days the Fear & Greed table is missing are dropped by default, like the
+original left merge followed by ``dropna(subset=['classification'])``.
+With ``as_of`` they take the last published value instead. This covers
+gaps inside the table and days after its last row. Trades dated before
+the first row are always dropped.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import MS_PER_DAY
+
+
+def _is_utc(tz):
+    return tz is None or tz == 'UTC'
+
+
+def localize(datetimes, tz=None):
+    """Naive UTC datetimes (Series) as naive wall-clock times in ``tz``."""
+    if _is_utc(tz):
+        return datetimes
+    return datetimes.dt.tz_localize('UTC').dt.tz_convert(tz).dt.tz_localize(None)
+
+
+def to_days(datetimes):
+    """Integer day numbers of naive datetime64 values; NaT maps below any real day."""
+    return np.asarray(datetimes).astype('datetime64[D]').astype(np.int64)
+
+
+def day_numbers(timestamps_ms, tz=None):
+    """Integer day numbers of epoch-ms timestamps in ``tz`` (None or 'UTC' for UTC)."""
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    if _is_utc(tz):
+        return timestamps_ms // MS_PER_DAY
+    return to_days(localize(pd.Series(timestamps_ms.astype('datetime64[ms]')), tz))
+
+
+class SentimentLookup:
+    """Dense per-day classification codes and index values of the Fear & Greed table."""
+
+    def __init__(self, fear_greed, tz=None, as_of=False):
+        days = to_days(pd.to_datetime(fear_greed['date']))
+        classification = pd.Categorical(fear_greed['classification'])
+        self.tz = tz
+        self.as_of = as_of
+        self.categories = classification.categories
+
+        if not len(days):
+            self.first_day = self.last_day = None
+            return
+        self.first_day, self.last_day = int(days.min()), int(days.max())
+        offset = days - self.first_day
+        self._codes = np.full(self.last_day - self.first_day + 1, -1, dtype=np.int16)
+        self._codes[offset] = classification.codes
+        self._values = np.full(len(self._codes), np.nan)
+        if 'value' in fear_greed.columns:
+            self._values[offset] = fear_greed['value'].to_numpy(dtype=np.float64)
+        if as_of:
+            # Point every missing day at the last published day before it
+            published = np.where(self._codes >= 0, np.arange(len(self._codes)), 0)
+            last_known = np.maximum.accumulate(published)
+            self._codes = self._codes[last_known]
+            self._values = self._values[last_known]
+
+    def days_of(self, timestamps_ms):
+        return day_numbers(timestamps_ms, self.tz)
+
+    def _offsets(self, day):
+        """Array offsets of ``day`` and a mask of the days that have a (as-of) value."""
+        day = np.asarray(day, dtype=np.int64)
+        if self.first_day is None:
+            return np.zeros(len(day), dtype=np.int64), np.zeros(len(day), dtype=bool)
+        # Compare before subtracting: NaT days would wrap around
+        hit = day >= self.first_day
+        offset = np.where(hit, day - self.first_day, 0)
+        if self.as_of:
+            offset = np.minimum(offset, len(self._codes) - 1)
+        else:
+            hit &= offset < len(self._codes)
+            offset[~hit] = 0
+        return offset, hit & (self._codes[offset] >= 0)
+
+    def codes_for(self, day):
+        """Classification code of each day, -1 where it is missing."""
+        offset, hit = self._offsets(day)
+        codes = np.full(len(offset), -1, dtype=np.int16)
+        codes[hit] = self._codes[offset[hit]]
+        return codes
+
+    def values_for(self, day):
+        """Fear & Greed index value of each day, NaN where it is missing."""
+        offset, hit = self._offsets(day)
+        values = np.full(len(offset), np.nan)
+        values[hit] = self._values[offset[hit]]
+        return values
+
+
+def join_sentiment(trades, fear_greed, as_of=False, compact=False):
+    """
+    Add ``classification`` and ``value`` to ``trades`` by their ``date`` column.
+
+    ``date`` holds (local) calendar days as datetime64. Returns the joined
+    frame, with unmatched trades dropped, row order kept and a fresh
+    RangeIndex, plus the number of trades dropped. ``compact`` stores
+    classification as a categorical and value as float32.
+    """
+    lookup = SentimentLookup(fear_greed, as_of=as_of)
+    day = to_days(trades['date'])
+    codes = lookup.codes_for(day)
+    matched = codes >= 0
+
+    joined = trades[matched].reset_index(drop=True)
+    if compact:
+        joined['classification'] = pd.Categorical.from_codes(codes[matched], lookup.categories)
+        joined['value'] = lookup.values_for(day[matched]).astype(np.float32)
+    else:
+        joined['classification'] = lookup.categories.to_numpy()[codes[matched]]
+        joined['value'] = lookup.values_for(day[matched])
+    return joined, int((~matched).sum())
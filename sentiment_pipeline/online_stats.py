@@ -0,0 +1,221 @@
+"""
+Significance tests from mergeable per-group accumulators.
+
+``Moments`` keeps (n, mean, M2) and combines batches with Chan et al.'s
+parallel update, which stays accurate where sum / sum-of-squares
+cancellation would not. ``SentimentTests`` holds one Moments per
+classification plus an optional rank histogram, and can be updated per
+chunk, merged across workers and persisted between incremental runs:
+
+- Student and Welch t-tests go through ``scipy.stats.ttest_ind_from_stats``
+  and match ``ttest_ind`` on the raw arrays to floating-point precision.
+- One-way ANOVA uses the between/within sums of squares, as ``f_oneway``.
+- Kruskal-Wallis uses binned ranks: values sharing a histogram bin are
+  treated as ties with the bin's midrank, including the tie correction.
+  It is exact when no bin holds two distinct values and otherwise
+  approaches scipy's ``kruskal`` as the bin count grows.
+
+scipy is only imported when a test is evaluated, so accumulating moments
+stays cheap to import.
+"""
+
+import numpy as np
+
+DEFAULT_RANK_BINS = 65536
+
+
+class Moments:
+    """Count, mean and sum of squared deviations (M2) of a sample."""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return cls()
+        mean = values.mean()
+        return cls(len(values), float(mean), float(((values - mean) ** 2).sum()))
+
+    @classmethod
+    def from_sums(cls, n, total, sumsq):
+        """Fallback for stores that only kept sums; less accurate than from_values."""
+        if not n:
+            return cls()
+        return cls(int(n), total / n, max(sumsq - total * total / n, 0.0))
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def to_list(self):
+        return [self.n, self.mean, self.m2]
+
+
+class SentimentTests:
+    """
+    Per-classification accumulators for t-tests, ANOVA and Kruskal-Wallis.
+
+    ``bounds`` enables the rank histogram used by Kruskal-Wallis: PnL in
+    [lo, hi] is split into ``bins`` equal-width bins (values outside are
+    clipped to the end bins). Accumulators only merge with others that use
+    the same bounds and bin count.
+    """
+
+    def __init__(self, bounds=None, bins=DEFAULT_RANK_BINS):
+        self.moments = {}
+        self.bounds = None if bounds is None else (float(bounds[0]), float(bounds[1]))
+        self.bins = bins
+        self.ranks = {}
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Moments from a (classification, count, pnl_sum, pnl_sumsq) group table."""
+        tests = cls()
+        per_class = groups.groupby('classification')[['count', 'pnl_sum', 'pnl_sumsq']].sum()
+        for label, row in per_class.iterrows():
+            if row['count'] > 0:
+                tests.moments[label] = Moments.from_sums(row['count'], row['pnl_sum'], row['pnl_sumsq'])
+        return tests
+
+    @property
+    def has_ranks(self):
+        return self.bounds is not None
+
+    def _bin(self, values):
+        lo, hi = self.bounds
+        if hi <= lo:
+            return np.zeros(len(values), dtype=np.int64)
+        idx = ((values - lo) / (hi - lo) * self.bins).astype(np.int64)
+        return np.clip(idx, 0, self.bins - 1)
+
+    def update(self, codes, categories, pnl):
+        """Add trades given classification codes into ``categories`` and PnL."""
+        if not len(pnl):
+            return self
+        order = np.argsort(codes, kind='stable')
+        codes, pnl = codes[order], pnl[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1, [len(codes)]])
+        for start, end in zip(starts[:-1], starts[1:]):
+            label = categories[codes[start]]
+            segment = pnl[start:end]
+            self.moments.setdefault(label, Moments()).merge(Moments.from_values(segment))
+            if self.has_ranks:
+                hist = np.bincount(self._bin(segment), minlength=self.bins)
+                if label in self.ranks:
+                    self.ranks[label] += hist
+                else:
+                    self.ranks[label] = hist
+        return self
+
+    def merge(self, other):
+        if self.has_ranks != other.has_ranks or (self.has_ranks and (
+                self.bounds != other.bounds or self.bins != other.bins)):
+            raise ValueError('cannot merge SentimentTests with different rank bins')
+        for label, moments in other.moments.items():
+            self.moments.setdefault(label, Moments()).merge(moments)
+        for label, hist in other.ranks.items():
+            if label in self.ranks:
+                self.ranks[label] = self.ranks[label] + hist
+            else:
+                self.ranks[label] = hist.copy()
+        return self
+
+    def ttest(self, a, b, equal_var=True):
+        """(t, p) comparing PnL of classifications ``a`` and ``b``."""
+        from scipy import stats
+
+        ma, mb = self.moments.get(a, Moments()), self.moments.get(b, Moments())
+        return stats.ttest_ind_from_stats(ma.mean, ma.std, ma.n, mb.mean, mb.std, mb.n,
+                                          equal_var=equal_var)
+
+    def anova(self):
+        """(k, F, p) of a one-way ANOVA across all classifications with trades."""
+        from scipy import stats
+
+        groups = [m for m in self.moments.values() if m.n > 0]
+        k = len(groups)
+        if k < 2:
+            return k, np.nan, np.nan
+        n = np.array([m.n for m in groups], dtype=np.float64)
+        means = np.array([m.mean for m in groups])
+        grand_mean = (n * means).sum() / n.sum()
+        ss_between = (n * (means - grand_mean) ** 2).sum()
+        ss_within = sum(m.m2 for m in groups)
+        df_between, df_within = k - 1, n.sum() - k
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+        return k, f_stat, stats.f.sf(f_stat, df_between, df_within)
+
+    def kruskal(self):
+        """(H, p) of a Kruskal-Wallis test on binned ranks."""
+        from scipy import stats
+
+        if not self.has_ranks:
+            raise ValueError('Kruskal-Wallis needs rank bins; construct with bounds')
+        hists = [h for h in self.ranks.values() if h.sum() > 0]
+        if len(hists) < 2:
+            return np.nan, np.nan
+        hists = np.vstack(hists).astype(np.float64)
+        ties = hists.sum(axis=0)
+        n_total = ties.sum()
+        midranks = np.cumsum(ties) - ties + (ties + 1) / 2
+        rank_sums = hists @ midranks
+        h = 12 / (n_total * (n_total + 1)) * (rank_sums ** 2 / hists.sum(axis=1)).sum() - 3 * (n_total + 1)
+        h /= 1 - (ties ** 3 - ties).sum() / (n_total ** 3 - n_total)
+        return h, stats.chi2.sf(h, len(hists) - 1)
+
+    def summary(self, welch=False, kruskal=False, pair=('Extreme Fear', 'Extreme Greed')):
+        """
+        ANALYSIS 4 results as a dict.
+
+        ``ttest`` is (t, p) for ``pair`` or None when either side has fewer
+        than two trades; ``anova`` is (k, F, p); ``kruskal`` is (H, p), None
+        when not requested or when no rank bins were collected.
+        """
+        a, b = (self.moments.get(label, Moments()) for label in pair)
+        ttest = self.ttest(*pair, equal_var=not welch) if a.n > 1 and b.n > 1 else None
+        return {
+            'ttest': None if ttest is None else (float(ttest[0]), float(ttest[1])),
+            'welch': welch,
+            'anova': self.anova(),
+            'kruskal': self.kruskal() if kruskal and self.has_ranks else None,
+        }
+
+    def to_dict(self):
+        return {
+            'moments': {label: m.to_list() for label, m in self.moments.items()},
+            'bounds': self.bounds,
+            'bins': self.bins,
+            'ranks': {label: np.flatnonzero(h).tolist() for label, h in self.ranks.items()},
+            'rank_counts': {label: h[h > 0].tolist() for label, h in self.ranks.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tests = cls(data['bounds'], data['bins'])
+        tests.moments = {label: Moments(*values) for label, values in data['moments'].items()}
+        for label, idx in data['ranks'].items():
+            hist = np.zeros(tests.bins, dtype=np.int64)
+            hist[idx] = data['rank_counts'][label]
+            tests.ranks[label] = hist
+        return tests
@@ -0,0 +1,193 @@
+"""
+Multi-process execution of the streaming pipeline over file partitions.
+
+The trade export is split into contiguous, newline-aligned byte ranges of
+about equal size. Nothing is assumed about the row order: keep-first dedup
+follows file order across the ranges, so results do not depend on how the
+export is sorted. A process pool then runs two phases:
+
+1. Scan: every worker parses its range with the TRADE_SCHEMA dtypes,
+   drops in-partition duplicate Transaction Hashes and spills compact
+   columns (hash digest, timestamp, direction, PnL) to a temporary
+   directory.
+2. Aggregate: once the parent has resolved duplicates across partitions
+   (keep-first in file order, through a HashIndex that spills to the same
+   directory) and computed the global 1st/99th percentile bounds, every
+   worker trims, joins sentiment and reduces its partition to the (date,
+   classification, is_buy) group table.
+
+The partial group tables and significance-test accumulators are
+mergeable, so the final tables, t-test and ANOVA are identical to the
+single-process streaming mode. Digests are described in :mod:`.dedup`.
+Rows must not contain quoted newlines, which the export never does.
+"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .dedup import DEFAULT_DIGEST_BITS, HashIndex, first_occurrence, hash_digests
+from .join import SentimentLookup
+from .online_stats import SentimentTests
+from .quantile_sketch import TDigest
+from .schema import DIRECTION_COL, HASH_COL, PNL_COL, TIMESTAMP_COL, TRADE_SCHEMA
+from .streaming import (
+    DEFAULT_MEMORY_LIMIT_MB, GROUP_KEYS, StreamResult,
+    combine_groups, index_memory_mb, join_and_aggregate, label_groups, rank_bounds,
+)
+
+# Raw CSV bytes per partition as a fraction of the per-worker memory ceiling
+_PARTITION_FRACTION = 4
+
+_SCAN_COLUMNS = [TIMESTAMP_COL, DIRECTION_COL, PNL_COL, HASH_COL]
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def partition_offsets(path, n_parts):
+    """Return the header column names and up to ``n_parts`` newline-aligned byte ranges."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        data_start = fh.tell()
+        offsets = [data_start]
+        for i in range(1, n_parts):
+            target = data_start + (size - data_start) * i // n_parts
+            fh.seek(max(target - 1, offsets[-1]))
+            fh.readline()
+            pos = fh.tell()
+            if offsets[-1] < pos < size:
+                offsets.append(pos)
+    offsets.append(size)
+    columns = next(csv.reader([header.decode('utf-8').rstrip('\r\n')]))
+    return columns, [(start, end) for start, end in zip(offsets[:-1], offsets[1:]) if end > start]
+
+
+def _spill_path(tmp_dir, index, name):
+    return os.path.join(tmp_dir, f'part{index:05d}-{name}.npy')
+
+
+def _scan_partition(path, columns, start, end, tmp_dir, index, hash_bits):
+    """Phase 1: parse one byte range, dedup within it and spill compact columns."""
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        buf = fh.read(end - start)
+    frame = pd.read_csv(io.BytesIO(buf), header=None, names=columns, usecols=_SCAN_COLUMNS,
+                        dtype={col: TRADE_SCHEMA[col] for col in _SCAN_COLUMNS})
+    del buf
+
+    digests = hash_digests(frame[HASH_COL], hash_bits)
+    keep = first_occurrence(digests)
+    spilled = {
+        'hash': digests[keep],
+        'timestamp': frame[TIMESTAMP_COL].to_numpy()[keep],
+        'is_buy': (frame[DIRECTION_COL] == 'Buy').to_numpy()[keep],
+        'pnl': frame[PNL_COL].to_numpy()[keep],
+    }
+    for name, values in spilled.items():
+        np.save(_spill_path(tmp_dir, index, name), values)
+    return len(frame)
+
+
+def _aggregate_partition(tmp_dir, index, keep, bounds, fear_greed, sketch_compression, tz, as_of):
+    """Phase 2: trim, join and aggregate one spilled partition."""
+    timestamps = np.load(_spill_path(tmp_dir, index, 'timestamp'))[keep]
+    is_buy = np.load(_spill_path(tmp_dir, index, 'is_buy'))[keep]
+    pnl = np.load(_spill_path(tmp_dir, index, 'pnl'))[keep]
+
+    present = ~np.isnan(pnl)
+    in_range = (pnl >= bounds[0]) & (pnl <= bounds[1])
+    outliers = int((present & ~in_range).sum())
+    timestamps, is_buy, pnl = timestamps[in_range], is_buy[in_range], pnl[in_range]
+
+    lookup = SentimentLookup(fear_greed, tz, as_of)
+    tests = SentimentTests(rank_bounds(*bounds))
+    agg, matched, _ = join_and_aggregate(lookup, timestamps, is_buy, pnl, tests)
+    groups = label_groups(agg, lookup.categories).set_index(GROUP_KEYS)
+    if sketch_compression is None:
+        pnl_summary = pnl[matched]
+    else:
+        pnl_summary = TDigest.from_values(pnl[matched], sketch_compression)
+    return groups, outliers, int((~matched).sum()), pnl_summary, tests
+
+
+def parallel_analysis(path, fear_greed, workers=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                      sketch_compression=None, tz=None, as_of=False, hash_bits=DEFAULT_DIGEST_BITS):
+    """
+    Run the streaming pipeline across a process pool.
+
+    Returns the same StreamResult as ``stream_analysis``. ``memory_limit_mb``
+    caps the working set of each worker and sets the partition size.
+    """
+    workers = workers or default_workers()
+    data_bytes = os.path.getsize(path)
+    partition_bytes = max(1, memory_limit_mb * 2**20 // _PARTITION_FRACTION)
+    n_parts = max(workers, -(-data_bytes // partition_bytes))
+    columns, ranges = partition_offsets(path, n_parts)
+
+    tmp_dir = tempfile.mkdtemp(prefix='sentiment-parallel-')
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            row_counts = list(pool.map(
+                _scan_partition,
+                *zip(*[(path, columns, start, end, tmp_dir, i, hash_bits) for i, (start, end) in enumerate(ranges)]),
+            ))
+            rows_read = sum(row_counts)
+
+            # Cross-partition keep-first dedup on the digests, in file order
+            seen = HashIndex(hash_bits, index_memory_mb(memory_limit_mb), tmp_dir)
+            keep_parts = [seen.first_seen(np.load(_spill_path(tmp_dir, i, 'hash'))) for i in range(len(ranges))]
+            del seen
+            kept = sum(int(k.sum()) for k in keep_parts)
+            duplicates = rows_read - kept
+
+            if sketch_compression is None:
+                pnl = np.concatenate([np.load(_spill_path(tmp_dir, i, 'pnl'))[k]
+                                      for i, k in enumerate(keep_parts)])
+                pnl = pnl[~np.isnan(pnl)]
+                missing_pnl = kept - len(pnl)
+                bounds = tuple(np.quantile(pnl, [0.01, 0.99])) if len(pnl) else (np.nan, np.nan)
+                del pnl
+            else:
+                # One partition at a time, so no PnL column of the whole file is built
+                bounds_digest = TDigest(sketch_compression)
+                for i, k in enumerate(keep_parts):
+                    bounds_digest.update(np.load(_spill_path(tmp_dir, i, 'pnl'))[k])
+                missing_pnl = kept - int(bounds_digest.count)
+                bounds = tuple(bounds_digest.quantile([0.01, 0.99]))
+
+            results = list(pool.map(
+                _aggregate_partition,
+                *zip(*[(tmp_dir, i, k, bounds, fear_greed, sketch_compression, tz, as_of)
+                       for i, k in enumerate(keep_parts)]),
+            ))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    part_groups, part_outliers, part_unmatched, pnl_summaries, part_tests = zip(*results)
+    groups = combine_groups(list(part_groups)).reset_index()
+    groups = groups.sort_values(GROUP_KEYS, ignore_index=True)
+    outliers = sum(part_outliers)
+    unmatched = sum(part_unmatched)
+    if sketch_compression is None:
+        merged_pnl = np.concatenate(pnl_summaries)
+        median = float(np.median(merged_pnl)) if len(merged_pnl) else np.nan
+    else:
+        digest = TDigest(sketch_compression)
+        for partial in pnl_summaries:
+            digest.merge(partial)
+        median = digest.quantile(0.5)
+    tests = SentimentTests(rank_bounds(*bounds))
+    for partial in part_tests:
+        tests.merge(partial)
+
+    return StreamResult(groups, median, rows_read, duplicates, missing_pnl,
+                        outliers, unmatched, bounds, tests=tests)
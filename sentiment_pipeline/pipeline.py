@@ -0,0 +1,187 @@
+"""
+Callable stages of the in-memory pipeline.
+
+The command line (``analysis.py`` / ``python -m sentiment_pipeline``)
+strings these together and prints the report; services can call them
+directly::
+
+    from sentiment_pipeline import load, clean, join, aggregate, test
+
+    fear_greed, trades = load()
+    cleaned = clean(trades)
+    merged = join(cleaned.trades, fear_greed)
+    agg = aggregate(merged, cleaned.pnl_col)
+    results = test(agg)
+
+Stages only import what they use: matplotlib and seaborn load when
+figures are rendered, scipy when a significance test is evaluated.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import aggregate
+from .dedup import DEFAULT_DIGEST_BITS, first_occurrence, hash_digests
+from .features import FEATURE_COLUMNS, SentimentFeatures
+from .join import join_sentiment, localize, to_days
+from .quantile_sketch import TDigest
+from .render import figure_data, render
+from .schema import COMPACT_SCHEMA, DAY_NAMES, DIRECTION_COL, HASH_COL, PNL_COL, SENTIMENT_ORDER, TIMESTAMP_COL
+
+FEAR_GREED_PATH = 'data/fear_greed_index.csv'
+TRADES_PATH = 'data/historical_data.csv'
+
+# Trim bounds of the outlier filter
+PNL_QUANTILES = (0.01, 0.99)
+
+# Ordinal encoding used by the correlation heatmap
+SENTIMENT_NUMERIC = {sentiment: i for i, sentiment in enumerate(SENTIMENT_ORDER, 1)}
+
+__all__ = [
+    'FEAR_GREED_PATH', 'TRADES_PATH', 'CleanedTrades', 'SentimentFeatures',
+    'load', 'clean', 'join', 'add_features', 'aggregate', 'test', 'correlation',
+    'figure_data', 'render', 'analyze', 'memory_mb', 'read_trades',
+]
+
+
+def memory_mb(frame):
+    """Deep memory footprint of a DataFrame in MiB."""
+    return frame.memory_usage(deep=True).sum() / 2**20
+
+
+def read_trades(trades_path=TRADES_PATH, compact=False):
+    """The raw trade export; ``compact`` reads only the COMPACT_SCHEMA columns, with their dtypes."""
+    if compact:
+        return pd.read_csv(trades_path, usecols=lambda col: col in COMPACT_SCHEMA, dtype=COMPACT_SCHEMA)
+    return pd.read_csv(trades_path, low_memory=False)
+
+
+def load(fear_greed_path=FEAR_GREED_PATH, trades_path=TRADES_PATH, compact=False):
+    """STEP 1: read the Fear & Greed index and the raw trade export."""
+    return pd.read_csv(fear_greed_path), read_trades(trades_path, compact)
+
+
+class CleanedTrades:
+    """Output of :func:`clean`: the cleaned frame plus what was done to it."""
+
+    def __init__(self, trades, pnl_col, timestamp_col, date_range, duplicates, outliers, bounds):
+        self.trades = trades
+        self.pnl_col = pnl_col
+        # Column the datetimes came from; not TIMESTAMP_COL when it was missing
+        self.timestamp_col = timestamp_col
+        self.date_range = date_range
+        self.duplicates = duplicates
+        self.outliers = outliers
+        self.bounds = bounds
+
+
+def _find_pnl_col(columns):
+    if PNL_COL in columns:
+        return PNL_COL
+    candidates = [col for col in columns if 'pnl' in col.lower()]
+    if not candidates:
+        raise ValueError('Could not find PnL column')
+    return candidates[0]
+
+
+def deduplicate(trades, hash_bits=DEFAULT_DIGEST_BITS, index=None):
+    """
+    Keep-first dedup on ``hash_bits`` Transaction Hash digests; see :mod:`.dedup`.
+
+    Returns the kept trades and the number of duplicates removed. With a
+    HashIndex, hashes it already holds are duplicates too and the new ones
+    are added to it, so several frames or files dedup against each other.
+    """
+    digests = hash_digests(trades[HASH_COL], hash_bits)
+    keep = first_occurrence(digests) if index is None else index.first_seen(digests)
+    return trades[keep], len(trades) - int(keep.sum())
+
+
+def clean(trades, tz=None, sketch_compression=None, compact=False, hash_bits=DEFAULT_DIGEST_BITS):
+    """
+    STEP 3: timestamps, dedup, missing PnL and the 1st-99th percentile trim.
+
+    Adds ``datetime`` (wall-clock time in ``tz``) and ``date`` (its calendar
+    day). When the Timestamp column is missing the last column is used.
+    ``compact`` drops the raw timestamp and the transaction hash once they
+    have been used. Raises ValueError when no PnL column can be found.
+    """
+    timestamp_col = TIMESTAMP_COL if TIMESTAMP_COL in trades.columns else trades.columns[-1]
+    trades['datetime'] = pd.to_datetime(trades[timestamp_col], unit='ms',
+                                        errors='raise' if timestamp_col == TIMESTAMP_COL else 'coerce')
+    trades['datetime'] = localize(trades['datetime'], tz)
+    trades['date'] = to_days(trades['datetime']).astype('datetime64[D]').astype('datetime64[ns]')
+    date_range = (trades['date'].min(), trades['date'].max())
+
+    trades, duplicates = deduplicate(trades, hash_bits)
+
+    pnl_col = _find_pnl_col(trades.columns)
+    trades = trades.dropna(subset=[pnl_col])
+
+    if sketch_compression:
+        q1, q99 = TDigest.from_values(trades[pnl_col], sketch_compression).quantile(list(PNL_QUANTILES))
+    else:
+        q1, q99 = (trades[pnl_col].quantile(q) for q in PNL_QUANTILES)
+    before = len(trades)
+    trades = trades[(trades[pnl_col] >= q1) & (trades[pnl_col] <= q99)]
+    if compact:
+        trades = trades.drop(columns=[timestamp_col, HASH_COL])
+
+    return CleanedTrades(trades, pnl_col, timestamp_col, date_range, duplicates,
+                         before - len(trades), (q1, q99))
+
+
+def join(trades, fear_greed, as_of=False, compact=False):
+    """STEP 4: attach classification and index value by calendar day; see :mod:`.join`."""
+    merged, _ = join_sentiment(trades, fear_greed, as_of, compact)
+    return merged
+
+
+def add_features(merged, pnl_col=PNL_COL, features=None, compact=False):
+    """
+    STEP 5: per-trade feature columns used by the correlation heatmap and exports.
+
+    With a SentimentFeatures, its rolling/lagged index columns are joined
+    by ``date`` as float32. ``compact`` stores the flags and calendar parts
+    as int8, ``pnl_abs`` as float32 and the weekday as a categorical.
+    """
+    merged['profitable'] = merged[pnl_col] > 0
+    merged['pnl_abs'] = merged[pnl_col].abs()
+    merged['sentiment_numeric'] = merged['classification'].map(SENTIMENT_NUMERIC)
+    if DIRECTION_COL in merged.columns:
+        merged['is_buy'] = (merged[DIRECTION_COL] == 'Buy').astype(int)
+    else:
+        merged['is_buy'] = np.nan
+    merged['hour'] = merged['datetime'].dt.hour
+    merged['day_of_week'] = merged['datetime'].dt.day_name()
+    merged['month'] = merged['datetime'].dt.month
+    if compact:
+        merged['pnl_abs'] = merged['pnl_abs'].astype(np.float32)
+        merged['sentiment_numeric'] = merged['sentiment_numeric'].astype(np.float32)
+        merged['day_of_week'] = pd.Categorical(merged['day_of_week'], categories=DAY_NAMES)
+        for col in ('sentiment_numeric', 'is_buy', 'hour', 'month'):
+            if merged[col].notna().all():
+                merged[col] = merged[col].astype(np.int8)
+    if features is not None:
+        features.join(merged)
+    return merged
+
+
+def test(agg, welch=False, kruskal=False):
+    """ANALYSIS 4 results of SentimentAggregates (or a StreamResult); see SentimentTests.summary."""
+    return agg.tests.summary(welch, kruskal)
+
+
+def correlation(merged, pnl_col=PNL_COL):
+    """Figure 4 correlation matrix of PnL, sentiment, profitability and any sentiment features."""
+    columns = [pnl_col, 'sentiment_numeric', 'profitable']
+    return merged[columns + [col for col in FEATURE_COLUMNS if col in merged.columns]].corr()
+
+
+def analyze(fear_greed_path=FEAR_GREED_PATH, trades_path=TRADES_PATH, tz=None, as_of=False,
+            sketch_compression=None, compact=False, hash_bits=DEFAULT_DIGEST_BITS):
+    """Load, clean, join and aggregate in one call; returns SentimentAggregates."""
+    fear_greed, trades = load(fear_greed_path, trades_path, compact)
+    cleaned = clean(trades, tz, sketch_compression, compact, hash_bits)
+    merged = join(cleaned.trades, fear_greed, as_of, compact)
+    return aggregate(merged, cleaned.pnl_col, DIRECTION_COL, sketch_compression)
@@ -0,0 +1,146 @@
+"""
+Mergeable t-digest quantile sketch for PnL columns.
+
+A t-digest summarizes a sample as weighted centroids whose size is
+limited by the k1 scale function ``k(q) = delta / (2 pi) * asin(2q - 1)``:
+no centroid spans more than one unit of k. Centroids are therefore tiny in
+the tails and widest at the median, and digests built per chunk, per
+partition or per day can be merged by re-compressing their centroids.
+
+Error bound: interpolating inside a centroid misplaces a quantile by at
+most half its width, i.e. a rank error of about ``(pi / delta) *
+sqrt(q (1 - q))``. With the default ``delta = 1000`` that is ~0.16% of
+the trade count at the median and ~0.03% at the 1st/99th percentiles.
+The minimum and maximum are tracked exactly. Pass an exact flag to the
+pipeline stages when bit-for-bit percentiles are required.
+"""
+
+import numpy as np
+
+DEFAULT_COMPRESSION = 1000
+
+# Compress once this many raw values per unit of compression are buffered
+_BUFFER_FACTOR = 20
+
+
+class TDigest:
+    """Batch-updated, mergeable t-digest using the k1 scale function."""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    @classmethod
+    def from_values(cls, values, compression=DEFAULT_COMPRESSION):
+        digest = cls(compression)
+        digest.update(values)
+        return digest
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """Add a batch of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append((values, np.ones(len(values))))
+        self._buffered += len(values)
+        if self._buffered >= _BUFFER_FACTOR * self.compression:
+            self._flush()
+        return self
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        other._flush()
+        if len(other.weights):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._buffer.append((other.means, other.weights))
+            self._buffered += len(other.means)
+            self._flush()
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        q_left = (cum - weights) / cum[-1]
+        # Every item joins the k-unit bucket its left edge falls in
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k + self.compression / 4).astype(np.int64)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """Approximate quantile(s) ``q`` in [0, 1]; NaN for an empty digest."""
+        self._flush()
+        q = np.asarray(q, dtype=np.float64)
+        if not len(self.weights):
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0.0], centers, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        result = np.interp(q * total, ranks, values)
+        return result if q.ndim else float(result)
+
+    def to_dict(self):
+        self._flush()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data['compression'])
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        digest.min, digest.max = data['min'], data['max']
+        return digest
+
+
+def box_stats_from_digest(digest, label, whis=1.5):
+    """
+    Approximate ``Axes.bxp`` statistics from a digest.
+
+    Whiskers sit at the most extreme centroid inside ``whis`` IQRs (or the
+    exact min/max when those are inside), and the centroids beyond the
+    whiskers stand in for individual fliers.
+    """
+    if digest.count == 0:
+        return {'label': label, 'med': np.nan, 'q1': np.nan, 'q3': np.nan,
+                'whislo': np.nan, 'whishi': np.nan, 'fliers': np.empty(0)}
+    q1, med, q3 = digest.quantile([0.25, 0.5, 0.75])
+    lo, hi = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    points = np.concatenate([[digest.min], digest.means, [digest.max]])
+    inside = points[(points >= lo) & (points <= hi)]
+    whislo = inside.min() if len(inside) else q1
+    whishi = inside.max() if len(inside) else q3
+    return {
+        'label': label,
+        'med': med, 'q1': q1, 'q3': q3,
+        'whislo': whislo, 'whishi': whishi,
+        'fliers': points[(points < whislo) | (points > whishi)],
+    }
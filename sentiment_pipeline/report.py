@@ -0,0 +1,243 @@
+"""
+ANALYSIS 1-6 console report computed from grouped sufficient statistics.
+
+Every number here is derived from a group table with one row per
+(date, classification, is_buy) holding count, wins, pnl_sum, pnl_sumsq,
+pnl_min and pnl_max, so the report never needs trade-level data. The
+ANALYSIS 4 tests read per-classification moments from the SentimentTests
+accumulator every pipeline mode collects, not from the sums of squares.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import SENTIMENT_ORDER
+
+
+def summarize(groups):
+    """Collapse a slice of the group table into scalar trade statistics."""
+    n = int(groups['count'].sum())
+    wins = int(groups['wins'].sum())
+    total = float(groups['pnl_sum'].sum())
+    sumsq = float(groups['pnl_sumsq'].sum())
+    mean = total / n if n else np.nan
+    var = (sumsq - total * total / n) / (n - 1) if n > 1 else np.nan
+    return {
+        'count': n,
+        'wins': wins,
+        'win_rate': wins / n * 100 if n else np.nan,
+        'sum': total,
+        'mean': mean,
+        'std': np.sqrt(max(var, 0.0)) if n > 1 else np.nan,
+        'min': float(groups['pnl_min'].min()) if n else np.nan,
+        'max': float(groups['pnl_max'].max()) if n else np.nan,
+    }
+
+
+def daily_statistics(groups):
+    """Rebuild the ANALYSIS 6 daily table from the group table."""
+    daily = groups.groupby(['date', 'classification'])[['pnl_sum', 'count', 'wins']].sum()
+    daily = daily.reset_index()
+    daily['daily_total_pnl'] = daily['pnl_sum'].round(2)
+    daily['daily_avg_pnl'] = (daily['pnl_sum'] / daily['count']).round(2)
+    daily['trade_count'] = daily['count']
+    daily['profitable_count'] = daily['wins']
+    daily['win_rate'] = ((daily['wins'] / daily['count']).round(2) * 100).round(2)
+    return daily[['date', 'classification', 'daily_total_pnl', 'daily_avg_pnl',
+                  'trade_count', 'profitable_count', 'win_rate']]
+
+
+def print_analysis(groups, median, tests, has_direction=True, welch=False, kruskal=False):
+    """
+    Print ANALYSIS 1-6 and return the ANALYSIS 6 daily table.
+
+    ``median`` is the overall PnL median, exact or from a t-digest.
+    ``has_direction`` is False when the trades had no Direction column.
+    ``tests`` is the SentimentTests accumulator of the run;
+    ``welch`` switches the t-test to unequal variances and ``kruskal``
+    adds a Kruskal-Wallis test on binned ranks.
+    """
+    if tests is None:
+        raise ValueError('print_analysis needs the SentimentTests accumulator of the run')
+    by_sentiment = {s: summarize(groups[groups['classification'] == s]) for s in SENTIMENT_ORDER}
+    overall = summarize(groups)
+
+    print("[ANALYSIS 1] OVERALL STATISTICS\n")
+    print(f"Total Trades Analyzed:        {overall['count']:,}")
+    print(f"Date Range:                   {groups['date'].min().date()} to {groups['date'].max().date()}")
+    print(f"Overall Win Rate:             {overall['win_rate']:.2f}%")
+    print(f"Average PnL per Trade:        ${overall['mean']:.2f}")
+    print(f"Median PnL per Trade:         ${median:.2f}")
+    print(f"Total PnL (All Trades):       ${overall['sum']:.2f}")
+    print(f"Std Dev of PnL:               ${overall['std']:.2f}")
+    print(f"Max Single Trade PnL:         ${overall['max']:.2f}")
+    print(f"Min Single Trade PnL:         ${overall['min']:.2f}")
+    print(f"Profitable Trades:            {overall['wins']:,}")
+    print(f"Losing Trades:                {overall['count'] - overall['wins']:,}")
+
+    print("\n" + "-"*100)
+    print("[ANALYSIS 2] PERFORMANCE BY SENTIMENT\n")
+    print(f"{'Sentiment':<15} {'Trades':>10} {'Win Rate':>12} {'Avg PnL':>12} {'Total PnL':>15} {'Profitable':>12}")
+    print("-"*100)
+    for sentiment, s in by_sentiment.items():
+        if s['count'] > 0:
+            print(f"{sentiment:<15} {s['count']:>10,} {s['win_rate']:>11.2f}% ${s['mean']:>11.2f} ${s['sum']:>14.2f} {s['wins']:>12,}")
+
+    print("\n" + "-"*100)
+    print("[ANALYSIS 3] EXTREME SENTIMENT COMPARISON\n")
+    for i, sentiment in enumerate(['Extreme Fear', 'Extreme Greed', 'Neutral']):
+        s = by_sentiment[sentiment]
+        print(("\n" if i else "") + f"{sentiment.upper()}:")
+        print(f"  Number of trades:         {s['count']:,}")
+        print(f"  Win rate:                 {s['win_rate']:.2f}%")
+        print(f"  Average PnL:              ${s['mean']:.2f}")
+        print(f"  Total PnL:                ${s['sum']:.2f}")
+        print(f"  Avg Loss per trade:       ${s['std']:.2f}")
+
+    print("\n" + "-"*100)
+    print("[ANALYSIS 4] STATISTICAL SIGNIFICANCE TESTS\n")
+    results = tests.summary(welch, kruskal)
+    if results['ttest'] is not None:
+        t_stat, p_value_t = results['ttest']
+        print(f"{'WELCH ' if welch else ''}T-TEST: Extreme Fear vs Extreme Greed")
+        print(f"  t-statistic:              {t_stat:.6f}")
+        print(f"  p-value:                  {p_value_t:.10f}")
+        print(f"  Significant (p<0.05):     {'YES ✓✓✓ HIGHLY SIGNIFICANT' if p_value_t < 0.05 else 'NO'}")
+    else:
+        print("⚠ Insufficient data for t-test")
+
+    print("\nANOVA: All Sentiment Groups")
+    k, f_stat, p_value_anova = results['anova']
+    if k > 1:
+        print(f"  f-statistic:              {f_stat:.6f}")
+        print(f"  p-value:                  {p_value_anova:.10f}")
+        print(f"  Significant (p<0.05):     {'YES ✓✓✓ HIGHLY SIGNIFICANT' if p_value_anova < 0.05 else 'NO'}")
+        print(f"\n  Interpretation: Sentiment {'DOES' if p_value_anova < 0.05 else 'DOES NOT'} significantly affect trading performance")
+    else:
+        print("⚠ Insufficient sentiment groups for ANOVA")
+
+    if kruskal:
+        print("\nKRUSKAL-WALLIS: All Sentiment Groups (binned ranks)")
+        if results['kruskal'] is None:
+            print("⚠ Rank bins not available for this run")
+        elif k < 2:
+            print("⚠ Insufficient sentiment groups for Kruskal-Wallis")
+        else:
+            h_stat, p_value_kw = results['kruskal']
+            print(f"  H-statistic:              {h_stat:.6f}")
+            print(f"  p-value:                  {p_value_kw:.10f}")
+            print(f"  Significant (p<0.05):     {'YES ✓✓✓ HIGHLY SIGNIFICANT' if p_value_kw < 0.05 else 'NO'}")
+
+    print("\n" + "-"*100)
+    print("[ANALYSIS 5] BUY vs SELL PERFORMANCE BY SENTIMENT\n")
+    if not has_direction:
+        print("⚠ Buy/Sell data not available")
+    else:
+        _print_buy_sell(groups)
+
+    print("\n" + "-"*100)
+    print("[ANALYSIS 6] DAILY STATISTICS BY SENTIMENT\n")
+    daily_stats = daily_statistics(groups)
+    print("Sample Daily Statistics (first 10 days):")
+    print(daily_stats.head(10).to_string())
+    return daily_stats
+
+
+def _print_buy_sell(groups):
+    print(f"{'Sentiment':<15} {'Buy Trades':>12} {'Buy Win%':>12} {'Buy Avg$':>15} {'Sell Trades':>12} {'Sell Win%':>12} {'Sell Avg$':>15}")
+    print("-"*100)
+    for sentiment in SENTIMENT_ORDER:
+        subset = groups[groups['classification'] == sentiment]
+        buy = summarize(subset[subset['is_buy']])
+        sell = summarize(subset[~subset['is_buy']])
+        buy_win = buy['win_rate'] if buy['count'] > 0 else 0
+        buy_avg = buy['mean'] if buy['count'] > 0 else 0
+        sell_win = sell['win_rate'] if sell['count'] > 0 else 0
+        sell_avg = sell['mean'] if sell['count'] > 0 else 0
+        print(f"{sentiment:<15} {buy['count']:>12,} {buy_win:>11.2f}% ${buy_avg:>14.2f} {sell['count']:>12,} {sell_win:>11.2f}% ${sell_avg:>14.2f}")
+
+
+def print_resampling(result):
+    """Print bootstrap intervals and the permutation test of a ResamplingResult."""
+    level = f"{result.confidence * 100:g}%"
+    print(f"[ANALYSIS 7] RESAMPLING ({result.resamples:,} bootstrap resamples, "
+          f"{result.permutations:,} permutations, seed {result.seed})\n")
+    print(f"{'Sentiment':<15} {'Trades':>10} {'Win Rate':>10} {level + ' CI':>20} {'Avg PnL':>12} {level + ' CI':>24}")
+    print("-"*100)
+    for _, row in result.intervals.iterrows():
+        if row['trades'] > 0:
+            win_ci = f"[{row['win_rate_lo']:.2f}, {row['win_rate_hi']:.2f}]"
+            pnl_ci = f"[{row['mean_pnl_lo']:.2f}, {row['mean_pnl_hi']:.2f}]"
+            print(f"{row['classification']:<15} {row['trades']:>10,} {row['win_rate']:>9.2f}% {win_ci:>20} ${row['mean_pnl']:>11.2f} {pnl_ci:>24}")
+
+    print("\nPERMUTATION TEST: Extreme Fear vs Extreme Greed")
+    perm = result.permutation
+    if perm is None:
+        print("⚠ Insufficient data for permutation test")
+        return
+    print(f"  Avg PnL difference:       ${perm['mean_diff']:.2f}")
+    print(f"  p-value:                  {perm['mean_p']:.6f}")
+    print(f"  Win rate difference:      {perm['win_rate_diff']:.2f} pts")
+    print(f"  p-value:                  {perm['win_rate_p']:.6f}")
+    significant = perm['mean_p'] < 0.05
+    print(f"  Significant (p<0.05):     {'YES ✓✓✓ HIGHLY SIGNIFICANT' if significant else 'NO'} (avg PnL)")
+
+
+# Columns print_accounts shows besides the ranking metric
+ACCOUNT_REPORT_COLUMNS = ['trades', 'win_rate', 'pnl_sum', 'pnl_mean', 'buy_share', 'sentiment_beta']
+
+
+def print_accounts(accounts, metric, n=10, min_trades=1):
+    """Print the top ``n`` accounts of an AccountTable ranked by ``metric``."""
+    top = accounts.top(metric, n, min_trades=min_trades)
+    print(f"[ANALYSIS 8] TOP {len(top)} OF {len(accounts):,} ACCOUNTS BY {metric.upper()}"
+          f"{f' (min {min_trades:,} trades)' if min_trades > 1 else ''}\n")
+    extra = metric not in ACCOUNT_REPORT_COLUMNS
+    header = (f"{'Account':<44} {'Trades':>8} {'Win Rate':>9} {'Total PnL':>14} {'Avg PnL':>10} "
+              f"{'Buy %':>7} {'Beta':>8}")
+    print(header + (f" {metric:>18}" if extra else ""))
+    print("-"*100)
+    for _, row in top.iterrows():
+        line = (f"{str(row['account']):<44} {row['trades']:>8,} {row['win_rate']:>8.2f}% "
+                f"${row['pnl_sum']:>13,.2f} ${row['pnl_mean']:>9.2f} {row['buy_share']:>6.1f}% "
+                f"{row['sentiment_beta']:>8.3f}")
+        print(line + (f" {row[metric]:>18.4f}" if extra else ""))
+
+
+# Roll-up rows printed by print_cube; the rest are summarised in one line
+CUBE_REPORT_ROWS = 40
+
+
+def _cube_label(value):
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _cube_filter(dim, spec):
+    if isinstance(spec, slice):
+        return f"{dim}={spec.start or ''}:{spec.stop or ''}"
+    if isinstance(spec, list):
+        return f"{dim}={','.join(map(str, spec))}"
+    return f"{dim}={spec}"
+
+
+def print_cube(result, by, filters=(), n=CUBE_REPORT_ROWS):
+    """Print a SentimentCube.query result, largest groups first when it has more than ``n`` rows."""
+    title = ' x '.join(dim.upper() for dim in by) or 'ALL TRADES'
+    where = ', '.join(_cube_filter(dim, spec) for dim, spec in filters)
+    print(f"[ANALYSIS 9] CUBE ROLL-UP BY {title}{f' WHERE {where}' if where else ''}\n")
+    shown = result if len(result) <= n else result.nlargest(n, 'count').sort_index()
+    width = max([len(' / '.join(by)) or 5] + [len(' / '.join(_cube_label(v) for v in row))
+                                               for row in shown[by].itertuples(index=False)])
+    print(f"{' / '.join(by) or 'Total':<{width}} {'Trades':>10} {'Win Rate':>9} {'Total PnL':>16} "
+          f"{'Avg PnL':>10} {'Std PnL':>10}")
+    print("-"*max(100, width + 70))
+    for _, row in shown.iterrows():
+        label = ' / '.join(_cube_label(row[dim]) for dim in by) or 'Total'
+        print(f"{label:<{width}} {int(row['count']):>10,} {row['win_rate']:>8.2f}% ${row['pnl_sum']:>15,.2f} "
+              f"${row['pnl_mean']:>9.2f} ${row['pnl_std']:>9.2f}")
+    if len(shown) < len(result):
+        rest = result.drop(shown.index)
+        print(f"... {len(rest):,} more groups with {int(rest['count'].sum()):,} trades "
+              f"(showing the {n} largest)")
@@ -0,0 +1,179 @@
+"""
+Bootstrap confidence intervals and permutation tests on trade-level PnL.
+
+PnL is heavy-tailed, so ANALYSIS 4's t-test and ANOVA lean on
+large-sample normality. This module gives distribution-free evidence:
+
+- Percentile bootstrap intervals for the win rate and average PnL of
+  every sentiment.
+- A two-sided permutation test of Extreme Fear vs Extreme Greed, for the
+  difference in average PnL and in win rate.
+
+Resamples are drawn in batches, as one ``(rows, n)`` NumPy index matrix
+per batch, with ``rows`` sized so a batch stays under ``batch_elements``
+draws. Batches can fan out over a process pool. Every batch gets its own
+child of ``np.random.SeedSequence(seed)``, so results depend on the seed
+but not on the number of workers. Each sentiment's PnL is sorted before
+drawing, so they do not depend on row order either: a cold run and a
+cached or ``--from-store`` run (which reorder rows) give the same intervals.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .schema import SENTIMENT_ORDER
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_SEED = 42
+DEFAULT_CONFIDENCE = 0.95
+
+# Index draws per batch; about 17 bytes each (intp index, float64 gather, win mask)
+DEFAULT_BATCH_ELEMENTS = 2**23
+
+PERMUTATION_PAIR = ('Extreme Fear', 'Extreme Greed')
+
+# Arrays shared with the batch functions, set once per worker process
+_shared = {}
+
+
+def _init_worker(arrays):
+    _shared.clear()
+    _shared.update(arrays)
+
+
+def _batch_sizes(total, n, batch_elements):
+    """Split ``total`` resamples of ``n`` draws into batches of at most ``batch_elements`` draws."""
+    rows = max(1, batch_elements // max(n, 1))
+    return [min(rows, total - start) for start in range(0, total, rows)]
+
+
+def _bootstrap_batch(label, rows, seed):
+    """Mean PnL and win rate of ``rows`` bootstrap resamples of one sentiment."""
+    pnl = _shared[label]
+    rng = np.random.default_rng(seed)
+    # Native intp indices let take() gather without an internal cast copy
+    idx = rng.integers(0, len(pnl), size=(rows, len(pnl)), dtype=np.intp)
+    sample = pnl.take(idx)
+    return sample.mean(axis=1), np.count_nonzero(sample > 0, axis=1) / len(pnl) * 100
+
+
+def _permutation_batch(rows, seed):
+    """PnL and win sums of the smaller group under ``rows`` random relabellings."""
+    pooled = _shared['pooled']
+    k = _shared['subset']
+    rng = np.random.default_rng(seed)
+    idx = np.tile(np.arange(len(pooled), dtype=np.intp), (rows, 1))
+    rng.permuted(idx, axis=1, out=idx)
+    sample = pooled.take(idx[:, :k])
+    return sample.sum(axis=1), np.count_nonzero(sample > 0, axis=1)
+
+
+class ResamplingResult:
+    """Bootstrap intervals per sentiment plus the Extreme Fear vs Extreme Greed permutation test."""
+
+    def __init__(self, intervals, permutation, resamples, permutations, confidence, seed):
+        self.intervals = intervals
+        self.permutation = permutation
+        self.resamples = resamples
+        self.permutations = permutations
+        self.confidence = confidence
+        self.seed = seed
+
+
+def resample(merged, pnl_col, resamples=DEFAULT_RESAMPLES, permutations=None,
+             seed=DEFAULT_SEED, confidence=DEFAULT_CONFIDENCE, workers=1,
+             batch_elements=DEFAULT_BATCH_ELEMENTS):
+    """
+    Run the bootstrap and permutation test over the merged trade frame.
+
+    ``intervals`` has one row per sentiment (SENTIMENT_ORDER) with the
+    observed win rate (%) and average PnL and their percentile interval
+    bounds. ``permutation`` holds the observed differences (Fear minus
+    Greed) and two-sided p-values, or None when either group is empty.
+    ``permutations`` defaults to ``resamples``.
+    """
+    permutations = resamples if permutations is None else permutations
+    pnl = merged[pnl_col].to_numpy(dtype=np.float64)
+    classification = merged['classification'].to_numpy()
+    # Canonical order: the draws index into these arrays
+    arrays = {s: np.sort(pnl[classification == s]) for s in SENTIMENT_ORDER}
+    labels = [s for s in SENTIMENT_ORDER if len(arrays[s])]
+
+    fear, greed = (arrays[s] for s in PERMUTATION_PAIR)
+    run_permutation = len(fear) > 0 and len(greed) > 0 and permutations > 0
+    if run_permutation:
+        arrays['pooled'] = np.concatenate([fear, greed])
+        arrays['subset'] = min(len(fear), len(greed))
+
+    # Plan every batch up front so the seeds do not depend on scheduling
+    boot_tasks = [(label, rows) for label in labels
+                  for rows in _batch_sizes(resamples, len(arrays[label]), batch_elements)]
+    perm_rows = (_batch_sizes(permutations, len(arrays['pooled']), batch_elements)
+                 if run_permutation else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(boot_tasks) + len(perm_rows))
+    boot_seeds, perm_seeds = seeds[:len(boot_tasks)], seeds[len(boot_tasks):]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(arrays,)) as pool:
+            boot = list(pool.map(_bootstrap_batch, *zip(*boot_tasks), boot_seeds)) if boot_tasks else []
+            perm = list(pool.map(_permutation_batch, perm_rows, perm_seeds)) if perm_rows else []
+    else:
+        _init_worker(arrays)
+        try:
+            boot = [_bootstrap_batch(label, rows, s) for (label, rows), s in zip(boot_tasks, boot_seeds)]
+            perm = [_permutation_batch(rows, s) for rows, s in zip(perm_rows, perm_seeds)]
+        finally:
+            _shared.clear()
+
+    alpha = (1 - confidence) / 2
+    rows = []
+    for label in SENTIMENT_ORDER:
+        values = arrays[label]
+        parts = [result for (name, _), result in zip(boot_tasks, boot) if name == label]
+        row = {'classification': label, 'trades': len(values)}
+        if parts:
+            means = np.concatenate([m for m, _ in parts])
+            win_rates = np.concatenate([w for _, w in parts])
+            row['win_rate'] = (values > 0).mean() * 100
+            row['win_rate_lo'], row['win_rate_hi'] = np.quantile(win_rates, [alpha, 1 - alpha])
+            row['mean_pnl'] = values.mean()
+            row['mean_pnl_lo'], row['mean_pnl_hi'] = np.quantile(means, [alpha, 1 - alpha])
+        rows.append(row)
+    intervals = pd.DataFrame(rows, columns=['classification', 'trades', 'win_rate', 'win_rate_lo',
+                                            'win_rate_hi', 'mean_pnl', 'mean_pnl_lo', 'mean_pnl_hi'])
+
+    permutation = None
+    if run_permutation:
+        permutation = _permutation_summary(fear, greed, perm)
+
+    return ResamplingResult(intervals, permutation, resamples, permutations, confidence, seed)
+
+
+def _permutation_summary(fear, greed, batches):
+    """Observed Fear - Greed differences and their two-sided permutation p-values."""
+    n_fear, n_greed = len(fear), len(greed)
+    total_pnl = fear.sum() + greed.sum()
+    total_wins = (fear > 0).sum() + (greed > 0).sum()
+    pnl_sums = np.concatenate([p for p, _ in batches])
+    win_sums = np.concatenate([w for _, w in batches])
+    # The sampled subset stands for the smaller group
+    if n_fear <= n_greed:
+        fear_pnl, fear_wins = pnl_sums, win_sums
+    else:
+        fear_pnl, fear_wins = total_pnl - pnl_sums, total_wins - win_sums
+    mean_diffs = fear_pnl / n_fear - (total_pnl - fear_pnl) / n_greed
+    win_diffs = (fear_wins / n_fear - (total_wins - fear_wins) / n_greed) * 100
+
+    observed_mean = fear.mean() - greed.mean()
+    observed_win = ((fear > 0).mean() - (greed > 0).mean()) * 100
+    # Small tolerance so ties with the observed statistic are not lost to rounding
+    tol = 1e-12
+    return {
+        'mean_diff': observed_mean,
+        'mean_p': (1 + (np.abs(mean_diffs) >= abs(observed_mean) * (1 - tol)).sum()) / (len(mean_diffs) + 1),
+        'win_rate_diff': observed_win,
+        'win_rate_p': (1 + (np.abs(win_diffs) >= abs(observed_win) * (1 - tol)).sum()) / (len(win_diffs) + 1),
+    }
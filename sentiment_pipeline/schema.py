@@ -0,0 +1,28 @@
+"""
+Column names, dtypes and orderings shared by every pipeline stage.
+"""
+
+PNL_COL = 'Closed PnL'
+HASH_COL = 'Transaction Hash'
+TIMESTAMP_COL = 'Timestamp'
+DIRECTION_COL = 'Direction'
+ACCOUNT_COL = 'Account'
+COIN_COL = 'Coin'
+
+SENTIMENT_ORDER = ['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed']
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Explicit dtypes for the columns of historical_data.csv the analyses use
+TRADE_SCHEMA = {
+    TIMESTAMP_COL: 'int64',
+    DIRECTION_COL: 'category',
+    COIN_COL: 'category',
+    PNL_COL: 'float64',
+    HASH_COL: str,
+}
+
+# --compact reads only these columns; the account goes to per-account metrics
+COMPACT_SCHEMA = {**TRADE_SCHEMA, ACCOUNT_COL: 'category'}
+
+MS_PER_DAY = 86_400_000
@@ -0,0 +1,443 @@
+"""
+Local JSON query service over the saved sentiment aggregates.
+
+    python -m sentiment_pipeline.service [--port 8050] [--cube outputs/sentiment_cube.parquet]
+
+Every run writes its (date, classification, is_buy) group table to
+``outputs/sentiment_groups.csv`` and its ANALYSIS 4 test accumulators to
+``outputs/sentiment_tests.json``. The service loads them once and answers
+the ANALYSIS 1-6 tables with the same functions as the console report, so
+no request reads a CSV:
+
+    /overall     ANALYSIS 1 overall statistics
+    /sentiment   ANALYSIS 2-3, one row per classification
+    /tests       ANALYSIS 4 t-test and ANOVA (``welch=1`` for unequal variances,
+                 ``kruskal=1`` adds Kruskal-Wallis)
+    /buy-sell    ANALYSIS 5 buy vs sell by classification
+    /daily       ANALYSIS 6 daily statistics
+    /cube        roll-up of the saved cube (``--cube``): ``group_by=hour,coin``
+                 plus DIMENSION=VALUE, VALUE,VALUE or LO:HI filters
+    /health      loaded files, reloads and cache hit rate
+
+Every endpoint takes ``start`` and ``end`` (inclusive dates) and
+``sentiment`` (comma-separated classifications). Unfiltered /tests answers
+come from the saved accumulators and match the console report. Filtered
+ones are recomputed from the group sums of squares: they are flagged
+``approximate``, lose precision when the PnL variance is small next to
+its mean, and have no rank bins for Kruskal-Wallis. Responses are kept in an
+LRU cache keyed by path and query. The files are polled every
+``--reload-interval`` seconds; a changed file is re-read in a worker thread,
+swapped in and the cache cleared. Runs replace the files by renaming a
+temporary file, so the service never reads one half-written. The overall
+median is not derivable from the group sums and is not served.
+
+Only the standard library (asyncio) is used for the HTTP side; requests
+are GET or HEAD, with keep-alive and ETag revalidation.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import GROUPS_PATH, TESTS_PATH, load_groups, load_tests
+from .cube import CUBE_PATH, DEFAULT_GROUP_BY, SentimentCube, parse_dimensions, parse_where
+from .online_stats import SentimentTests
+from .report import daily_statistics, summarize
+from .schema import SENTIMENT_ORDER
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8050
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# Query parameters shared by every endpoint; /cube reads the rest as dimension filters
+COMMON_PARAMS = ['start', 'end', 'sentiment']
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class ServiceError(Exception):
+    """A request that cannot be answered; ``status`` is the HTTP status to send."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _plain(value):
+    """JSON-safe copy of ``value``: NaN becomes null, numpy scalars and dates become Python values."""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _records(frame):
+    return _plain(frame.to_dict('records'))
+
+
+def _sentiments(text):
+    labels = [label.strip() for label in text.split(',') if label.strip()]
+    unknown = [label for label in labels if label not in SENTIMENT_ORDER]
+    if unknown:
+        raise ValueError(f"Unknown sentiment(s) {unknown}; choose from {SENTIMENT_ORDER}")
+    return labels
+
+
+def _flag(params, name):
+    return params.get(name, '') in ('1', 'true')
+
+
+def _rows(data):
+    """Row count of a loaded source, None for sources that are not tables."""
+    return len(data) if hasattr(data, '__len__') else None
+
+
+def _date(text, name):
+    try:
+        return pd.Timestamp(text).normalize()
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date like 2024-01-31, got '{text}'")
+
+
+class ResponseCache:
+    """Encoded responses by key; the least recently used entry goes first when full."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class _Source:
+    """A file the service answers from, re-read when its mtime or size changes."""
+
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.stamp = None
+        self.data = None
+
+    def current_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class QueryService:
+    """
+    Routes, cache and hot reload of the query service.
+
+    ``respond`` answers one request target and is independent of the HTTP
+    layer; ``handle`` is the asyncio connection callback.
+    """
+
+    def __init__(self, groups_path=GROUPS_PATH, cube_path=CUBE_PATH, cache_size=DEFAULT_CACHE_SIZE,
+                 reload_interval=DEFAULT_RELOAD_INTERVAL, tests_path=TESTS_PATH):
+        self.sources = {'groups': _Source(groups_path, load_groups)}
+        if tests_path:
+            self.sources['tests'] = _Source(tests_path, load_tests)
+        if cube_path:
+            self.sources['cube'] = _Source(cube_path, SentimentCube.load)
+        self.cache = ResponseCache(cache_size)
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.etag = '"0"'
+        self.routes = {
+            '/overall': self._overall,
+            '/sentiment': self._sentiment,
+            '/tests': self._tests,
+            '/buy-sell': self._buy_sell,
+            '/daily': self._daily,
+            '/cube': self._cube,
+        }
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    async def refresh(self):
+        """Re-read every source whose file changed; True when anything was swapped in."""
+        loop = asyncio.get_running_loop()
+        changed = False
+        for source in self.sources.values():
+            stamp = source.current_stamp()
+            if stamp == source.stamp:
+                continue
+            source.stamp = stamp
+            if stamp is None:
+                print(f"⚠ {source.path} not found; its endpoints answer 503 until it appears")
+                source.data = None
+            else:
+                try:
+                    source.data = await loop.run_in_executor(None, source.loader, source.path)
+                except Exception as e:
+                    # Keep answering from the previous version until the file changes again
+                    print(f"⚠ Could not load {source.path}: {e}")
+                    continue
+                rows = _rows(source.data)
+                print(f"✓ Loaded {source.path}" + ('' if rows is None else f" ({rows:,} rows)"))
+            changed = True
+        if changed:
+            self.reloads += 1
+            self.cache.clear()
+            stamps = repr([source.stamp for source in self.sources.values()]).encode()
+            self.etag = f'"{zlib.crc32(stamps):08x}"'
+        return changed
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.refresh()
+
+    def _data(self, name):
+        source = self.sources.get(name)
+        if source is None or source.data is None:
+            path = source.path if source is not None else 'no cube configured (--cube)'
+            raise ServiceError(503, f'{name} not available: {path}')
+        return source.data
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+    def _filtered_groups(self, params):
+        groups = self._data('groups')
+        keep = np.ones(len(groups), dtype=bool)
+        if params.get('start'):
+            keep &= (groups['date'] >= _date(params['start'], 'start')).to_numpy()
+        if params.get('end'):
+            keep &= (groups['date'] <= _date(params['end'], 'end')).to_numpy()
+        if params.get('sentiment'):
+            keep &= groups['classification'].isin(_sentiments(params['sentiment'])).to_numpy()
+        return groups[keep]
+
+    def _selected(self, params):
+        return _sentiments(params['sentiment']) if params.get('sentiment') else SENTIMENT_ORDER
+
+    def _overall(self, params):
+        groups = self._filtered_groups(params)
+        overall = summarize(groups)
+        dates = [groups['date'].min(), groups['date'].max()] if len(groups) else [None, None]
+        return {**overall, 'losses': overall['count'] - overall['wins'], 'date_range': dates}
+
+    def _sentiment(self, params):
+        groups = self._filtered_groups(params)
+        rows = []
+        for sentiment in self._selected(params):
+            s = summarize(groups[groups['classification'] == sentiment])
+            if s['count'] > 0:
+                rows.append({'classification': sentiment, **s})
+        return rows
+
+    def _tests(self, params):
+        saved = self.sources.get('tests')
+        approximate = any(params.get(name) for name in COMMON_PARAMS) or saved is None or saved.data is None
+        if approximate:
+            tests = SentimentTests.from_groups(self._filtered_groups(params))
+        else:
+            tests = saved.data
+        results = tests.summary(welch=_flag(params, 'welch'), kruskal=_flag(params, 'kruskal'))
+        k, f_stat, p_anova = results['anova']
+        ttest, kruskal = results['ttest'], results['kruskal']
+        return {
+            'ttest': None if ttest is None else {'pair': ['Extreme Fear', 'Extreme Greed'],
+                                                 't': ttest[0], 'p': ttest[1]},
+            'welch': results['welch'],
+            'anova': {'groups': k, 'f': f_stat if k > 1 else None, 'p': p_anova if k > 1 else None},
+            'kruskal': None if kruskal is None or k < 2 else {'h': kruskal[0], 'p': kruskal[1]},
+            'approximate': approximate,
+        }
+
+    def _buy_sell(self, params):
+        groups = self._filtered_groups(params)
+        rows = []
+        for sentiment in self._selected(params):
+            subset = groups[groups['classification'] == sentiment]
+            rows.append({'classification': sentiment, 'buy': summarize(subset[subset['is_buy']]),
+                         'sell': summarize(subset[~subset['is_buy']])})
+        return rows
+
+    def _daily(self, params):
+        return _records(daily_statistics(self._filtered_groups(params)))
+
+    def _cube(self, params):
+        cube = self._data('cube')
+        by = parse_dimensions(params['group_by']) if 'group_by' in params else DEFAULT_GROUP_BY
+        filters = dict(parse_where(f'{dim}={value}') for dim, value in params.items()
+                       if dim not in COMMON_PARAMS and dim != 'group_by')
+        if params.get('start') or params.get('end'):
+            filters['date'] = slice(params.get('start') or None, params.get('end') or None)
+        if params.get('sentiment'):
+            filters['classification'] = _sentiments(params['sentiment'])
+        return _records(cube.query(by, **filters))
+
+    def health(self):
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            'sources': {name: {'path': source.path, 'loaded': source.data is not None,
+                               'rows': _rows(source.data)}
+                        for name, source in self.sources.items()},
+            'reloads': self.reloads,
+            'cache': {'entries': len(self.cache.entries), 'maxsize': self.cache.maxsize,
+                      'hits': self.cache.hits, 'misses': self.cache.misses,
+                      'hit_rate': self.cache.hits / lookups if lookups else None},
+        }
+
+    def respond(self, target):
+        """(status, JSON body) for a GET of ``target``; successful answers are cached."""
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, json.dumps(_plain(self.health())).encode()
+        handler = self.routes.get(url.path)
+        if handler is None:
+            return 404, json.dumps({'error': f'Unknown path {url.path}',
+                                    'paths': sorted(self.routes) + ['/health']}).encode()
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        key = (url.path, tuple(sorted(params.items())))
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                body = json.dumps(_plain(handler(params))).encode()
+            except ServiceError as e:
+                return e.status, json.dumps({'error': str(e)}).encode()
+            except (ValueError, KeyError) as e:
+                return 400, json.dumps({'error': str(e)}).encode()
+            self.cache.put(key, body)
+        return 200, body
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length', '0').isdigit():
+                    await reader.readexactly(int(headers.get('content-length', '0')))
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body, method, keep_alive = 400, b'{"error": "Malformed request line"}', 'GET', False
+                else:
+                    method, target, version = parts
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = (connection == 'keep-alive' if version == 'HTTP/1.0'
+                                  else connection != 'close')
+                    if method not in ('GET', 'HEAD'):
+                        status, body = 405, b'{"error": "Only GET and HEAD are supported"}'
+                    else:
+                        status, body = self.respond(target)
+
+                head = [f'HTTP/1.1 {status} {_REASONS[status]}', 'Content-Type: application/json',
+                        f'Connection: {"keep-alive" if keep_alive else "close"}']
+                if status == 200:
+                    head.append(f'ETag: {self.etag}')
+                    if headers.get('if-none-match') == self.etag:
+                        status, body = 304, b''
+                        head[0] = f'HTTP/1.1 304 {_REASONS[304]}'
+                head.append(f'Content-Length: {len(body)}')
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    await service.refresh()
+    server = await asyncio.start_server(service.handle, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"✓ Serving sentiment aggregates on http://{address[0]}:{address[1]} "
+          f"(cache {service.cache.maxsize} responses, reload check every {service.reload_interval:g}s)")
+    watcher = asyncio.create_task(service.watch())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the saved sentiment aggregates as JSON over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'interface to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--groups', default=GROUPS_PATH,
+                        help=f'group table written by the analysis runs (default: {GROUPS_PATH})')
+    parser.add_argument('--tests', default=TESTS_PATH,
+                        help=f'test accumulators served by unfiltered /tests (default: {TESTS_PATH})')
+    parser.add_argument('--cube', default=CUBE_PATH,
+                        help=f'cube served by /cube, written by --cube runs (default: {CUBE_PATH})')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f'responses kept in the LRU cache (default: {DEFAULT_CACHE_SIZE})')
+    parser.add_argument('--reload-interval', type=float, default=DEFAULT_RELOAD_INTERVAL,
+                        help=f'seconds between checks for new results (default: {DEFAULT_RELOAD_INTERVAL:g})')
+    args = parser.parse_args(argv)
+
+    service = QueryService(args.groups, args.cube, args.cache_size, args.reload_interval, args.tests)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"✗ ERROR starting the service: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Memory-mapped columnar store of the cleaned, sentiment-joined trades.
+
+``--ingest`` writes the merged frame to ``<store_dir>/`` as one ``.npy``
+file per column, with rows sorted by ``date``:
+
+- numeric, boolean and datetime columns are stored as-is (datetimes as
+  int64 in their own unit);
+- text and categorical columns are dictionary-encoded: the smallest
+  integer codes that fit, plus the labels as one UTF-8 buffer with int64
+  offsets (Arrow's string layout, so pyarrow wraps them without copying).
+
+``days.npy`` and ``offsets.npy`` index the calendar days: the trades of
+``days[i]`` are rows ``offsets[i]:offsets[i + 1]``, so a date range is one
+contiguous slice. :class:`TradeStore` maps the files read-only
+(``np.load(mmap_mode='r')``) and builds frames over slices of the maps
+without copying, so opening the full history costs a few milliseconds and
+a date range only pages in its own rows. Pandas copies a column on the
+first write, so the files are never modified by an analysis.
+
+``manifest.json`` records the columns, the PnL column and the cache key of
+the inputs and cleaning parameters, so stale stores can be detected.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .cache import HAS_PYARROW
+
+DEFAULT_STORE_DIR = 'outputs/trade_store'
+STORE_VERSION = 1
+MANIFEST = 'manifest.json'
+DAYS_FILE = 'days.npy'
+OFFSETS_FILE = 'offsets.npy'
+
+
+def _code_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_labels(labels):
+    """(offsets, UTF-8 bytes) of string labels in Arrow's large_string layout."""
+    if HAS_PYARROW:
+        import pyarrow as pa
+        array = pa.array(pd.Series(labels, dtype=str), type=pa.large_string())
+        _, offsets, data = array.buffers()
+        offsets = np.frombuffer(offsets, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+        data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+        return offsets - offsets[0], data[offsets[0]:offsets[-1]]
+    encoded = [str(label).encode('utf-8') for label in labels]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(label) for label in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _decode_labels(offsets, data):
+    if HAS_PYARROW:
+        import pyarrow as pa
+        labels = pa.Array.from_buffers(pa.large_string(), len(offsets) - 1,
+                                       [None, pa.py_buffer(offsets), pa.py_buffer(data)])
+        return pd.Index(pd.array(labels, dtype=pd.StringDtype('pyarrow', na_value=np.nan)))
+    raw = bytes(data)
+    return pd.Index([raw[lo:hi].decode('utf-8') for lo, hi in zip(offsets[:-1].tolist(), offsets[1:].tolist())],
+                    dtype=str)
+
+
+def _encode_column(values):
+    """(data, (label offsets, label bytes) or None, manifest entry) of one column."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        raise ValueError(f"Column '{values.name}' is timezone-aware; store wall-clock times instead")
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return values.to_numpy().view(np.int64), None, {'kind': 'datetime', 'dtype': str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    elif pd.api.types.is_numeric_dtype(dtype):
+        data = values.to_numpy()
+        if data.dtype == object:
+            # Nullable integer/boolean columns with missing values
+            data = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return data, None, {'kind': 'array', 'dtype': str(data.dtype)}
+    else:
+        codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(_code_dtype(len(labels))), _encode_labels(labels), {'kind': 'category'}
+
+
+def write_store(merged, directory=DEFAULT_STORE_DIR, meta=None):
+    """
+    Write ``merged`` to a store in ``directory`` and return the row count.
+
+    Files go to a temporary directory that is renamed into place, so an
+    open store is never seen half-written.
+    """
+    order = None
+    if not merged['date'].is_monotonic_increasing:
+        order = np.argsort(merged['date'].to_numpy(), kind='stable')
+    tmp_dir = directory.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(merged.columns):
+        data, labels, entry = _encode_column(merged[name])
+        if order is not None:
+            data = data[order]
+        entry = {'name': name, 'file': f'col-{i:03d}.npy', **entry}
+        np.save(os.path.join(tmp_dir, entry['file']), np.ascontiguousarray(data))
+        if labels is not None:
+            entry['label_offsets'] = f'col-{i:03d}.offsets.npy'
+            entry['labels'] = f'col-{i:03d}.labels.npy'
+            for file, array in zip((entry['label_offsets'], entry['labels']), labels):
+                np.save(os.path.join(tmp_dir, file), array)
+        columns.append(entry)
+
+    day = merged['date'].to_numpy().astype('datetime64[D]')
+    if order is not None:
+        day = day[order]
+    days, starts = np.unique(day, return_index=True)
+    np.save(os.path.join(tmp_dir, DAYS_FILE), days.astype(np.int64))
+    np.save(os.path.join(tmp_dir, OFFSETS_FILE), np.append(starts, len(day)).astype(np.int64))
+
+    manifest = {'version': STORE_VERSION, 'rows': len(merged), 'columns': columns, **(meta or {})}
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as fh:
+        json.dump(manifest, fh, indent=2, default=str)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp_dir, directory)
+    return len(merged)
+
+
+class TradeStore:
+    """Read-only memory maps of a store written by :func:`write_store`."""
+
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        with open(os.path.join(directory, MANIFEST)) as fh:
+            self.manifest = json.load(fh)
+        if self.manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Store version {self.manifest.get('version')} is not supported; rerun --ingest")
+        self.directory = directory
+        self.entries = {entry['name']: entry for entry in self.manifest['columns']}
+        self.days = np.load(os.path.join(directory, DAYS_FILE), mmap_mode='r')
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+        self._maps = {}
+        self._dtypes = {}
+
+    @staticmethod
+    def exists(directory=DEFAULT_STORE_DIR):
+        return os.path.exists(os.path.join(directory, MANIFEST))
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    @property
+    def columns(self):
+        return list(self.entries)
+
+    @property
+    def date_range(self):
+        if not len(self.days):
+            return None, None
+        return tuple(pd.Timestamp(np.datetime64(int(day), 'D')) for day in (self.days[0], self.days[-1]))
+
+    def _map(self, file):
+        return np.load(os.path.join(self.directory, file), mmap_mode='r')
+
+    def array(self, name):
+        """The whole column as a read-only memory map (codes for categorical columns)."""
+        if name not in self._maps:
+            if name not in self.entries:
+                raise KeyError(f"Column '{name}' not in store; available: {self.columns}")
+            self._maps[name] = self._map(self.entries[name]['file'])
+        return self._maps[name]
+
+    def dtype(self, name):
+        """CategoricalDtype of a dictionary-encoded column, built once."""
+        if name not in self._dtypes:
+            entry = self.entries[name]
+            labels = _decode_labels(self._map(entry['label_offsets']), self._map(entry['labels']))
+            self._dtypes[name] = pd.CategoricalDtype(labels)
+        return self._dtypes[name]
+
+    def rows(self, start=None, end=None):
+        """(lo, hi) row slice of the trades dated ``start`` to ``end``, both inclusive."""
+        lo = 0 if start is None else self.offsets[
+            np.searchsorted(self.days, np.datetime64(pd.Timestamp(start).date(), 'D').astype(np.int64))]
+        hi = len(self) if end is None else self.offsets[
+            np.searchsorted(self.days, np.datetime64(pd.Timestamp(end).date(), 'D').astype(np.int64),
+                            side='right')]
+        return int(lo), int(max(lo, hi))
+
+    def column(self, name, lo=0, hi=None):
+        values = self.array(name)[lo:hi]
+        entry = self.entries[name]
+        if entry['kind'] == 'datetime':
+            return values.view(entry['dtype'])
+        if entry['kind'] == 'category':
+            return pd.Categorical.from_codes(values, dtype=self.dtype(name), validate=False)
+        return values
+
+    def frame(self, columns=None, start=None, end=None):
+        """
+        DataFrame over the memory maps of ``columns`` (all when None) for the
+        trades dated ``start`` to ``end``; no column data is copied.
+        """
+        columns = self.columns if columns is None else [col for col in columns if col in self.entries]
+        lo, hi = self.rows(start, end)
+        return pd.DataFrame({name: self.column(name, lo, hi) for name in columns}, copy=False)
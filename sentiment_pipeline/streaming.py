@@ -0,0 +1,321 @@
+"""
+Chunked streaming ingestion of the Hyperliquid trade export.
+
+The trade file is read twice in chunks with an explicit dtype schema:
+
+1. The first pass deduplicates on ``Transaction Hash`` digests (keep-first
+   across chunks, see :mod:`.dedup`) and collects the surviving PnL
+   values, which is all the exact 1st/99th percentile trim needs.
+2. The second pass re-applies the dedup mask, trims outliers, joins the
+   daily sentiment and folds every chunk into per-(date, classification,
+   direction) sums.
+
+The memory ceiling bounds the parsing working set and the in-RAM part of
+the digest index (8 or 16 bytes per distinct hash, spilled to disk beyond
+a quarter of the ceiling). It is not a ceiling for the whole run in exact
+mode: a one-byte keep mask per row and one float64 per kept trade outlive
+every chunk, and concatenating and sorting them for the percentiles peaks
+at about EXACT_PEAK_BYTES_PER_ROW per row, so memory grows with the file.
+Sketch mode replaces the float64s with fixed-size t-digests and keeps
+only the keep mask: about 1 MB per million rows beyond the ceiling.
+"""
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from .dedup import DEFAULT_DIGEST_BITS, HashIndex, hash_digests
+from .join import SentimentLookup
+from .online_stats import SentimentTests
+from .quantile_sketch import DEFAULT_COMPRESSION, TDigest
+from .schema import DIRECTION_COL, HASH_COL, PNL_COL, TIMESTAMP_COL, TRADE_SCHEMA
+
+DEFAULT_MEMORY_LIMIT_MB = 512
+
+# Approximate parsed footprint of one row of TRADE_SCHEMA, hash string included
+ROW_BYTES_ESTIMATE = 256
+
+# Peak exact-mode bytes per row: the keep mask plus two float64 copies of the PnL column
+EXACT_PEAK_BYTES_PER_ROW = 17
+
+# Fold partial aggregates together once this many chunks have accumulated
+_COMPACT_EVERY = 64
+
+# Share of the memory ceiling the dedup index may keep in RAM before spilling
+_INDEX_FRACTION = 4
+
+GROUP_KEYS = ['date', 'classification', 'is_buy']
+
+
+def rows_per_chunk(memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """Translate a memory ceiling in MB into a read_csv chunk size."""
+    return max(10_000, int(memory_limit_mb * 2**20 // ROW_BYTES_ESTIMATE))
+
+
+def read_trade_chunks(path, chunk_rows, columns=None, offset=0):
+    """
+    Yield DataFrame chunks of the trade export using TRADE_SCHEMA dtypes.
+
+    A non-zero ``offset`` must be the byte position of a row start; parsing
+    begins there, with the column names taken from the header line.
+    """
+    columns = list(TRADE_SCHEMA) if columns is None else columns
+    dtypes = {col: TRADE_SCHEMA[col] for col in columns}
+    if not offset:
+        return pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+    return _read_chunks_from(path, offset, columns, dtypes, chunk_rows)
+
+
+def _read_chunks_from(path, offset, columns, dtypes, chunk_rows):
+    with open(path, 'rb') as fh:
+        names = next(csv.reader([fh.readline().decode('utf-8').rstrip('\r\n')]))
+        fh.seek(offset)
+        yield from pd.read_csv(fh, header=None, names=names, usecols=columns, dtype=dtypes,
+                               chunksize=chunk_rows)
+
+
+def exact_memory_mb(path, sample_bytes=1 << 20):
+    """Projected peak MB of the exact-mode PnL arrays, from the row length of the file's first MB."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fh:
+        fh.readline()
+        sample = fh.read(sample_bytes)
+    rows = sample.count(b'\n')
+    if not rows:
+        return 0.0
+    return size * rows / len(sample) * EXACT_PEAK_BYTES_PER_ROW / 2**20
+
+
+def index_memory_mb(memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """RAM the dedup HashIndex of a chunked run may use before it spills to disk."""
+    return max(1, memory_limit_mb // _INDEX_FRACTION)
+
+
+def _first_pass(path, chunk_rows, seen, digest=None):
+    """
+    Build the keep-first dedup mask and summarize PnL of deduplicated rows.
+
+    PnL values are collected for exact percentiles, or folded into
+    ``digest`` (and not kept) when one is given.
+    """
+    keep_masks, pnl_parts = [], []
+    missing = 0
+    for chunk in read_trade_chunks(path, chunk_rows, [PNL_COL, HASH_COL]):
+        keep = seen.first_seen(hash_digests(chunk[HASH_COL], seen.bits))
+        keep_masks.append(keep)
+        pnl = chunk[PNL_COL].to_numpy()[keep]
+        present = ~np.isnan(pnl)
+        missing += int((~present).sum())
+        if digest is None:
+            pnl_parts.append(pnl[present])
+        else:
+            digest.update(pnl[present])
+    keep_mask = np.concatenate(keep_masks) if keep_masks else np.empty(0, dtype=bool)
+    pnl = np.concatenate(pnl_parts) if pnl_parts else np.empty(0)
+    return keep_mask, pnl, missing
+
+
+def aggregate_trades(day, cls_code, is_buy, pnl):
+    """Reduce trades to one row per (day, cls, is_buy) of additive PnL sums."""
+    frame = pd.DataFrame({
+        'day': day,
+        'cls': cls_code,
+        'is_buy': is_buy,
+        'pnl': pnl,
+        'pnl_sq': pnl * pnl,
+        'win': pnl > 0,
+    })
+    return frame.groupby(['day', 'cls', 'is_buy'], sort=False).agg(
+        count=('pnl', 'size'),
+        wins=('win', 'sum'),
+        pnl_sum=('pnl', 'sum'),
+        pnl_sumsq=('pnl_sq', 'sum'),
+        pnl_min=('pnl', 'min'),
+        pnl_max=('pnl', 'max'),
+    )
+
+
+def combine_groups(parts):
+    """Merge partial group aggregates that share the same index."""
+    stacked = pd.concat(parts)
+    return stacked.groupby(level=list(range(stacked.index.nlevels))).agg({
+        'count': 'sum',
+        'wins': 'sum',
+        'pnl_sum': 'sum',
+        'pnl_sumsq': 'sum',
+        'pnl_min': 'min',
+        'pnl_max': 'max',
+    })
+
+
+def label_groups(combined, categories):
+    """Turn a (day, cls, is_buy)-indexed aggregate into the public group table."""
+    groups = combined.reset_index()
+    groups.insert(0, 'date', pd.to_datetime(groups.pop('day').to_numpy().astype('datetime64[D]')))
+    groups.insert(1, 'classification', categories[groups.pop('cls').to_numpy()])
+    return groups.sort_values(GROUP_KEYS, ignore_index=True)
+
+
+def pending_frame(timestamps, is_buy, pnl):
+    """Cleaned trades held back until their day's sentiment is available."""
+    return pd.DataFrame({TIMESTAMP_COL: timestamps, 'is_buy': is_buy, 'pnl': pnl})
+
+
+def join_and_aggregate(lookup, timestamps, is_buy, pnl, tests=None):
+    """
+    Join cleaned trades to their day's sentiment and aggregate them.
+
+    Returns the (day, cls, is_buy) aggregate of the matched trades, the
+    matched mask, and a mask of unmatched trades dated after the last
+    Fear & Greed row (sentiment not published yet; never set in as-of
+    mode). Matched trades are also folded into the ``tests`` accumulator
+    when one is given.
+    """
+    day = lookup.days_of(timestamps)
+    codes = lookup.codes_for(day)
+    matched = codes >= 0
+    if lookup.last_day is None:
+        later = np.zeros(len(day), dtype=bool)
+    else:
+        later = ~matched & (day > lookup.last_day)
+    codes = codes[matched]
+    agg = aggregate_trades(day[matched], codes, is_buy[matched], pnl[matched])
+    if tests is not None:
+        tests.update(codes, lookup.categories, pnl[matched])
+    return agg, matched, later
+
+
+def advance_watermark(watermark, watermark_rows, timestamps):
+    """(newest Timestamp, rows read at it) after also reading ``timestamps``."""
+    if not len(timestamps):
+        return watermark, watermark_rows
+    newest = int(timestamps.max())
+    at_newest = int((timestamps == newest).sum())
+    if watermark is None or newest > watermark:
+        return newest, at_newest
+    if newest == watermark:
+        return watermark, watermark_rows + at_newest
+    return watermark, watermark_rows
+
+
+def rank_bounds(lo, hi):
+    """Kruskal-Wallis rank bin range for trimmed PnL, None when there is no data."""
+    return (lo, hi) if np.isfinite(lo) and np.isfinite(hi) else None
+
+
+class StreamResult:
+    """Aggregates and bookkeeping produced by :func:`stream_analysis`."""
+
+    def __init__(self, groups, median, rows_read, duplicates, missing_pnl,
+                 outliers, unmatched, bounds, seen=None, watermark=None, pending=None,
+                 digest=None, tests=None, watermark_rows=0, reread=0, stale=0):
+        self.groups = groups
+        self.median = median
+        self.rows_read = rows_read
+        self.duplicates = duplicates
+        self.missing_pnl = missing_pnl
+        self.outliers = outliers
+        self.unmatched = unmatched
+        self.bounds = bounds
+        # Per-classification accumulators for ANALYSIS 4
+        self.tests = tests
+        # State needed to continue the run incrementally
+        self.seen = seen
+        self.watermark = watermark
+        # Rows read with Timestamp == watermark, and those an update skipped as already read
+        self.watermark_rows = watermark_rows
+        self.reread = reread
+        # Rows an update skipped because they are older than the watermark
+        self.stale = stale
+        self.pending = pending
+        self.digest = digest
+
+
+def stream_analysis(path, fear_greed, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                    sketch_compression=None, track_digest=False, tz=None, as_of=False,
+                    hash_bits=DEFAULT_DIGEST_BITS):
+    """
+    Run dedup, outlier trim, sentiment join and aggregation chunk by chunk.
+
+    Returns a StreamResult whose ``groups`` frame has one row per
+    (date, classification, is_buy) with count, wins, pnl_sum, pnl_sumsq,
+    pnl_min and pnl_max, i.e. everything ANALYSIS 1-6 needs except the
+    median, which is computed from the retained PnL column. Trades dated
+    after the last Fear & Greed row are returned as ``pending`` so an
+    incremental run can join them once their sentiment is published.
+
+    With ``sketch_compression`` set, the trim bounds and the median come
+    from t-digests instead of retained PnL arrays, so no per-trade PnL
+    outlives a chunk. ``track_digest`` returns the digest of the analyzed
+    PnL as ``digest`` even in exact mode. ``tz`` and ``as_of`` configure
+    the sentiment join (see :mod:`.join`). ``tests`` holds per-classification
+    moments and rank bins over the trim bounds for the significance tests.
+    ``seen`` is the HashIndex of the kept ``hash_bits`` digests.
+    """
+    chunk_rows = rows_per_chunk(memory_limit_mb)
+
+    seen = HashIndex(hash_bits, index_memory_mb(memory_limit_mb))
+    exact = sketch_compression is None
+    bounds_digest = None if exact else TDigest(sketch_compression)
+    keep_mask, deduped_pnl, missing_pnl = _first_pass(path, chunk_rows, seen, bounds_digest)
+    rows_read = len(keep_mask)
+    duplicates = rows_read - int(keep_mask.sum())
+    if not exact:
+        q1, q99 = bounds_digest.quantile([0.01, 0.99])
+    elif len(deduped_pnl):
+        q1, q99 = np.quantile(deduped_pnl, [0.01, 0.99])
+    else:
+        q1 = q99 = np.nan
+    del deduped_pnl
+    digest = TDigest(sketch_compression or DEFAULT_COMPRESSION) if track_digest or not exact else None
+
+    lookup = SentimentLookup(fear_greed, tz, as_of)
+    tests = SentimentTests(rank_bounds(q1, q99))
+
+    parts, merged_pnl, pending = [], [], []
+    outliers = unmatched = 0
+    watermark, watermark_rows = None, 0
+    offset = 0
+    columns = [TIMESTAMP_COL, DIRECTION_COL, PNL_COL]
+    for chunk in read_trade_chunks(path, chunk_rows, columns):
+        keep = keep_mask[offset:offset + len(chunk)]
+        offset += len(chunk)
+
+        timestamps = chunk[TIMESTAMP_COL].to_numpy()
+        watermark, watermark_rows = advance_watermark(watermark, watermark_rows, timestamps)
+
+        pnl = chunk[PNL_COL].to_numpy()
+        keep = keep & ~np.isnan(pnl)
+        in_range = (pnl >= q1) & (pnl <= q99)
+        outliers += int((keep & ~in_range).sum())
+        keep &= in_range
+
+        timestamps, pnl = timestamps[keep], pnl[keep]
+        is_buy = (chunk[DIRECTION_COL] == 'Buy').to_numpy()[keep]
+        agg, matched, later = join_and_aggregate(lookup, timestamps, is_buy, pnl, tests)
+        unmatched += int((~matched).sum())
+        if later.any():
+            pending.append(pending_frame(timestamps[later], is_buy[later], pnl[later]))
+        parts.append(agg)
+        if exact:
+            merged_pnl.append(pnl[matched])
+        if digest is not None:
+            digest.update(pnl[matched])
+        if len(parts) >= _COMPACT_EVERY:
+            parts = [combine_groups(parts)]
+
+    if exact:
+        merged_pnl = np.concatenate(merged_pnl) if merged_pnl else np.empty(0)
+        median = float(np.median(merged_pnl)) if len(merged_pnl) else np.nan
+        del merged_pnl
+    else:
+        median = digest.quantile(0.5)
+
+    groups = label_groups(combine_groups(parts), lookup.categories)
+    pending = pd.concat(pending, ignore_index=True) if pending else None
+
+    return StreamResult(groups, median, rows_read, duplicates, missing_pnl,
+                        outliers, unmatched, (q1, q99), seen, watermark, pending, digest, tests,
+                        watermark_rows)
@@ -0,0 +1,50 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sentiment_pipeline import benchmark, pipeline  # noqa: E402
+
+FEAR_GREED = os.path.join(ROOT, 'data', 'fear_greed_index.csv')
+ROWS = 20_000
+
+
+@pytest.fixture(scope='session')
+def trades_csv(tmp_path_factory):
+    """A small synthetic export, sorted by date like the real one."""
+    path = tmp_path_factory.mktemp('export') / 'historical_data.csv'
+    return str(benchmark.generate(str(path), ROWS, fear_greed_path=FEAR_GREED, chunk_rows=5_000))
+
+
+@pytest.fixture(scope='session')
+def shuffled_csv(trades_csv, tmp_path_factory):
+    """The same trades in random row order."""
+    path = tmp_path_factory.mktemp('shuffled') / 'historical_data.csv'
+    trades = pd.read_csv(trades_csv, low_memory=False)
+    trades.sample(frac=1, random_state=np.random.default_rng(1)).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def merged(trades_csv):
+    """Cleaned, sentiment-joined trades and their PnL column."""
+    fear_greed, trades = pipeline.load(FEAR_GREED, trades_csv)
+    cleaned = pipeline.clean(trades)
+    return pipeline.join(cleaned.trades, fear_greed), cleaned.pnl_col
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch, trades_csv):
+    """Run the CLI in a fresh directory laid out like the repo."""
+    os.makedirs(tmp_path / 'data')
+    os.makedirs(tmp_path / 'outputs')
+    shutil.copy(FEAR_GREED, tmp_path / 'data' / 'fear_greed_index.csv')
+    shutil.copy(trades_csv, tmp_path / 'data' / 'historical_data.csv')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
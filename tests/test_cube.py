@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentiment_pipeline.cube import SentimentCube, build_cube, parse_where
+from sentiment_pipeline.schema import COIN_COL, DIRECTION_COL
+
+
+@pytest.fixture(scope='module')
+def trades(merged):
+    frame, pnl_col = merged
+    return frame.assign(hour=frame['datetime'].dt.hour, day_of_week=frame['date'].dt.day_name(),
+                        pnl=frame[pnl_col], win=frame[pnl_col] > 0,
+                        direction=frame[DIRECTION_COL], coin=frame[COIN_COL])
+
+
+@pytest.fixture(scope='module')
+def cube(merged):
+    frame, pnl_col = merged
+    return build_cube(frame, pnl_col)
+
+
+def _groupby(trades, by):
+    grouped = trades.groupby(by, observed=True)
+    expected = pd.DataFrame({
+        'count': grouped.size(),
+        'wins': grouped['win'].sum(),
+        'pnl_sum': grouped['pnl'].sum(),
+        'pnl_mean': grouped['pnl'].mean(),
+        'pnl_std': grouped['pnl'].std(),
+    })
+    return expected.sort_index()
+
+
+def _assert_rollup_equal(result, expected, by):
+    result = result.astype({dim: object for dim in by if dim not in ('date', 'hour')})
+    result = result.set_index(by).sort_index()
+    assert result.index.tolist() == expected.index.tolist()
+    np.testing.assert_array_equal(result['count'], expected['count'])
+    np.testing.assert_array_equal(result['wins'], expected['wins'])
+    for col in ['pnl_sum', 'pnl_mean', 'pnl_std']:
+        np.testing.assert_allclose(result[col], expected[col], rtol=1e-7, atol=1e-6, err_msg=col)
+
+
+@pytest.mark.parametrize('by', [
+    ['classification'],
+    ['classification', 'direction'],
+    ['date'],
+    ['hour', 'day_of_week'],
+    ['coin', 'classification', 'hour'],
+])
+def test_rollup_matches_groupby(trades, cube, by):
+    _assert_rollup_equal(cube.query(by), _groupby(trades, by), by)
+
+
+def test_filtered_rollup_matches_groupby(trades, cube):
+    coins = trades['coin'].value_counts().index[:2].tolist()
+    start, end = trades['date'].quantile([0.25, 0.75]).tolist()
+    filters = dict([parse_where(f'coin={",".join(coins)}'), parse_where('hour=14:15'),
+                    ('date', slice(start, end))])
+    subset = trades[trades['coin'].isin(coins) & trades['hour'].between(14, 15)
+                    & trades['date'].between(start, end)]
+    by = ['classification', 'direction']
+    _assert_rollup_equal(cube.query(by, **filters), _groupby(subset, by), by)
+
+
+def test_grand_total_and_unknown_label(trades, cube):
+    total = cube.query([])
+    assert total['count'].tolist() == [len(trades)]
+    assert total['pnl_sum'].iloc[0] == pytest.approx(trades['pnl'].sum())
+    assert cube.query(['classification'], coin='NO-SUCH-COIN').empty
+
+
+@pytest.mark.parametrize('suffix', ['parquet', 'csv'])
+def test_save_and_load(tmp_path, cube, suffix):
+    loaded = SentimentCube.load(cube.save(str(tmp_path / f'cube.{suffix}')))
+    by = ['classification', 'day_of_week', 'coin']
+    pd.testing.assert_frame_equal(loaded.query(by), cube.query(by))
@@ -0,0 +1,100 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentiment_pipeline import dedup
+from sentiment_pipeline.dedup import INDEX_FILE, HashIndex, first_occurrence, hash_digests
+
+
+def _batches(seed, n_batches=20, size=5_000, pool=60_000):
+    """Random digests with repeats within and across batches."""
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, 2**63, pool, dtype=np.uint64)
+    return [keys[rng.integers(0, pool, size)] for _ in range(n_batches)]
+
+
+def _expected(batches, seen):
+    masks = []
+    for batch in batches:
+        keep = np.zeros(len(batch), dtype=bool)
+        for i, key in enumerate(batch.tolist()):
+            if key not in seen:
+                seen.add(key)
+                keep[i] = True
+        masks.append(keep)
+    return masks
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Exercise the block-by-block merge of spilled runs
+    monkeypatch.setattr(dedup, '_MERGE_BLOCK', 1000)
+
+
+def test_spilled_index_matches_a_set(tmp_path, small_blocks):
+    batches = _batches(0)
+    index = HashIndex(memory_limit_mb=0.05, directory=str(tmp_path / 'spill'))
+    for batch, expected in zip(batches, _expected(batches, set())):
+        np.testing.assert_array_equal(index.first_seen(batch), expected)
+    assert index.spilled
+    assert len(index) == len(np.unique(np.concatenate(batches)))
+    assert len(index.runs) <= np.log2(len(index)) + 1
+
+
+def test_save_and_reopen(tmp_path, small_blocks):
+    first, second = _batches(1)[:10], _batches(1)[10:]
+    seen = set()
+    index = HashIndex(memory_limit_mb=0.05)
+    for batch in first:
+        index.first_seen(batch)
+    _expected(first, seen)
+    directory = str(tmp_path / 'index')
+    index.save(directory)
+    assert HashIndex.exists(directory)
+
+    reopened = HashIndex.open(directory, memory_limit_mb=0.05)
+    assert len(reopened) == len(seen)
+    assert reopened.contains(np.fromiter(seen, dtype=np.uint64)).all()
+    for batch, expected in zip(second, _expected(second, seen)):
+        np.testing.assert_array_equal(reopened.first_seen(batch), expected)
+    reopened.save()
+
+    with open(os.path.join(directory, INDEX_FILE)) as fh:
+        runs = json.load(fh)['runs']
+    # Runs merged away since the first save are removed
+    assert sorted(os.path.basename(p) for p in glob.glob(os.path.join(directory, 'run-*.npy'))) == sorted(runs)
+    assert len(HashIndex.open(directory)) == len(seen)
+
+
+def test_unsaved_updates_leave_the_saved_index_intact(tmp_path):
+    batches = _batches(2, n_batches=4)
+    directory = str(tmp_path / 'index')
+    index = HashIndex(memory_limit_mb=0.01)
+    index.first_seen(batches[0])
+    index.save(directory)
+    saved = len(index)
+
+    reopened = HashIndex.open(directory, memory_limit_mb=0.01)
+    for batch in batches[1:]:
+        reopened.first_seen(batch)
+    # An interrupted run never saves; the next one sees the old index
+    assert len(HashIndex.open(directory)) == saved
+
+
+@pytest.mark.parametrize('bits', [64, 128])
+def test_digests_dedup_like_the_strings(bits):
+    rng = np.random.default_rng(3)
+    hashes = np.array([f'0x{value:064x}' for value in rng.integers(0, 500, 2_000)] + ['abc', 'abc', None] * 3,
+                      dtype=object)
+    digests = hash_digests(pd.Series(hashes, dtype=object), bits)
+    expected = ~pd.Series(hashes).duplicated(keep='first').to_numpy()
+    np.testing.assert_array_equal(first_occurrence(digests), expected)
+    index = HashIndex(bits)
+    np.testing.assert_array_equal(index.first_seen(digests), expected)
+    # Arrow-backed strings take the buffer fast path and must agree
+    text = pd.Series(hashes[:2_000], dtype='string[pyarrow]')
+    np.testing.assert_array_equal(hash_digests(text, bits), digests[:2_000])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FEAR_GREED
+from sentiment_pipeline.features import LAGS, ROLLING_WINDOWS, SentimentFeatures, lag, rolling_mean
+
+
+@pytest.mark.parametrize('window', [1, 7, 30])
+def test_rolling_mean_matches_pandas(window):
+    values = np.random.default_rng(0).normal(50, 20, 500)
+    values[np.random.default_rng(1).random(500) < 0.2] = np.nan
+    expected = pd.Series(values).rolling(window, min_periods=1).mean().to_numpy(copy=True)
+    expected[:window - 1] = np.nan
+    np.testing.assert_allclose(rolling_mean(values, window), expected, atol=1e-9)
+
+
+def test_rolling_mean_short_series():
+    assert np.isnan(rolling_mean(np.arange(3.0), 7)).all()
+
+
+def test_lag_matches_shift():
+    values = np.arange(10.0)
+    np.testing.assert_array_equal(lag(values, 3), pd.Series(values).shift(3).to_numpy())
+    assert np.isnan(lag(values, 20)).all()
+
+
+def test_features_match_pandas_on_the_index():
+    fear_greed = pd.read_csv(FEAR_GREED)
+    features = SentimentFeatures(fear_greed)
+
+    daily = fear_greed.assign(date=pd.to_datetime(fear_greed['date'])).set_index('date')
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max()))
+    value = daily['value'].astype(np.float64)
+    expected = {f'value_lag{n}': value.shift(n) for n in LAGS}
+    expected['value_delta'] = value.diff()
+    for window in ROLLING_WINDOWS:
+        expected[f'value_ma{window}'] = value.rolling(window, min_periods=1).mean().where(
+            np.arange(len(value)) >= window - 1)
+    published = daily['classification'].dropna()
+    expected['regime_change'] = (published != published.shift()).astype(np.float64).where(
+        published.shift().notna()).reindex(daily.index)
+
+    result = features.for_days(daily.index.to_numpy().astype('datetime64[D]').astype(np.int64))
+    for name, values in expected.items():
+        np.testing.assert_allclose(result[name], values.to_numpy(), rtol=1e-6, err_msg=name)
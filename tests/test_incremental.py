@@ -0,0 +1,122 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import FEAR_GREED
+from sentiment_pipeline import incremental
+
+
+@pytest.fixture(scope='module')
+def fear_greed():
+    return pd.read_csv(FEAR_GREED)
+
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return str(tmp_path / 'incremental')
+
+
+def test_update_with_the_same_file_adds_nothing(trades_csv, fear_greed, state_dir):
+    first = incremental.update(trades_csv, fear_greed, state_dir, memory_limit_mb=1)
+    assert incremental.has_state(state_dir)
+    again = incremental.update(trades_csv, fear_greed, state_dir, memory_limit_mb=1)
+    pd.testing.assert_frame_equal(again.groups, first.groups, check_dtype=False)
+    assert again.watermark == first.watermark
+    # The unchanged file is resumed at its end, so nothing is parsed again
+    assert (again.rows_read, again.duplicates, again.reread, again.stale) == (0, 0, 0, 0)
+    # The significance tests come back from tests.json, rank bins included
+    assert again.tests.anova() == pytest.approx(first.tests.anova())
+    assert again.tests.kruskal() == pytest.approx(first.tests.kruskal())
+
+
+def test_stale_state_is_rebuilt(trades_csv, fear_greed, state_dir):
+    fresh = incremental.update(trades_csv, fear_greed, state_dir, memory_limit_mb=1)
+    state_path = os.path.join(state_dir, incremental.STATE_FILE)
+    with open(state_path) as fh:
+        state = json.load(fh)
+    with open(state_path, 'w') as fh:
+        json.dump({**state, 'version': incremental.STATE_VERSION - 1}, fh)
+    # Stale groups must not leak into the rebuilt state
+    gen_dir = incremental._generation_dir(state_dir, state['generation'])
+    pd.DataFrame({'date': []}).to_csv(os.path.join(gen_dir, incremental.GROUPS_FILE), index=False)
+    assert not incremental.has_state(state_dir)
+
+    rebuilt = incremental.update(trades_csv, fear_greed, state_dir, memory_limit_mb=1)
+    assert rebuilt.rows_read == fresh.rows_read
+    pd.testing.assert_frame_equal(rebuilt.groups, fresh.groups)
+    assert incremental.state_version(state_dir) == incremental.STATE_VERSION
+
+
+def test_interrupted_save_keeps_the_previous_state(trades_csv, fear_greed, state_dir, tmp_path, monkeypatch):
+    trades = pd.read_csv(trades_csv)
+    n = len(trades) // 2
+    path = tmp_path / 'daily.csv'
+    trades.iloc[:n].to_csv(path, index=False)
+    first = incremental.update(str(path), fear_greed, state_dir, memory_limit_mb=1)
+    trades.iloc[n:].to_csv(path, mode='a', header=False, index=False)
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    # The hash index is the last file written before state.json is replaced
+    with monkeypatch.context() as patch:
+        patch.setattr(incremental.HashIndex, 'save', fail)
+        with pytest.raises(OSError):
+            incremental.update(str(path), fear_greed, state_dir, memory_limit_mb=1)
+    assert incremental.has_state(state_dir)
+
+    retried = incremental.update(str(path), fear_greed, state_dir, memory_limit_mb=1)
+    assert (retried.rows_read, retried.stale) == (len(trades) - n, 0)
+    # The hashes indexed by the failed run were not persisted, so they are not duplicates now
+    assert retried.duplicates == trades['Transaction Hash'].duplicated().iloc[n:].sum()
+    assert retried.groups['count'].sum() > first.groups['count'].sum()
+    assert sorted(os.listdir(state_dir)) == ['gen-000002', incremental.STATE_FILE]
+
+
+def test_rows_at_the_watermark(trades_csv, fear_greed, state_dir, tmp_path):
+    trades = pd.read_csv(trades_csv)
+    n = len(trades) // 2
+    ts, hashes = trades.columns.get_loc('Timestamp'), trades.columns.get_loc('Transaction Hash')
+    # Four rows share the watermark: two in the first file, one new trade and one duplicate after it
+    trades.iloc[n - 2:n + 2, ts] = trades.iloc[n - 1, ts]
+    trades.iloc[n + 1, hashes] = trades.iloc[n - 1, hashes]
+    first_path, full_path = tmp_path / 'first.csv', tmp_path / 'full.csv'
+    trades.iloc[:n].to_csv(first_path, index=False)
+    trades.to_csv(full_path, index=False)
+
+    first = incremental.update(str(first_path), fear_greed, state_dir, memory_limit_mb=1)
+    assert first.watermark_rows == 2
+    result = incremental.update(str(full_path), fear_greed, state_dir, memory_limit_mb=1)
+    assert result.reread == 2
+    assert result.stale == n - 2
+    assert result.rows_read == len(trades) - n
+    assert result.duplicates == trades['Transaction Hash'].duplicated().iloc[n:].sum()
+    assert (result.watermark, result.watermark_rows) == (trades['Timestamp'].max(), 1)
+
+
+def test_appended_rows_are_read_from_the_resume_offset(trades_csv, fear_greed, tmp_path):
+    trades = pd.read_csv(trades_csv)
+    n = len(trades) // 2
+    daily, first, full = tmp_path / 'daily.csv', tmp_path / 'first.csv', tmp_path / 'full.csv'
+    trades.iloc[:n].to_csv(daily, index=False)
+    trades.iloc[:n].to_csv(first, index=False)
+    trades.to_csv(full, index=False)
+
+    appended_dir, rescanned_dir = str(tmp_path / 'appended'), str(tmp_path / 'rescanned')
+    incremental.update(str(daily), fear_greed, appended_dir, memory_limit_mb=1)
+    trades.iloc[n:].to_csv(daily, mode='a', header=False, index=False)
+    appended = incremental.update(str(daily), fear_greed, appended_dir, memory_limit_mb=1)
+    incremental.update(str(first), fear_greed, rescanned_dir, memory_limit_mb=1)
+    rescanned = incremental.update(str(full), fear_greed, rescanned_dir, memory_limit_mb=1)
+
+    assert (appended.rows_read, appended.stale) == (len(trades) - n, 0)
+    assert rescanned.stale == n - 1
+    assert appended.duplicates == rescanned.duplicates
+    pd.testing.assert_frame_equal(appended.groups, rescanned.groups)
+
+    # A rewritten file no longer matches the bytes before the offset and is read in full
+    trades.iloc[::-1].to_csv(daily, index=False)
+    rewritten = incremental.update(str(daily), fear_greed, appended_dir, memory_limit_mb=1)
+    assert rewritten.stale + rewritten.reread == len(trades)
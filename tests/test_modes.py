@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from conftest import ROWS
+from sentiment_pipeline.cli import main
+from sentiment_pipeline.streaming import EXACT_PEAK_BYTES_PER_ROW, exact_memory_mb
+
+DAILY = 'outputs/daily_statistics.csv'
+BASE_ARGS = ['--no-plots', '--no-cache', '--quiet']
+
+
+@pytest.fixture
+def full_daily(workdir):
+    assert main(BASE_ARGS) == 0
+    return pd.read_csv(DAILY)
+
+
+@pytest.mark.parametrize('mode', [
+    ['--stream', '--memory-limit-mb', '1'],
+    ['--workers', '2', '--memory-limit-mb', '1'],
+])
+def test_daily_statistics_match_full_run(full_daily, mode):
+    assert main(BASE_ARGS + mode) == 0
+    pd.testing.assert_frame_equal(pd.read_csv(DAILY), full_daily, check_exact=False, rtol=1e-9)
+
+
+def test_incremental_update_keeps_the_bootstrap_join_settings(workdir):
+    # Unpublished days get features only with --as-of
+    path = 'data/fear_greed_index.csv'
+    fear_greed = pd.read_csv(path)
+    fear_greed[fear_greed.index % 10 != 5].to_csv(path, index=False)
+    assert main(BASE_ARGS + ['--incremental', '--as-of']) == 0
+    bootstrapped = pd.read_csv(DAILY)
+    # Features must use the stored --as-of too, not the flags of the update
+    assert main(BASE_ARGS + ['--incremental']) == 0
+    pd.testing.assert_frame_equal(pd.read_csv(DAILY), bootstrapped)
+
+
+def test_exact_memory_projection(trades_csv):
+    expected = ROWS * EXACT_PEAK_BYTES_PER_ROW / 2**20
+    assert exact_memory_mb(trades_csv) == pytest.approx(expected, rel=0.05)
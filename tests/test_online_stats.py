@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from sentiment_pipeline.online_stats import Moments, SentimentTests
+
+LABELS = np.array(['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed'])
+
+
+@pytest.fixture(scope='module')
+def sample():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(LABELS), 50_000)
+    pnl = rng.standard_t(3, len(codes)) * 50 + codes * 2 + 1e6
+    return codes, pnl
+
+
+def _accumulate(codes, pnl, chunks, **kwargs):
+    tests = SentimentTests(**kwargs)
+    for part in np.array_split(np.arange(len(pnl)), chunks):
+        tests.merge(SentimentTests(**kwargs).update(codes[part], LABELS, pnl[part]))
+    return tests
+
+
+def test_merged_moments_match_numpy(sample):
+    _, pnl = sample
+    moments = Moments()
+    for chunk in np.array_split(pnl, 7):
+        moments.merge(Moments.from_values(chunk))
+    assert moments.n == len(pnl)
+    # The 1e6 offset would cancel in sum / sum-of-squares arithmetic
+    assert moments.mean == pytest.approx(pnl.mean(), rel=1e-12)
+    assert moments.var == pytest.approx(pnl.var(ddof=1), rel=1e-9)
+
+
+@pytest.mark.parametrize('equal_var', [True, False])
+def test_ttest_matches_scipy(sample, equal_var):
+    codes, pnl = sample
+    tests = _accumulate(codes, pnl, 5)
+    expected = stats.ttest_ind(pnl[codes == 0], pnl[codes == 4], equal_var=equal_var)
+    assert tests.ttest('Extreme Fear', 'Extreme Greed', equal_var) == pytest.approx(tuple(expected), rel=1e-8)
+
+
+def test_anova_matches_scipy(sample):
+    codes, pnl = sample
+    k, f_stat, p = _accumulate(codes, pnl, 5).anova()
+    expected = stats.f_oneway(*(pnl[codes == c] for c in range(len(LABELS))))
+    assert k == len(LABELS)
+    assert (f_stat, p) == pytest.approx(tuple(expected), rel=1e-8)
+
+
+def test_kruskal_matches_scipy_when_bins_hold_one_value():
+    rng = np.random.default_rng(1)
+    codes = rng.integers(0, len(LABELS), 20_000)
+    # Integer PnL with one bin per value: binned ranks are the exact midranks
+    pnl = (rng.integers(0, 100, len(codes)) + codes * 3).astype(np.float64)
+    tests = _accumulate(codes, pnl, 4, bounds=(0, 128), bins=128)
+    expected = stats.kruskal(*(pnl[codes == c] for c in range(len(LABELS))))
+    assert tests.kruskal() == pytest.approx(tuple(expected), rel=1e-9)
+
+
+def test_round_trip(sample):
+    codes, pnl = sample
+    tests = _accumulate(codes, pnl, 3, bounds=(pnl.min(), pnl.max()))
+    restored = SentimentTests.from_dict(tests.to_dict())
+    assert restored.anova() == pytest.approx(tests.anova())
+    assert restored.kruskal() == pytest.approx(tests.kruskal())
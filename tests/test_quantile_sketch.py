@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from sentiment_pipeline.quantile_sketch import TDigest
+
+QUANTILES = [0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999]
+
+
+@pytest.fixture(scope='module')
+def values():
+    # Heavy-tailed, like trade PnL
+    return np.random.default_rng(0).standard_t(2, 200_000) * 100
+
+
+def _assert_within_bound(digest, values):
+    ranked = np.sort(values)
+    for q in QUANTILES:
+        estimate = digest.quantile(q)
+        rank = np.searchsorted(ranked, estimate) / len(ranked)
+        bound = np.pi / digest.compression * np.sqrt(q * (1 - q)) + 1 / len(ranked)
+        assert abs(rank - q) <= bound, f'q={q}: rank {rank:.5f}, bound {bound:.5f}'
+
+
+@pytest.mark.parametrize('compression', [100, 1000])
+def test_rank_error_within_documented_bound(values, compression):
+    digest = TDigest.from_values(values, compression)
+    _assert_within_bound(digest, values)
+    assert digest.count == len(values)
+    assert (digest.min, digest.max) == (values.min(), values.max())
+
+
+def test_merged_digests_keep_the_bound(values):
+    digest = TDigest()
+    for chunk in np.array_split(values, 16):
+        digest.merge(TDigest.from_values(chunk))
+    _assert_within_bound(digest, values)
+    assert (digest.quantile(0), digest.quantile(1)) == (values.min(), values.max())
+
+
+def test_round_trip(values):
+    digest = TDigest.from_values(values)
+    restored = TDigest.from_dict(digest.to_dict())
+    assert restored.quantile(QUANTILES) == pytest.approx(digest.quantile(QUANTILES))
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from sentiment_pipeline.cli import main
+from sentiment_pipeline.resampling import resample
+
+INTERVALS = 'outputs/resampling_intervals.csv'
+
+
+def test_resample_ignores_row_order(merged):
+    frame, pnl_col = merged
+    shuffled = frame.sample(frac=1, random_state=3)
+    expected = resample(frame, pnl_col, resamples=200, seed=7)
+    result = resample(shuffled, pnl_col, resamples=200, seed=7)
+    pd.testing.assert_frame_equal(result.intervals, expected.intervals)
+    assert result.permutation == pytest.approx(expected.permutation)
+
+
+def test_cold_and_cached_runs_agree(workdir, shuffled_csv, capsys):
+    args = ['--no-plots', '--resamples', '200', '--trades-file', shuffled_csv]
+    assert main(args) == 0
+    cold = pd.read_csv(INTERVALS)
+    capsys.readouterr()
+    # The second run reads the month-partitioned cache, whose rows are in date order
+    assert main(args) == 0
+    assert '[CACHE] Loading' in capsys.readouterr().out
+    pd.testing.assert_frame_equal(pd.read_csv(INTERVALS), cold)
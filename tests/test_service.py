@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from sentiment_pipeline.aggregation import aggregate, save_groups, save_tests
+from sentiment_pipeline.cube import build_cube
+from sentiment_pipeline.service import QueryService
+
+
+@pytest.fixture(scope='module')
+def paths(merged, tmp_path_factory):
+    frame, pnl_col = merged
+    directory = tmp_path_factory.mktemp('service')
+    agg = aggregate(frame, pnl_col)
+    groups_path = save_groups(agg.groups, str(directory / 'sentiment_groups.csv'))
+    cube_path = build_cube(frame, pnl_col).save(str(directory / 'sentiment_cube.parquet'))
+    tests_path = save_tests(agg.tests, str(directory / 'sentiment_tests.json'))
+    return groups_path, cube_path, tests_path
+
+
+@pytest.fixture
+def service(paths):
+    groups_path, cube_path, tests_path = paths
+    service = QueryService(groups_path, cube_path, tests_path=tests_path)
+    assert asyncio.run(service.refresh())
+    return service
+
+
+def _json(response):
+    status, body = response
+    return status, json.loads(body)
+
+
+def test_endpoints_answer_from_the_saved_files(service, merged):
+    frame, _ = merged
+    status, overall = _json(service.respond('/overall'))
+    assert status == 200
+    assert overall['count'] == len(frame)
+    status, rows = _json(service.respond('/cube?group_by=classification'))
+    assert status == 200
+    assert sum(row['count'] for row in rows) == len(frame)
+    for path in ['/sentiment', '/tests?welch=1', '/buy-sell', '/daily?start=2024-01-01', '/health']:
+        assert service.respond(path)[0] == 200, path
+
+
+def test_unfiltered_tests_come_from_the_saved_accumulators(service, merged):
+    frame, pnl_col = merged
+    expected = aggregate(frame, pnl_col).tests.summary(welch=True, kruskal=True)
+    status, tests = _json(service.respond('/tests?welch=1&kruskal=1'))
+    assert status == 200
+    assert not tests['approximate']
+    assert (tests['ttest']['t'], tests['ttest']['p']) == pytest.approx(expected['ttest'])
+    assert (tests['anova']['f'], tests['anova']['p']) == pytest.approx(expected['anova'][1:])
+    assert (tests['kruskal']['h'], tests['kruskal']['p']) == pytest.approx(expected['kruskal'])
+
+    status, filtered = _json(service.respond('/tests?kruskal=1&start=2024-01-01'))
+    assert status == 200
+    assert filtered['approximate']
+    assert filtered['kruskal'] is None
+
+
+@pytest.mark.parametrize('target, status', [
+    ('/nope', 404),
+    ('/overall?start=abc', 400),
+    ('/daily?end=2024-13-40', 400),
+    ('/sentiment?sentiment=Bogus', 400),
+    ('/cube?foo=1', 400),
+    ('/cube?group_by=bogus', 400),
+])
+def test_bad_requests(service, target, status):
+    got, body = _json(service.respond(target))
+    assert got == status
+    assert 'error' in body
+
+
+def test_missing_cube_is_unavailable(paths):
+    service = QueryService(paths[0], cube_path=None)
+    asyncio.run(service.refresh())
+    assert service.respond('/cube')[0] == 503
+    assert service.respond('/overall')[0] == 200
+
+
+def test_answers_are_cached(service):
+    first = service.respond('/sentiment?sentiment=Fear,Greed')
+    assert service.respond('/sentiment?sentiment=Fear,Greed') == first
+    assert service.cache.hits == 1
+
+
+async def _request(port, lines):
+    """Send raw request lines on one connection; return the raw responses as bytes."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(''.join(lines).encode('latin-1'))
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data
+
+
+def _get(target, *headers, connection='close'):
+    return ''.join([f'GET {target} HTTP/1.1\r\n', *(f'{h}\r\n' for h in headers),
+                    f'Connection: {connection}\r\n\r\n'])
+
+
+def test_http_etag_revalidation(service):
+    async def scenario():
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            ok = await _request(port, [_get('/overall')])
+            missing = await _request(port, [_get('/nope')])
+            # Two requests on one keep-alive connection, the second revalidating
+            revalidated = await _request(port, [_get('/overall', connection='keep-alive'),
+                                                _get('/overall', f'If-None-Match: {service.etag}')])
+            posted = await _request(port, ['POST /overall HTTP/1.1\r\nContent-Length: 2\r\n'
+                                           'Connection: close\r\n\r\n{}'])
+        finally:
+            server.close()
+            await server.wait_closed()
+        return ok, missing, revalidated, posted
+
+    ok, missing, revalidated, posted = asyncio.run(scenario())
+    assert ok.startswith(b'HTTP/1.1 200 OK')
+    assert f'ETag: {service.etag}'.encode() in ok
+    assert missing.startswith(b'HTTP/1.1 404')
+    assert b'ETag' not in missing
+    assert revalidated.count(b'HTTP/1.1 200') == 1
+    assert revalidated.rstrip().endswith(b'Content-Length: 0')
+    assert b'HTTP/1.1 304 Not Modified' in revalidated
+    assert posted.startswith(b'HTTP/1.1 405')
+
+
+def test_reload_changes_etag(service, paths, merged):
+    frame, pnl_col = merged
+    etag = service.etag
+    service.respond('/overall')
+    # Replace the groups file like a run does, with a fresh modification time
+    subset = frame[frame['classification'] == 'Fear']
+    save_groups(aggregate(subset, pnl_col).groups, paths[0])
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    try:
+        assert asyncio.run(service.refresh())
+        assert service.etag != etag
+        assert _json(service.respond('/overall'))[1]['count'] == len(subset)
+    finally:
+        save_groups(aggregate(frame, pnl_col).groups, paths[0])
@@ -0,0 +1,108 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentiment_pipeline.cli import main
+from sentiment_pipeline.store import MANIFEST, TradeStore, write_store
+
+
+@pytest.fixture(scope='module')
+def ingested(merged, tmp_path_factory):
+    frame, pnl_col = merged
+    directory = str(tmp_path_factory.mktemp('store') / 'trade_store')
+    # Out of date order, like a cached or appended frame
+    shuffled = frame.sample(frac=1, random_state=5)
+    assert write_store(shuffled, directory, {'pnl_col': pnl_col}) == len(frame)
+    return TradeStore(directory), shuffled.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def _window(expected, start, end):
+    days = expected['date']
+    return expected[(days >= start) & (days <= end)].reset_index(drop=True)
+
+
+def _assert_same(result, expected):
+    assert result.columns.tolist() == expected.columns.tolist()
+    assert len(result) == len(expected)
+    for name in expected.columns:
+        left, right = result[name], expected[name]
+        if isinstance(left.dtype, pd.CategoricalDtype) or isinstance(right.dtype, pd.CategoricalDtype):
+            left, right = left.astype(object), right.astype(object)
+        else:
+            # Store columns are memory maps; compare their values
+            left = pd.Series(np.array(left), name=name)
+        pd.testing.assert_series_equal(left, right, check_dtype=False, obj=name)
+
+
+def test_full_history_round_trip(ingested):
+    store, expected = ingested
+    assert len(store) == len(expected)
+    assert store.manifest['pnl_col'] in store.columns
+    assert store.date_range == (expected['date'].min(), expected['date'].max())
+    _assert_same(store.frame(), expected)
+
+
+def test_window_read(ingested):
+    store, expected = ingested
+    start, end = expected['date'].quantile([0.4, 0.6]).dt.normalize().tolist()
+    columns = ['date', 'classification', store.manifest['pnl_col']]
+    window = _window(expected, start, end)
+    assert 0 < len(window) < len(expected)
+    _assert_same(store.frame(columns, start, end), window[columns])
+
+
+def test_window_reads_do_not_copy(ingested):
+    store, _ = ingested
+    pnl_col = store.manifest['pnl_col']
+    lo, hi = store.rows('2024-01-01', '2024-12-31')
+    frame = store.frame([pnl_col], '2024-01-01', '2024-12-31')
+    assert len(frame) == hi - lo
+    assert np.shares_memory(frame[pnl_col].to_numpy(), store.array(pnl_col))
+    assert not store.array(pnl_col).flags.writeable
+
+
+def test_windows_outside_the_history_are_empty(ingested):
+    store, _ = ingested
+    first, last = store.date_range
+    assert store.frame(['date'], end=first - pd.Timedelta(days=1)).empty
+    assert store.frame(['date'], start=last + pd.Timedelta(days=1)).empty
+    assert store.frame(['date'], start=last, end=first).empty
+
+
+def test_unknown_version_is_rejected(ingested, tmp_path):
+    store, _ = ingested
+    with open(os.path.join(store.directory, MANIFEST)) as fh:
+        manifest = json.load(fh)
+    directory = tmp_path / 'old'
+    directory.mkdir()
+    with open(directory / MANIFEST, 'w') as fh:
+        json.dump({**manifest, 'version': 0}, fh)
+    with pytest.raises(ValueError, match='--ingest'):
+        TradeStore(str(directory))
+
+
+def test_windowed_store_run_keeps_full_history_outputs(workdir):
+    args = ['--no-plots', '--no-cache', '--quiet', '--cube']
+    assert main(['--ingest'] + args) == 0
+    assert main(['--from-store'] + args) == 0
+    full = {name: os.path.getmtime(f'outputs/{name}') for name in os.listdir('outputs')
+            if os.path.isfile(f'outputs/{name}')}
+    full_daily = pd.read_csv('outputs/daily_statistics.csv', parse_dates=['date'])
+
+    start, end = '2024-03-01', '2024-03-31'
+    assert main(['--from-store', '--start', start, '--end', end] + args) == 0
+    assert {name: os.path.getmtime(f'outputs/{name}') for name in full} == full
+    window_dir = f'outputs/window_{start}_{end}'
+    daily = pd.read_csv(f'{window_dir}/daily_statistics.csv', parse_dates=['date'])
+    expected = full_daily[full_daily['date'].between(start, end)].reset_index(drop=True)
+    assert len(daily) > 0
+    pd.testing.assert_frame_equal(daily, expected)
+    assert os.path.exists(f'{window_dir}/sentiment_groups.csv')
+    assert os.path.exists(f'{window_dir}/sentiment_tests.json')
+    assert any(name.startswith('sentiment_cube') for name in os.listdir(window_dir))
+
+    assert main(['--from-store', '--start', start] + args) == 0
+    assert os.path.exists(f'outputs/window_{start}_last/daily_statistics.csv')